@@ -0,0 +1,180 @@
+import asyncio
+import contextlib
+import math
+import time
+from collections import OrderedDict, deque
+from collections.abc import Hashable
+
+from fastapi import HTTPException, status
+
+from .config import (
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_QUEUE_PER_USER,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+from .metrics import admission_queue_wait_seconds, admission_rejections_total
+
+
+class AdmissionTicket:
+    """
+    AdmissionController가 내준 실행 슬롯 하나
+
+    release()는 여러 번 호출해도 한 번만 반환되므로, 스트리밍 응답처럼 종료 경로가 여러 곳인 경우에도 안전함.
+    """
+
+    def __init__(self, controller: "AdmissionController | None"):
+        self._controller = controller
+        self._acquired_at = time.monotonic()
+        self._released = controller is None
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.monotonic() - self._acquired_at)
+
+
+class AdmissionController:
+    """
+    상위 LLM을 호출하는 요청의 동시 실행 수를 제한하고, 사용자별로 공평하게 순서를 정하는 클래스
+
+    [작동 방식]
+    1. 동시에 실행 중인 요청이 max_concurrent개 미만이고 기다리는 요청이 없으면 바로 실행.
+    2. 그 외에는 사용자별 대기열에 넣고, 슬롯이 반환될 때마다 사용자들을 돌아가며(round-robin)
+       한 요청씩 실행시킴. 한 사용자가 요청을 많이 보내도 다른 사용자의 요청이 그 뒤에 밀리지 않음.
+    3. 전체 대기열이 max_queue개, 한 사용자의 대기열이 max_queue_per_user개 이상이면 기다리지 않고 즉시 429 반환.
+       queue_timeout 동안 슬롯을 얻지 못한 요청도 429로 반환. (Retry-After는 최근 처리 시간으로 추정)
+    4. 대기 시간과 거절 수는 측정값(/metrics)으로 기록.
+
+    max_concurrent가 0 이하이면 제한하지 않음.
+    단일 이벤트 루프 안에서 사용하는 것을 전제로 하므로 별도의 lock은 사용하지 않음.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_queue_per_user: int = ADMISSION_MAX_QUEUE_PER_USER,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.queued = 0
+        # 사용자 ID -> 슬롯을 기다리는 Future 목록 (사용자 순서가 곧 round-robin 순서)
+        self._waiters: OrderedDict[Hashable, deque[asyncio.Future]] = OrderedDict()
+        # 슬롯 하나를 사용하는 평균 시간 (지수 이동 평균, Retry-After 추정용)
+        self._average_hold = 1.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    async def acquire(self, user_id: Hashable) -> AdmissionTicket:
+        """
+        실행 슬롯 하나 얻기 (필요하면 차례가 올 때까지 기다림)
+
+        Raises:
+            HTTPException(429): 대기열이 가득 찼거나 queue_timeout 안에 차례가 오지 않은 경우
+        """
+        if not self.enabled:
+            return AdmissionTicket(None)
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            admission_queue_wait_seconds.observe(0, outcome="admitted")
+            return AdmissionTicket(self)
+
+        user_waiters = self._waiters.get(user_id)
+        if self.queued >= self.max_queue:
+            self._reject("queue_full", 0)
+        if user_waiters is not None and len(user_waiters) >= self.max_queue_per_user:
+            self._reject("user_queue_full", 0)
+
+        future = asyncio.get_running_loop().create_future()
+        if user_waiters is None:
+            user_waiters = self._waiters[user_id] = deque()
+        user_waiters.append(future)
+        self.queued += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            if future.done() and not future.cancelled():
+                # 차례가 온 직후에 취소/시간 초과된 경우, 받은 슬롯을 다음 요청에 넘김
+                self._hand_over()
+            else:
+                future.cancel()
+                self._remove_waiter(user_id, future)
+            if isinstance(error, asyncio.CancelledError):
+                raise
+            self._reject("timeout", time.monotonic() - started)
+        admission_queue_wait_seconds.observe(
+            time.monotonic() - started, outcome="admitted"
+        )
+        return AdmissionTicket(self)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, user_id: Hashable):
+        """async with 블록 동안 실행 슬롯 하나를 사용하기"""
+        ticket = await self.acquire(user_id)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _reject(self, reason: str, waited: float):
+        admission_rejections_total.inc(reason=reason)
+        admission_queue_wait_seconds.observe(waited, outcome="rejected")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many chat requests in progress. Please retry shortly.",
+            headers={"Retry-After": str(self._estimate_retry_after())},
+        )
+
+    def _estimate_retry_after(self) -> int:
+        rounds = (self.queued + 1) / max(1, self.max_concurrent)
+        return min(60, max(1, math.ceil(self._average_hold * rounds)))
+
+    def _remove_waiter(self, user_id: Hashable, future: asyncio.Future):
+        user_waiters = self._waiters.get(user_id)
+        if user_waiters is None:
+            return
+        with contextlib.suppress(ValueError):
+            user_waiters.remove(future)
+            self.queued -= 1
+        if not user_waiters:
+            del self._waiters[user_id]
+
+    def _release(self, held: float):
+        self._average_hold += 0.2 * (held - self._average_hold)
+        self._hand_over()
+
+    def _hand_over(self):
+        # 다음 사용자의 가장 오래된 요청에 슬롯을 넘기고, 그 사용자는 순서의 맨 뒤로 보냄
+        while self._waiters:
+            user_id, user_waiters = next(iter(self._waiters.items()))
+            future = user_waiters.popleft()
+            self.queued -= 1
+            if user_waiters:
+                self._waiters.move_to_end(user_id)
+            else:
+                del self._waiters[user_id]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def get_stats(self) -> dict:
+        """현재 실행 중/대기 중인 요청 수와 대기 중인 사용자 수"""
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "queued_users": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+        }
+
+
+admission_controller = AdmissionController()
@@ -1,11 +1,23 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from dotenv import load_dotenv
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from jose import jwt, JWTError
+import asyncio
+import functools
 import os
+import time
+from .cache import LRUCache
+from .config import (
+    TOKEN_CACHE_MAX_ENTRIES,
+    TOKEN_CACHE_TTL_SECONDS,
+    PASSWORD_HASH_POOL,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING,
+)
 from .database import get_db
 from .models import UserModel
 
@@ -17,11 +29,39 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+@functools.cache
+def _password_context():
+    # passlib은 import와 초기화가 무거우므로 처음 해시화/검증할 때 불러옴 (워커 부팅 시간 단축)
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    토큰으로 인증된 사용자 정보 (DB 세션과 무관하게 캐시에 보관할 수 있는 값)
+
+    Attributes:
+        id (int): 사용자의 고유 식별자
+        username (str): 사용자명
+    """
+
+    id: int
+    username: str
+
+
+# 검증된 토큰 -> AuthenticatedUser (프로세스 내부 LRU 캐시)
+# 토큰 폐기/사용자 삭제 API가 없으므로 캐시 항목을 따로 무효화하지 않음.
+# 캐시된 인증 결과는 워커마다 최대 TOKEN_CACHE_TTL_SECONDS 동안 유지되며, 이 값이 토큰 폐기가 반영되는 시간의 상한.
+token_cache = LRUCache(
+    max_entries=TOKEN_CACHE_MAX_ENTRIES, ttl_seconds=TOKEN_CACHE_TTL_SECONDS
+)
+
+
 def get_hashed_password(password: str):
     """
     주어진 평문 비밀번호를 해시화
@@ -32,7 +72,7 @@ def get_hashed_password(password: str):
     Returns:
         str: PBKDF2-SHA256으로 해시화된 비밀번호
     """
-    return pwd_context.hash(password)
+    return _password_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str):
@@ -46,7 +86,77 @@ def verify_password(plain_password: str, hashed_password: str):
     Returns:
         bool: 비밀번호 일치 여부
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _password_context().verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    PBKDF2 비밀번호 해시화/검증을 이벤트 루프 밖의 전용 작업 풀에서 실행하는 클래스
+
+    [작동 방식]
+    1. 해시 계산은 수십 ms 동안 CPU를 사용하므로, 크기가 정해진 thread/process 풀에서 실행.
+       (hashlib의 PBKDF2는 계산 중 GIL을 놓기 때문에 thread 풀로도 병렬 처리됨)
+    2. 실행 중이거나 대기 중인 작업이 max_pending개 이상이면 즉시 503을 반환하여,
+       로그인이 몰릴 때 대기열이 끝없이 쌓이지 않도록 함.
+    3. workers가 0이면 풀을 사용하지 않고 이벤트 루프에서 바로 계산 (이전 방식, 비교 측정용).
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+        pool: str = PASSWORD_HASH_POOL,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pool = pool
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.pool == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests. Please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """get_hashed_password를 작업 풀에서 실행"""
+        return await self._run(get_hashed_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password를 작업 풀에서 실행"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        """작업 풀 종료 (애플리케이션 종료 시 호출)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
 
 
 def create_token(username: str, expires_delta: timedelta):
@@ -68,6 +178,8 @@ def create_token(username: str, expires_delta: timedelta):
         "sub": username,
         "exp": datetime.now(timezone.utc) + expires_delta,
     }
+    from jose import jwt
+
     return jwt.encode(encode_data, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -81,6 +193,9 @@ def verify_token(token: str):
     Returns:
         dict | None: 토큰이 유효한 경우 디코딩된 페이로드, 유효하지 않은 경우 None
     """
+    # python-jose는 암호화 백엔드까지 함께 불러오므로 처음 토큰을 다룰 때 import (이후에는 sys.modules에서 바로 반환)
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -88,18 +203,22 @@ def verify_token(token: str):
         return None
 
 
-def get_user_from_token(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
+async def get_user_from_token(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> AuthenticatedUser:
     """
     JWT 토큰으로부터 현재 인증된 사용자를 조회
 
+    한 번 검증한 토큰은 token_cache에 보관하여, 이후 요청에서는 JWT 디코딩과 DB 조회를 생략함.
+    캐시 유효 기간은 TOKEN_CACHE_TTL_SECONDS와 토큰 만료(exp)까지 남은 시간 중 짧은 쪽이며,
+    그동안 사용자가 삭제되더라도 캐시된 인증 결과가 사용됨. (워커마다 따로 캐시하므로 워커별 상한)
+
     Args:
         token (str): Bearer 토큰 (FastAPI의 oauth2_scheme을 통해 자동으로 주입됨)
-        db (Session): 데이터베이스 세션 (FastAPI의 의존성 주입을 통해 자동으로 주입됨)
+        db (AsyncSession): 비동기 데이터베이스 세션 (FastAPI의 의존성 주입을 통해 자동으로 주입됨)
 
     Returns:
-        UserModel: 인증된 사용자 모델 인스턴스
+        AuthenticatedUser: 인증된 사용자의 ID와 사용자명
 
     Raises:
         HTTPException: 다음의 경우 401 Unauthorized 예외가 발생:
@@ -113,13 +232,23 @@ def get_user_from_token(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     payload = verify_token(token)
     if payload is None:
         raise credentials_exception
     username = payload.get("sub")
     if username is None:
         raise credentials_exception
-    user = db.query(UserModel).filter(UserModel.username == username).first()
-    if user is None:
+    user_model = await db.scalar(
+        select(UserModel).where(UserModel.username == username)
+    )
+    if user_model is None:
         raise credentials_exception
+
+    user = AuthenticatedUser(id=user_model.id, username=user_model.username)
+    ttl_seconds = min(TOKEN_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+    token_cache.set(token, user, ttl_seconds=ttl_seconds)
     return user
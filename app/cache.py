@@ -0,0 +1,141 @@
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, asdict
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    """
+    LRUCache의 누적 통계
+
+    Attributes:
+        hits (int): 캐시에서 값을 찾은 횟수
+        misses (int): 캐시에 값이 없거나 만료되어 찾지 못한 횟수
+        evictions (int): 개수/메모리 한도 때문에 밀려난 항목 수
+        expirations (int): TTL이 지나 제거된 항목 수
+        entries (int): 현재 저장된 항목 수
+        size_bytes (int): 현재 저장된 항목의 추정 메모리 크기
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self):
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class LRUCache:
+    """
+    프로세스 내부에서 사용하는 크기 제한 LRU 캐시
+
+    [작동 방식]
+    1. 조회/저장할 때마다 해당 항목을 가장 최근 위치로 옮김.
+    2. 항목 수가 max_entries를, 추정 메모리가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 제거.
+    3. 항목마다 만료 시각을 두고, 만료된 항목은 조회 시점에 제거하고 miss로 취급.
+
+    단일 이벤트 루프 안에서 사용하는 것을 전제로 하므로 별도의 lock은 사용하지 않음.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.stats = CacheStats()
+        # key -> (value, 만료 시각, 추정 크기)
+        self._entries: OrderedDict[Hashable, tuple[Any, float, int]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.peek(key) is not None
+
+    def get(self, key: Hashable) -> Any | None:
+        """값을 조회하고 hit/miss를 기록 (없거나 만료되었으면 None)"""
+        value = self.peek(key)
+        if value is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def peek(self, key: Hashable) -> Any | None:
+        """통계와 LRU 순서에 영향을 주지 않고 값을 조회 (없거나 만료되었으면 None)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.stats.expirations += 1
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None):
+        """값을 저장하고, 한도를 넘으면 오래된 항목부터 제거"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            self.invalidate(key)
+            return
+        self._remove(key)
+        size = self.sizeof(value)
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.stats.entries += 1
+        self.stats.size_bytes += size
+        self._evict()
+
+    def resize(self, key: Hashable):
+        """저장된 값이 제자리에서 변경된 뒤 추정 크기를 다시 계산 (만료 시각은 유지)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        value, expires_at, old_size = entry
+        size = self.sizeof(value)
+        self._entries[key] = (value, expires_at, size)
+        self.stats.size_bytes += size - old_size
+        self._evict()
+
+    def invalidate(self, key: Hashable):
+        """항목을 즉시 제거"""
+        self._remove(key)
+
+    def clear(self):
+        """모든 항목을 제거"""
+        self._entries.clear()
+        self.stats.entries = 0
+        self.stats.size_bytes = 0
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.stats.entries -= 1
+            self.stats.size_bytes -= entry[2]
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.stats.size_bytes > self.max_bytes)
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.stats.evictions += 1
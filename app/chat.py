@@ -1,9 +1,30 @@
+import logging
+import sys
 from dataclasses import dataclass
 
-from .orm import ORM
-import requests
+from .cache import LRUCache
+from .completion_cache import completion_cache, make_completion_key
+from .config import (
+    HISTORY_CACHE_MAX_SESSIONS,
+    HISTORY_CACHE_MAX_BYTES,
+    HISTORY_CACHE_TTL_SECONDS,
+)
+from .context import context_window
+from .database import AsyncSessionLocal
+from .group_commit import chat_write_queue
+from .introduction_cache import introduction_cache, make_persona_key
+from .metrics import (
+    chat_history_messages,
+    chat_history_stale_total,
+    upstream_prompt_messages,
+    upstream_prompt_characters,
+)
+from .orm import AsyncORM
+from .prompts import INTRODUCTION_PROMPT
+from .singleflight import SingleFlight
+from .upstream import UpstreamClient
 
-URL_ENDPOINT = "https://open-api.jejucodingcamp.workers.dev/"
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -32,6 +53,9 @@ class ChatHistory:
     def append(self, message):
         self._messages.append(message)
 
+    def pop(self):
+        return self._messages.pop()
+
     def clear(self):
         self._messages.clear()
 
@@ -39,30 +63,92 @@ class ChatHistory:
         """Message 목록의 개별 Message 객체를 ChatGPT가 이해하는 dict 형태로 변환하기"""
         return [msg.to_dict() for msg in self._messages]
 
+    def copy(self):
+        """Message 목록만 새로 만든 얕은 복사본 반환하기 (Message 객체는 공유)"""
+        chat_history = ChatHistory()
+        chat_history._messages = self._messages.copy()
+        return chat_history
+
+    def approximate_size(self):
+        """캐시 메모리 한도 계산을 위한 추정 메모리 크기(bytes)"""
+        return sys.getsizeof(self._messages) + sum(
+            sys.getsizeof(msg) + sys.getsizeof(msg.content) for msg in self._messages
+        )
+
+
+# Session ID -> 해당 Session의 ChatHistory (프로세스 내부 LRU 캐시)
+# 워커마다 따로 유지되므로, 사용할 때마다 sessions.message_count와 채팅 수를 비교하여 다른 워커가 저장한 채팅이 없는지 확인함
+history_cache = LRUCache(
+    max_entries=HISTORY_CACHE_MAX_SESSIONS,
+    ttl_seconds=HISTORY_CACHE_TTL_SECONDS,
+    max_bytes=HISTORY_CACHE_MAX_BYTES,
+    sizeof=ChatHistory.approximate_size,
+)
+
+# Session ID별로 진행 중인 자기소개 생성 작업
+introduction_flights = SingleFlight()
+
+
+def _observe_prompt(messages_dict_list):
+    """상위 LLM에 실제로 보내는 prompt의 메시지 수와 글자 수 기록하기"""
+    upstream_prompt_messages.observe(len(messages_dict_list))
+    upstream_prompt_characters.observe(
+        sum(len(message["content"]) for message in messages_dict_list)
+    )
+
 
 class ChatManager:
     """
     ChatGPT 통신하기 위한 매니저 클래스
 
     [작동 방식]
-    1. 초기화 시점에 Session 정보를 받아서 Session에 속한 모든 Chat 정보를 Message로 변환하여 신규 ChatHistory 객체로 통합.
-    2. ChatGPT에 자기소개(introduction)를 요청할 때, ChatHistory에 prompt 질문 추가하여 전송.
+    1. ChatManager.create()로 생성하면서 Session 정보를 받아서 Session에 속한 모든 Chat 정보를 Message로 변환하여 신규 ChatHistory 객체로 통합.
+       (history_cache에 있고 채팅 수가 sessions.message_count와 같으면 대화 내역 조회 없이 캐시된 ChatHistory의 복사본을 사용,
+        다르면 다른 워커가 저장한 채팅이 있는 것이므로 DB에서 다시 읽음)
+    2. ChatGPT에 자기소개(introduction)를 요청할 때, 자기소개 prompt만 별도의 DB 세션에서 전송하고 저장 (introduction_flights).
     3. ChatGPT에 새로운 질문을 요청할 때, ChatHistory에 해당 질문 추가하여 전송.
+    4. 답변을 save_chat()으로 저장하면 history_cache에도 같은 질문과 답변을 추가 (write-through).
     """
 
-    def __init__(self, session_id, db):
+    def __init__(self, session_id, db, upstream: UpstreamClient):
         self.session_id = session_id
-        self.orm = ORM(db)
-        self.url_endpoint = URL_ENDPOINT
-        self.chat_history = self.gather_chat_history()
+        self.orm = AsyncORM(db)
+        self.upstream = upstream
+        self.session = None
+        self.chat_history = ChatHistory()
+        self.use_completion_cache = False
+
+    @classmethod
+    async def create(cls, session_id, db, upstream: UpstreamClient):
+        """ChatManager를 생성하고 Session의 대화 내역을 ChatHistory로 불러오기"""
+
+        chat_manager = cls(session_id, db, upstream)
+        # 스트리밍 응답은 요청 DB 세션이 닫힌 뒤에 진행되므로 Session 설정은 미리 확인
+        chat_manager.use_completion_cache = await completion_cache.is_enabled_for(
+            chat_manager.orm, session_id
+        )
+        cached_history = history_cache.get(session_id)
+        if cached_history is not None:
+            # 채팅은 추가만 되므로 개수가 같으면 캐시와 DB의 대화 내역이 같음
+            message_count = await chat_manager.orm.get_session_message_count(session_id)
+            if message_count == len(cached_history) // 2:
+                chat_manager.chat_history = cached_history.copy()
+                return chat_manager
+            history_cache.invalidate(session_id)
+            chat_history_stale_total.inc()
 
-    def gather_chat_history(self):
+        chat_manager.chat_history = await chat_manager.gather_chat_history()
+        if chat_manager.session:
+            history_cache.set(session_id, chat_manager.chat_history.copy())
+        return chat_manager
+
+    async def gather_chat_history(self):
         """Session에 속한 모든 Chat의 질문과 대답을 Message로 변환하여 ChatHistory 객체로 통합하기"""
 
-        session = self.orm.get_session_by_id(self.session_id)
+        self.session = await self.orm.get_session_by_id(self.session_id)
         chat_history = ChatHistory()
-        if session:
-            chat_list = session.chats
+        if self.session:
+            chat_list = await self.orm.get_chats_by_session(self.session_id)
             if len(chat_list) > 0:
                 chat_history.append(
                     Message(role="system", content=str(chat_list[0].question))
@@ -71,64 +157,217 @@ class ChatManager:
                     Message(role="assistant", content=str(chat_list[0].answer))
                 )
                 for chat in chat_list[1:]:
-                    print(f"[Q] {chat.question} [A] {chat.answer}")
                     chat_history.append(
                         Message(role="user", content=str(chat.question))
                     )
                     chat_history.append(
                         Message(role="assistant", content=str(chat.answer))
                     )
+        chat_history_messages.observe(len(chat_history))
+        logger.debug(
+            "chat history loaded session_id=%s chats=%d messages=%d",
+            self.session_id,
+            len(chat_history) // 2,
+            len(chat_history),
+        )
         return chat_history
 
-    def send_question_with_history(self):
-        """ChatGPT에 ChatHistory를 포맷 변환하여 질문을 보내고 답변 받기"""
+    async def send_question_with_history(self):
+        """ChatGPT에 ChatHistory를 포맷 변환하고 토큰 예산에 맞게 잘라서 질문을 보내고 답변 받기"""
 
-        messages_dict_list = self.chat_history.convert_messages_to_dict_list()
-        response = requests.post(url=self.url_endpoint, json=messages_dict_list)
-        # TODO: request 에러처리
-        return response.json()["choices"][0]["message"]["content"]
+        messages_dict_list = context_window.fit(
+            self.chat_history.convert_messages_to_dict_list()
+        )
+        cache_key = self._make_completion_cache_key(messages_dict_list)
+        if cache_key is not None:
+            cached_answer = await completion_cache.get(cache_key)
+            if cached_answer is not None:
+                return cached_answer
 
-    def add_question_into_history_and_get_answer(self, role, question):
+        await self.orm.release_connection()
+        _observe_prompt(messages_dict_list)
+        answer = await self.upstream.complete(messages_dict_list)
+        if cache_key is not None:
+            await completion_cache.set(cache_key, answer)
+        return answer
+
+    async def stream_question_with_history(self):
+        """ChatGPT에 ChatHistory를 포맷 변환하고 토큰 예산에 맞게 잘라서 질문을 보내고, 답변을 조각 단위로 받기"""
+
+        messages_dict_list = context_window.fit(
+            self.chat_history.convert_messages_to_dict_list()
+        )
+        cache_key = self._make_completion_cache_key(messages_dict_list)
+        if cache_key is not None:
+            cached_answer = await completion_cache.get(cache_key)
+            if cached_answer is not None:
+                yield cached_answer
+                return
+
+        await self.orm.release_connection()
+        _observe_prompt(messages_dict_list)
+        chunks = []
+        async for delta in self.upstream.stream(messages_dict_list):
+            chunks.append(delta)
+            yield delta
+        if cache_key is not None:
+            await completion_cache.set(cache_key, "".join(chunks))
+
+    def _make_completion_cache_key(self, messages_dict_list):
+        """
+        완성 캐시 key 만들기 (캐시를 사용하지 않는 경우 None)
+
+        사용자 질문에만 적용하며, 자기소개 prompt는 페르소나 자기소개 캐시가 따로 다루므로 제외.
+        """
+
+        if not self.use_completion_cache or not messages_dict_list:
+            return None
+        if messages_dict_list[-1]["role"] != "user":
+            return None
+        return make_completion_key(messages_dict_list)
+
+    async def add_question_into_history_and_get_answer(self, role, question):
         """새로운 질문을 기존 ChatHistory에 추가한 후, 전체 ChatHistory를 ChatGPT에게 전송해서 답변 받기"""
 
         self.chat_history.append(Message(role=role, content=question))
-        answer = self.send_question_with_history()
+        answer = await self.send_question_with_history()
         return answer
 
-    def get_introduction(self):
-        """ChatGPT가 수행할 역할을 설정하고, 자기소개 멘트를 확보하기"""
+    async def get_introduction(self):
+        """
+        ChatGPT가 수행할 역할을 설정하고, 자기소개 멘트를 확보하기
+
+        Returns:
+            tuple[str, str] | None: (자기소개 prompt, 자기소개 답변), 세션이 없으면 None
+        """
 
         def _make_introduction_prompt_message(year, location, persona):
-            """ChatGPT가 수행할 역할을 설정하는 prompt 메시지 생성하기"""
-            prompt = (
-                f"너는 {year}년에 {location} 지역에 살고 있는 '{persona}'인 사람이야. "
-                f"이 조건에 부합하는 실제 역사의 인물을 반드시 찾아보고, 찾았다면 그 사람인 것처럼 말해줘. "
-                f"못 찾았다면 최대한 그 시대와 지역에 있었을 법한 사람인 것처럼 대답해줘."
-                f"앞으로 말투도 그런 사람인 것처럼 대답해. 그렇지만 한국어로 말해야 해. "
-                f"너의 시대와 지역을 벗어나는 지식, 기술, 용어 등에 대해서는 전혀 몰라야 해. "
-                f"이름을 반드시 포함해서, 짧게 너 자신을 소개해줘."
+            """
+            ChatGPT가 수행할 역할을 설정하는 prompt 메시지 생성하기
+
+            템플릿으로 만든 문자열이므로, 저장할 때는 문장 대신 템플릿 ID와 파라미터만 저장됨.
+            """
+            return INTRODUCTION_PROMPT.render(
+                year=year, location=location, persona=persona
             )
-            return prompt
 
-        session = self.orm.get_session_by_id(self.session_id)
-        chat_list = session.chats
-        if len(chat_list) > 0:
-            chat = chat_list[0]
-            return chat.question, chat.answer
+        async def _generate_introduction():
+            """
+            자기소개를 생성하고 저장하기 (이 프로세스 안에서는 Session마다 동시에 하나만 실행됨)
 
-        introduction_prompt = _make_introduction_prompt_message(
-            year=session.year, location=session.location, persona=session.persona
-        )
-        introduction = self.add_question_into_history_and_get_answer(
-            role="system", question=introduction_prompt
-        )
-        self.orm.create_chat(self.session_id, introduction_prompt, introduction)
-        return introduction_prompt, introduction
+            요청 세션이 먼저 닫히더라도 다른 대기자를 위해 끝까지 진행해야 하므로 별도의 DB 세션을 사용하고,
+            처음 호출한 요청의 self.orm과 self.chat_history는 사용하지 않음. (상위 LLM도 이 안에서 직접 호출)
+            여러 워커 프로세스가 동시에 생성한 경우 상위 LLM 호출은 워커마다 일어날 수 있지만,
+            저장은 AsyncORM.create_introduction이 하나만 성공시키고 나머지는 먼저 저장된 자기소개를 반환함.
+            """
+            async with AsyncSessionLocal() as db:
+                orm = AsyncORM(db)
+                # 이 ChatManager가 대화 내역을 읽은 뒤에 다른 요청이 이미 자기소개를 저장했을 수 있음
+                first_chats = await orm.get_chats_by_session(
+                    self.session_id, after_id=0, limit=1
+                )
+                if first_chats:
+                    return first_chats[0].question, first_chats[0].answer
+
+                session = await orm.get_session_by_id(self.session_id)
+                if session is None:
+                    return None
+                introduction_prompt = _make_introduction_prompt_message(
+                    year=session.year,
+                    location=session.location,
+                    persona=session.persona,
+                )
+                # 같은 페르소나로 이미 생성해 둔 자기소개가 충분하면 상위 LLM 호출 없이 재사용
+                persona_key = make_persona_key(
+                    session.year, session.location, session.persona
+                )
+                introduction = await introduction_cache.pick(orm, persona_key)
+                if introduction is not None:
+                    return await _save_introduction(
+                        orm, introduction_prompt, introduction
+                    )
+
+                await orm.release_connection()
+                messages_dict_list = context_window.fit(
+                    [Message(role="system", content=introduction_prompt).to_dict()]
+                )
+                _observe_prompt(messages_dict_list)
+                introduction = await self.upstream.complete(messages_dict_list)
+                saved = await _save_introduction(orm, introduction_prompt, introduction)
+                await introduction_cache.add(orm, persona_key, introduction)
+                return saved
+
+        async def _save_introduction(orm, introduction_prompt, introduction):
+            """자기소개를 첫 채팅으로 저장하기 (다른 워커가 먼저 저장했으면 그 자기소개를 반환)"""
+            new_chat = await orm.create_introduction(
+                self.session_id, introduction_prompt, introduction
+            )
+            if new_chat is None:
+                first_chats = await orm.get_chats_by_session(
+                    self.session_id, after_id=0, limit=1
+                )
+                if not first_chats:
+                    return None
+                return first_chats[0].question, first_chats[0].answer
+            self._append_to_cached_history(introduction_prompt, introduction)
+            return introduction_prompt, introduction
+
+        if len(self.chat_history) > 0:
+            return self.chat_history[0].content, self.chat_history[1].content
 
-    def get_answer(self, question):
+        # 생성을 기다리는 동안 요청 세션의 연결을 붙잡지 않도록 반환
+        await self.orm.release_connection()
+        # 여러 탭/요청이 동시에 같은 Session의 자기소개를 요청해도 상위 LLM 호출과 저장은 한 번만 수행
+        return await introduction_flights.do(self.session_id, _generate_introduction)
+
+    async def save_chat(self, question, answer, db=None):
+        """
+        질문과 답변을 DB에 저장하고, 캐시된 ChatHistory에도 같은 내용을 추가하기
+
+        그 사이 다른 워커가 저장한 채팅이 있으면 캐시의 채팅 수가 DB보다 적어지므로, 다음 create()에서 다시 읽음.
+        db가 주어지면 요청 세션 대신 해당 세션으로 저장 (스트리밍 응답처럼 요청 세션이 먼저 닫히는 경우)
+        """
+
+        orm = AsyncORM(db) if db is not None else self.orm
+        new_chat = await chat_write_queue.submit(orm, self.session_id, question, answer)
+        self._append_to_cached_history(question, answer)
+        return new_chat
+
+    def _append_to_cached_history(self, question, answer):
+        """저장한 질문과 답변을 캐시된 ChatHistory에도 추가하기 (write-through)"""
+
+        cached_history = history_cache.peek(self.session_id)
+        if cached_history is not None:
+            role = "user" if len(cached_history) > 0 else "system"
+            cached_history.append(Message(role=role, content=question))
+            cached_history.append(Message(role="assistant", content=answer))
+            history_cache.resize(self.session_id)
+
+    async def get_answer(self, question):
         """ChatGPT에게 새로운 질문을 하고 답변 받기"""
 
-        answer = self.add_question_into_history_and_get_answer(
+        answer = await self.add_question_into_history_and_get_answer(
             role="user", question=question
         )
         return question, answer
+
+    def remember_answer(self, answer):
+        """
+        stream_answer로 받은 답변을 ChatHistory에 추가하기
+
+        WebSocket 연결처럼 같은 ChatManager로 여러 질문을 이어서 보내는 경우에 사용.
+        """
+
+        self.chat_history.append(Message(role="assistant", content=answer))
+
+    def forget_question(self):
+        """답변을 받지 못한 마지막 질문을 ChatHistory에서 제거하기"""
+
+        self.chat_history.pop()
+
+    async def stream_answer(self, question):
+        """ChatGPT에게 새로운 질문을 하고, 답변을 조각 단위로 받기 (저장은 호출하는 쪽에서 수행)"""
+
+        self.chat_history.append(Message(role="user", content=question))
+        async for delta in self.stream_question_with_history():
+            yield delta
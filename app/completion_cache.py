@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from .cache import CacheStats, LRUCache
+from .config import (
+    COMPLETION_CACHE_ENABLED,
+    COMPLETION_CACHE_PATH,
+    COMPLETION_CACHE_TTL_SECONDS,
+    COMPLETION_CACHE_MEMORY_ENTRIES,
+    COMPLETION_CACHE_MEMORY_BYTES,
+)
+from .orm import AsyncORM
+
+
+def make_completion_key(messages: list[dict]) -> str:
+    """상위 LLM에 보내는 메시지 목록을 직렬화하여 안정적인 SHA-256 key 만들기"""
+    payload = json.dumps(
+        messages, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    상위 LLM에 보낸 메시지 목록이 완전히 같을 때 이전 답변을 재사용하기 위한 2단계 캐시
+
+    [작동 방식]
+    1. 메시지 목록 전체의 해시를 key로 사용하므로, 페르소나/대화 내역/질문이 모두 같은 경우에만 hit.
+    2. 메모리(LRUCache) -> SQLite 파일 순서로 조회하고, SQLite에서 찾으면 메모리에도 올려 둠.
+    3. 항목마다 만료 시각(expires_at)을 저장하여 TTL이 지난 답변은 사용하지 않음.
+    4. Session마다 use_completion_cache 설정으로 캐시 사용을 끌 수 있음 (설정값도 메모리에 캐시).
+
+    SQLite 접근은 blocking 이므로 asyncio.to_thread로 실행하며, 하나의 연결을 lock으로 보호함.
+    """
+
+    def __init__(
+        self,
+        path: str = COMPLETION_CACHE_PATH,
+        ttl_seconds: float = COMPLETION_CACHE_TTL_SECONDS,
+        enabled: bool = COMPLETION_CACHE_ENABLED,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.stats = CacheStats()
+        self.memory = LRUCache(
+            max_entries=COMPLETION_CACHE_MEMORY_ENTRIES,
+            ttl_seconds=ttl_seconds,
+            max_bytes=COMPLETION_CACHE_MEMORY_BYTES,
+        )
+        # Session ID -> use_completion_cache 설정값
+        self.session_flags = LRUCache(max_entries=10000, ttl_seconds=600.0)
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, answer TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "DELETE FROM completions WHERE expires_at <= ?", (time.time(),)
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _read(self, key: str) -> tuple[str, float] | None:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT answer, expires_at FROM completions WHERE key = ?", (key,)
+                )
+                .fetchone()
+            )
+            return row
+
+    def _write(self, key: str, answer: str, expires_at: float):
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO completions (key, answer, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, answer, expires_at),
+            )
+            connection.commit()
+
+    def _delete(self, key: str):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM completions WHERE key = ?", (key,))
+            connection.commit()
+
+    def _count(self) -> tuple[int, int]:
+        with self._lock:
+            return (
+                self._connect()
+                .execute(
+                    "SELECT count(*), coalesce(sum(length(answer)), 0) FROM completions"
+                )
+                .fetchone()
+            )
+
+    async def is_enabled_for(self, orm: AsyncORM, session_id: int) -> bool:
+        """해당 Session에서 완성 캐시를 사용할지 확인하기"""
+        if not self.enabled:
+            return False
+        flag = self.session_flags.peek(session_id)
+        if flag is None:
+            session = await orm.get_session_by_id(session_id)
+            flag = bool(session and session.use_completion_cache)
+            self.session_flags.set(session_id, flag)
+        return flag
+
+    def set_session_flag(self, session_id: int, enabled: bool):
+        """Session의 캐시 사용 설정이 바뀌었을 때 메모리의 설정값 갱신하기"""
+        self.session_flags.set(session_id, enabled)
+
+    async def get(self, key: str) -> str | None:
+        """key에 해당하는 답변 조회하기 (없거나 만료되었으면 None)"""
+        answer = self.memory.get(key)
+        if answer is not None:
+            self.stats.hits += 1
+            return answer
+
+        row = await asyncio.to_thread(self._read, key)
+        if row is None:
+            self.stats.misses += 1
+            return None
+        answer, expires_at = row
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            await asyncio.to_thread(self._delete, key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self.memory.set(key, answer, ttl_seconds=remaining)
+        self.stats.hits += 1
+        return answer
+
+    async def set(self, key: str, answer: str, ttl_seconds: float | None = None):
+        """답변을 메모리와 SQLite에 저장하기 (ttl_seconds가 없으면 기본 TTL 사용)"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.memory.set(key, answer, ttl_seconds=ttl)
+        await asyncio.to_thread(self._write, key, answer, time.time() + ttl)
+
+    async def get_stats(self) -> dict:
+        """전체 hit/miss 통계와 SQLite에 저장된 항목 수/크기"""
+        if self.enabled:
+            self.stats.entries, self.stats.size_bytes = await asyncio.to_thread(
+                self._count
+            )
+        return self.stats.to_dict()
+
+    def close(self):
+        """SQLite 연결 닫기"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+completion_cache = CompletionCache()
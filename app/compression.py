@@ -0,0 +1,63 @@
+import zlib
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from .config import CHAT_COMPRESSION_MIN_BYTES, CHAT_COMPRESSION_LEVEL
+
+# 압축된 값의 첫 바이트 (0xFF는 올바른 UTF-8 문자열에 나타나지 않으므로 압축하지 않은 값과 구분됨)
+COMPRESSED_MARKER = b"\xff"
+
+
+def compress_text(
+    value: str,
+    min_bytes: int = CHAT_COMPRESSION_MIN_BYTES,
+    level: int = CHAT_COMPRESSION_LEVEL,
+) -> bytes:
+    """
+    문자열을 저장용 bytes로 변환하기
+
+    UTF-8로 min_bytes 이상이고 압축해서 실제로 작아지는 경우에만 COMPRESSED_MARKER + zlib 데이터로 저장하고,
+    그 외에는 UTF-8 bytes를 그대로 저장함. (짧은 질문은 압축해도 작아지지 않음)
+    """
+    data = value.encode("utf-8")
+    if min_bytes <= 0 or len(data) < min_bytes:
+        return data
+    compressed = COMPRESSED_MARKER + zlib.compress(data, level)
+    return compressed if len(compressed) < len(data) else data
+
+
+def decompress_text(value: bytes | str) -> str:
+    """
+    compress_text로 저장한 값을 문자열로 되돌리기
+
+    마이그레이션 전에 TEXT로 저장된 값(str)은 그대로 반환함.
+    """
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(COMPRESSED_MARKER):
+        return zlib.decompress(value[len(COMPRESSED_MARKER) :]).decode("utf-8")
+    return value.decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    긴 문자열을 압축해서 바이너리 컬럼에 저장하는 SQLAlchemy 컬럼 타입
+
+    모델 속성으로는 항상 str을 주고받으므로, ORM을 사용하는 쪽은 압축 여부를 알 필요가 없음.
+    SQL에서 값을 직접 비교/검색할 수는 없으므로 조회 조건에 사용하지 않는 컬럼에만 사용해야 함.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(str(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
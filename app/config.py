@@ -0,0 +1,154 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    """환경변수를 int로 읽기 (값이 없으면 기본값 사용)"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """환경변수를 float로 읽기 (값이 없으면 기본값 사용)"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """환경변수를 bool로 읽기 (1/true/yes/on 이면 True, 값이 없으면 기본값 사용)"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# app.* 로거의 출력 수준 (DEBUG이면 대화 내역 로딩 등 요청별 상세 로그 출력)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# 데이터베이스 주소 (sqlite -> aiosqlite, postgresql -> asyncpg 드라이버로 접속)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./time_traveller.db")
+
+# SQLite 연결마다 적용할 PRAGMA (WAL 모드에서는 쓰기 중에도 읽기가 막히지 않음)
+DB_SQLITE_JOURNAL_MODE = os.getenv("DB_SQLITE_JOURNAL_MODE", "WAL")
+DB_SQLITE_SYNCHRONOUS = os.getenv("DB_SQLITE_SYNCHRONOUS", "NORMAL")
+DB_SQLITE_BUSY_TIMEOUT_MS = _env_int("DB_SQLITE_BUSY_TIMEOUT_MS", 5000)
+DB_SQLITE_CACHE_SIZE_KB = _env_int("DB_SQLITE_CACHE_SIZE_KB", 64 * 1024)
+DB_SQLITE_MMAP_SIZE = _env_int("DB_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+
+# SQLite 이외의 DB(PostgreSQL 등) 연결 풀 설정
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT = _env_float("DB_POOL_TIMEOUT", 30.0)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+
+# 워커가 시작할 때 스키마 마이그레이션을 실행할지 여부
+# (여러 워커로 배포할 때는 python -m app.serve가 워커를 띄우기 전에 한 번만 실행하고 이 값을 0으로 전달)
+DB_MIGRATE_ON_STARTUP = _env_bool("DB_MIGRATE_ON_STARTUP", True)
+
+# ChatGPT 프록시 서버 (OpenAI 호환) 주소
+URL_ENDPOINT = os.getenv("URL_ENDPOINT", "https://open-api.jejucodingcamp.workers.dev/")
+
+# 상위 LLM 호출 타임아웃 (초)
+UPSTREAM_CONNECT_TIMEOUT = _env_float("UPSTREAM_CONNECT_TIMEOUT", 5.0)
+UPSTREAM_READ_TIMEOUT = _env_float("UPSTREAM_READ_TIMEOUT", 60.0)
+UPSTREAM_WRITE_TIMEOUT = _env_float("UPSTREAM_WRITE_TIMEOUT", 10.0)
+UPSTREAM_POOL_TIMEOUT = _env_float("UPSTREAM_POOL_TIMEOUT", 10.0)
+
+# 상위 LLM 호출 하나에 허용되는 전체 시간 (재시도/hedging 포함, 초과 시 504)
+UPSTREAM_DEADLINE_SECONDS = _env_float("UPSTREAM_DEADLINE_SECONDS", 90.0)
+
+# 일시적인 실패(연결 오류, 시간 초과, 429/5xx)의 재시도 횟수와 백오프 (full jitter)
+UPSTREAM_MAX_RETRIES = _env_int("UPSTREAM_MAX_RETRIES", 2)
+UPSTREAM_RETRY_BASE_DELAY = _env_float("UPSTREAM_RETRY_BASE_DELAY", 0.2)
+UPSTREAM_RETRY_MAX_DELAY = _env_float("UPSTREAM_RETRY_MAX_DELAY", 2.0)
+
+# 응답이 최근 p95(UPSTREAM_HEDGE_QUANTILE)보다 늦으면 같은 요청을 한 번 더 보내 먼저 온 답변 사용
+UPSTREAM_HEDGE_ENABLED = _env_bool("UPSTREAM_HEDGE_ENABLED", False)
+UPSTREAM_HEDGE_QUANTILE = _env_float("UPSTREAM_HEDGE_QUANTILE", 0.95)
+UPSTREAM_HEDGE_MIN_SAMPLES = _env_int("UPSTREAM_HEDGE_MIN_SAMPLES", 20)
+
+# 연속 실패가 threshold번이면 reset 시간 동안 상위 LLM을 호출하지 않고 바로 503 (threshold 0이면 사용 안 함)
+UPSTREAM_BREAKER_FAILURE_THRESHOLD = _env_int("UPSTREAM_BREAKER_FAILURE_THRESHOLD", 5)
+UPSTREAM_BREAKER_RESET_SECONDS = _env_float("UPSTREAM_BREAKER_RESET_SECONDS", 30.0)
+
+# 상위 LLM keep-alive 연결 풀 크기
+UPSTREAM_MAX_CONNECTIONS = _env_int("UPSTREAM_MAX_CONNECTIONS", 200)
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = _env_int("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", 50)
+UPSTREAM_KEEPALIVE_EXPIRY = _env_float("UPSTREAM_KEEPALIVE_EXPIRY", 30.0)
+
+# 상위 LLM 호출 요청의 동시 실행 수 제한 (0 이하이면 제한 없음)과 사용자별 공평 대기열 크기
+ADMISSION_MAX_CONCURRENT = _env_int("ADMISSION_MAX_CONCURRENT", 64)
+ADMISSION_MAX_QUEUE = _env_int("ADMISSION_MAX_QUEUE", 256)
+ADMISSION_MAX_QUEUE_PER_USER = _env_int("ADMISSION_MAX_QUEUE_PER_USER", 4)
+ADMISSION_QUEUE_TIMEOUT_SECONDS = _env_float("ADMISSION_QUEUE_TIMEOUT_SECONDS", 30.0)
+
+# WebSocket 대화 채널: 인증 메시지 대기 시간, 유휴 시 서버가 보내는 ping 간격, 질문이 없는 연결을 닫는 시간
+WS_AUTH_TIMEOUT_SECONDS = _env_float("WS_AUTH_TIMEOUT_SECONDS", 10.0)
+WS_KEEPALIVE_SECONDS = _env_float("WS_KEEPALIVE_SECONDS", 25.0)
+WS_IDLE_TIMEOUT_SECONDS = _env_float("WS_IDLE_TIMEOUT_SECONDS", 900.0)
+
+# 상위 LLM에 보낼 대화 내역의 토큰 예산 (0 이하이면 자르지 않음)
+CONTEXT_TOKEN_BUDGET = _env_int("CONTEXT_TOKEN_BUDGET", 3000)
+
+# Session별 ChatHistory 캐시 (프로세스 내부 LRU)
+HISTORY_CACHE_MAX_SESSIONS = _env_int("HISTORY_CACHE_MAX_SESSIONS", 1000)
+HISTORY_CACHE_MAX_BYTES = _env_int("HISTORY_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+HISTORY_CACHE_TTL_SECONDS = _env_float("HISTORY_CACHE_TTL_SECONDS", 600.0)
+
+# (연도, 지역, 인물)별 자기소개 캐시
+# - 조합마다 서로 다른 답변을 INTRO_CACHE_VARIANTS개까지 생성한 뒤부터 재사용 (0이면 캐시 사용 안 함)
+INTRO_CACHE_VARIANTS = _env_int("INTRO_CACHE_VARIANTS", 3)
+INTRO_CACHE_EXPIRE_SECONDS = _env_float("INTRO_CACHE_EXPIRE_SECONDS", 7 * 24 * 3600.0)
+INTRO_CACHE_MEMORY_ENTRIES = _env_int("INTRO_CACHE_MEMORY_ENTRIES", 1000)
+INTRO_CACHE_MEMORY_TTL_SECONDS = _env_float("INTRO_CACHE_MEMORY_TTL_SECONDS", 600.0)
+
+# 완전히 같은 메시지 목록에 대한 상위 LLM 답변 캐시 (메모리 LRU + SQLite 파일)
+COMPLETION_CACHE_ENABLED = _env_bool("COMPLETION_CACHE_ENABLED", False)
+COMPLETION_CACHE_PATH = os.getenv("COMPLETION_CACHE_PATH", "./completion_cache.db")
+COMPLETION_CACHE_TTL_SECONDS = _env_float("COMPLETION_CACHE_TTL_SECONDS", 24 * 3600.0)
+COMPLETION_CACHE_MEMORY_ENTRIES = _env_int("COMPLETION_CACHE_MEMORY_ENTRIES", 5000)
+COMPLETION_CACHE_MEMORY_BYTES = _env_int(
+    "COMPLETION_CACHE_MEMORY_BYTES", 32 * 1024 * 1024
+)
+
+# 검증된 토큰 -> 사용자 캐시 (토큰 만료 시각을 넘겨서 유지하지 않음)
+TOKEN_CACHE_MAX_ENTRIES = _env_int("TOKEN_CACHE_MAX_ENTRIES", 10000)
+TOKEN_CACHE_TTL_SECONDS = _env_float("TOKEN_CACHE_TTL_SECONDS", 300.0)
+
+# 비밀번호 해시화 작업 풀 (thread 또는 process, workers가 0이면 이벤트 루프에서 직접 계산)
+PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread")
+PASSWORD_HASH_WORKERS = _env_int("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = _env_int("PASSWORD_HASH_MAX_PENDING", 64)
+
+# 채팅 저장 group commit (여러 요청의 INSERT를 모아 한 트랜잭션으로 commit)
+CHAT_WRITE_BATCHING = _env_bool("CHAT_WRITE_BATCHING", False)
+CHAT_WRITE_BATCH_MAX_ROWS = _env_int("CHAT_WRITE_BATCH_MAX_ROWS", 100)
+CHAT_WRITE_BATCH_MAX_DELAY_MS = _env_float("CHAT_WRITE_BATCH_MAX_DELAY_MS", 5.0)
+
+# 채팅 질문/답변 압축 저장 (UTF-8로 이 크기(bytes) 이상이면 zlib으로 압축, 0 이하이면 압축하지 않음)
+CHAT_COMPRESSION_MIN_BYTES = _env_int("CHAT_COMPRESSION_MIN_BYTES", 512)
+CHAT_COMPRESSION_LEVEL = _env_int("CHAT_COMPRESSION_LEVEL", 6)
+
+# 대화 내역 내보내기/가져오기 (NDJSON): 한 번에 읽거나 한 번에 flush 할 채팅 수, 가져오기 한 줄의 최대 크기
+TRANSCRIPT_EXPORT_BATCH_ROWS = _env_int("TRANSCRIPT_EXPORT_BATCH_ROWS", 500)
+TRANSCRIPT_IMPORT_BATCH_ROWS = _env_int("TRANSCRIPT_IMPORT_BATCH_ROWS", 500)
+TRANSCRIPT_IMPORT_MAX_LINE_BYTES = _env_int(
+    "TRANSCRIPT_IMPORT_MAX_LINE_BYTES", 1024 * 1024
+)
+
+# 정적 파일: 원본 디렉터리, 빌드 결과 디렉터리 (python -m app.static_build, 빌드 결과가 없으면 원본을 그대로 제공)
+STATIC_SOURCE_DIR = os.getenv("STATIC_SOURCE_DIR", "./static")
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", "./build/static")
+# 빌드할 때 이 크기(bytes) 이상인 이미지는 최대 너비 STATIC_IMAGE_MAX_WIDTH로 줄여 WebP(STATIC_IMAGE_QUALITY)로 다시 압축
+STATIC_IMAGE_RECOMPRESS_MIN_BYTES = _env_int(
+    "STATIC_IMAGE_RECOMPRESS_MIN_BYTES", 64 * 1024
+)
+STATIC_IMAGE_MAX_WIDTH = _env_int("STATIC_IMAGE_MAX_WIDTH", 800)
+STATIC_IMAGE_QUALITY = _env_int("STATIC_IMAGE_QUALITY", 82)
+
+# 세션 목록에 보여줄 마지막 답변 미리보기의 최대 글자 수
+SESSION_PREVIEW_CHARS = _env_int("SESSION_PREVIEW_CHARS", 120)
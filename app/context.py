@@ -0,0 +1,112 @@
+from dataclasses import dataclass, asdict
+
+from .config import CONTEXT_TOKEN_BUDGET
+
+# 메시지 하나마다 role 등 포맷 때문에 추가로 소모되는 토큰 수 (OpenAI 포맷 기준 근사값)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    문자열의 토큰 수를 로컬에서 근사 계산
+
+    - ASCII 문자는 평균 4글자당 1토큰
+    - 한글 등 비ASCII 문자는 1글자당 1토큰
+    실제 토크나이저보다 약간 많게 추정되므로 예산을 넘기지 않는 쪽으로 안전함.
+    """
+    ascii_count = sum(1 for char in text if char.isascii())
+    return -(-ascii_count // 4) + (len(text) - ascii_count)
+
+
+def estimate_message_tokens(message: dict) -> int:
+    """ChatGPT 형식 메시지 하나의 토큰 수를 근사 계산"""
+    return estimate_tokens(message["content"]) + MESSAGE_TOKEN_OVERHEAD
+
+
+@dataclass
+class ContextWindowStats:
+    """
+    ContextWindow가 잘라낸 대화량 누적 통계
+
+    Attributes:
+        requests (int): fit()이 호출된 횟수
+        trimmed_requests (int): 예산 초과로 대화가 잘린 요청 수
+        trimmed_messages (int): 잘려서 전송되지 않은 메시지 수
+        trimmed_tokens (int): 잘려서 전송되지 않은 토큰 수 (근사값)
+        sent_tokens (int): 실제로 전송된 토큰 수 (근사값)
+    """
+
+    requests: int = 0
+    trimmed_requests: int = 0
+    trimmed_messages: int = 0
+    trimmed_tokens: int = 0
+    sent_tokens: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class ContextWindow:
+    """
+    토큰 예산 안에서 상위 LLM에 보낼 대화 내역을 고르는 클래스
+
+    [작동 방식]
+    1. 첫 system 메시지(페르소나 prompt)와 바로 뒤의 자기소개 답변은 항상 유지.
+    2. 마지막 메시지(새 질문)부터 거꾸로 질문/답변 한 쌍씩 예산이 허락하는 만큼 원문 그대로 유지.
+    3. 예산을 넘는 오래된 대화는 버리고, 생략되었다는 짧은 system 메시지로 대체.
+    4. 잘라낸 메시지/토큰 수는 stats에 누적.
+
+    token_budget이 0 이하이면 자르지 않고 전체 대화를 그대로 전송함.
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.stats = ContextWindowStats()
+
+    def fit(self, messages: list[dict]) -> list[dict]:
+        """ChatGPT 형식 메시지 목록을 토큰 예산에 맞게 잘라서 반환하기"""
+
+        self.stats.requests += 1
+        costs = [estimate_message_tokens(message) for message in messages]
+        total = sum(costs)
+        if self.token_budget <= 0 or total <= self.token_budget:
+            self.stats.sent_tokens += total
+            return messages
+
+        pinned = 2 if messages and messages[0]["role"] == "system" else 0
+        pinned = min(pinned, len(messages))
+        used = sum(costs[:pinned])
+
+        # 최근 메시지부터 거꾸로 채우되, 마지막 메시지(새 질문)는 예산을 넘더라도 반드시 포함
+        start = len(messages)
+        if start > pinned:
+            start -= 1
+            used += costs[start]
+        # 질문/답변이 짝을 이루도록 두 개씩 추가
+        while start - 2 >= pinned:
+            pair_cost = costs[start - 2] + costs[start - 1]
+            if used + pair_cost > self.token_budget:
+                break
+            start -= 2
+            used += pair_cost
+
+        dropped = start - pinned
+        if dropped == 0:
+            self.stats.sent_tokens += total
+            return messages
+
+        notice = {
+            "role": "system",
+            "content": f"(이전 대화 {dropped // 2}개는 생략되었어. 자연스럽게 이어서 대답해.)",
+        }
+        fitted = messages[:pinned] + [notice] + messages[start:]
+        sent = used + estimate_message_tokens(notice)
+
+        self.stats.trimmed_requests += 1
+        self.stats.trimmed_messages += dropped
+        self.stats.trimmed_tokens += sum(costs[pinned:start])
+        self.stats.sent_tokens += sent
+        return fitted
+
+
+context_window = ContextWindow()
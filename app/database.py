@@ -1,47 +1,217 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import os
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./time_traveller.db"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import declarative_base
+from .config import (
+    DATABASE_URL,
+    DB_SQLITE_JOURNAL_MODE,
+    DB_SQLITE_SYNCHRONOUS,
+    DB_SQLITE_BUSY_TIMEOUT_MS,
+    DB_SQLITE_CACHE_SIZE_KB,
+    DB_SQLITE_MMAP_SIZE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
 )
+from .metrics import instrument_engine
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 데이터베이스 종류별로 사용할 비동기 드라이버
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(database_url: str | URL) -> URL:
+    """
+    데이터베이스 주소를 비동기 드라이버용 주소로 변환
+
+    - sqlite:///... -> sqlite+aiosqlite:///... (개발용)
+    - postgresql://... -> postgresql+asyncpg://... (운영용)
+    - 드라이버가 이미 명시된 주소는 그대로 사용
+    """
+    url = make_url(database_url)
+    if "+" in url.drivername:
+        return url
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def _sqlite_pragmas() -> list[str]:
+    return [
+        f"PRAGMA journal_mode={DB_SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={DB_SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={DB_SQLITE_BUSY_TIMEOUT_MS}",
+        # 음수이면 페이지 수가 아닌 KiB 단위
+        f"PRAGMA cache_size={-DB_SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={DB_SQLITE_MMAP_SIZE}",
+    ]
 
-Base = declarative_base()
 
+def create_database_engine(database_url: str | URL = DATABASE_URL) -> AsyncEngine:
+    """
+    설정값(app/config.py)에 따라 비동기 엔진 만들기
+
+    - SQLite: 연결할 때마다 WAL, synchronous, busy_timeout, cache_size, mmap_size PRAGMA를 적용.
+      (WAL 모드에서는 create_chat이 commit 하는 동안에도 다른 요청의 읽기가 막히지 않음)
+      파일 DB는 연결 풀 크기, overflow, 대기 시간만 설정. (메모리 DB는 기본 풀 사용)
+    - 그 외 (PostgreSQL 등): 연결 풀 크기, overflow, 대기 시간, recycle, pre-ping을 설정.
+    - 모든 쿼리의 실행 시간을 측정값(app/metrics.py)에 기록.
+
+    Args:
+        database_url (str | URL): 데이터베이스 주소 (드라이버가 없으면 비동기 드라이버로 변환)
+
+    Returns:
+        AsyncEngine: 생성된 비동기 엔진
+    """
+    url = to_async_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        engine = create_async_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+        instrument_engine(engine.sync_engine)
+        return engine
 
-def create_tables():
+    if url.database in (None, "", ":memory:"):
+        engine = create_async_engine(url)
+    else:
+        # 파일 DB는 연결(과 aiosqlite 스레드)을 요청마다 새로 열지 않도록 풀에 유지
+        engine = create_async_engine(
+            url,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    pragmas = _sqlite_pragmas()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+def get_pool_stats(engine: AsyncEngine) -> dict:
     """
-    데이터베이스의 모든 테이블을 생성
+    엔진의 연결 풀 상태 조회하기
 
-    애플리케이션 시작 시 한 번 호출되어야 함.
-    모든 SQLAlchemy 모델에 대한 테이블을 생성함.
-    이미 테이블이 존재하는 경우 아무 작업도 수행하지 않음.
+    Returns:
+        dict: 드라이버, 풀 종류, 풀 크기, 사용 중/대기 중 연결 수, overflow 수
+        (풀 종류에 따라 제공하지 않는 값은 None)
     """
-    Base.metadata.create_all(bind=engine)
+
+    def _call(name: str) -> int | None:
+        method = getattr(engine.pool, name, None)
+        return method() if callable(method) else None
+
+    return {
+        "driver": engine.url.drivername,
+        "pool_class": type(engine.pool).__name__,
+        "size": _call("size"),
+        "checked_in": _call("checkedin"),
+        "checked_out": _call("checkedout"),
+        "overflow": _call("overflow"),
+    }
+
+
+class ProcessLocalEngine:
+    """
+    프로세스마다 따로 만드는 비동기 엔진과 세션 팩토리
+
+    [작동 방식]
+    1. import 할 때가 아니라 처음 사용할 때 엔진(과 연결 풀)을 만듦.
+       (마이그레이션 CLI나 워커를 띄우는 프로세스가 app을 import 해도 DB에 연결하지 않음)
+    2. 엔진을 만든 프로세스와 현재 프로세스가 다르면 (fork 된 워커, 예: gunicorn --preload)
+       물려받은 연결 풀을 닫지 않고 버린 뒤 새 엔진을 만듦. 부모와 자식이 같은 연결을 공유하지 않음.
+    """
+
+    def __init__(self, database_url: str | URL):
+        self.database_url = database_url
+        self._pid: int | None = None
+        self._engine: AsyncEngine | None = None
+        self._sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._pid != os.getpid():
+            if self._engine is not None:
+                # 부모 프로세스의 연결은 부모가 계속 사용하므로 닫지 않음
+                self._engine.sync_engine.dispose(close=False)
+            self._engine = create_database_engine(self.database_url)
+            self._sessionmaker = async_sessionmaker(
+                bind=self._engine,
+                class_=AsyncSession,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+            self._pid = os.getpid()
+        return self._engine
+
+    def session(self) -> AsyncSession:
+        """현재 프로세스의 엔진에 연결된 새 AsyncSession 만들기"""
+        self.engine
+        return self._sessionmaker()
+
+    async def dispose(self):
+        """현재 프로세스의 엔진과 연결 풀 닫기 (다음에 사용하면 새로 만듦)"""
+        if self._engine is not None and self._pid == os.getpid():
+            await self._engine.dispose()
+        self._engine = None
+        self._sessionmaker = None
+        self._pid = None
+
+
+SQLALCHEMY_DATABASE_URL = to_async_url(DATABASE_URL)
+
+database = ProcessLocalEngine(SQLALCHEMY_DATABASE_URL)
+
+# 요청/작업마다 새 AsyncSession을 만드는 팩토리 (async with AsyncSessionLocal() as db: ...)
+AsyncSessionLocal = database.session
+
+
+def get_engine() -> AsyncEngine:
+    """현재 프로세스의 비동기 엔진 (처음 호출할 때 생성)"""
+    return database.engine
+
+
+Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
-    데이터베이스 세션을 생성하고 관리하는 의존성 주입 함수
+    비동기 데이터베이스 세션을 생성하고 관리하는 의존성 주입 함수
 
     FastAPI의 의존성 주입 시스템에서 사용되며,
-    요청마다 새로운 데이터베이스 세션을 생성하고
+    요청마다 새로운 AsyncSession을 생성하고
     요청 처리가 완료되면 세션을 자동으로 닫음.
 
     Yields:
-        Session: SQLAlchemy 데이터베이스 세션 객체
+        AsyncSession: SQLAlchemy 비동기 데이터베이스 세션 객체
 
     Notes:
         - 이 함수는 컨텍스트 관리자로 동작하여 예외가 발생하더라도 세션이 항상 닫히는 것을 보장함.
         - FastAPI의 Depends를 통해 라우터에서 주입하여 사용함.
+        - expire_on_commit=False 이므로 commit 이후에도 모델 속성을 추가 조회 없이 읽을 수 있음.
     """
 
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
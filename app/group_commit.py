@@ -0,0 +1,215 @@
+import asyncio
+from dataclasses import dataclass, asdict
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from .config import (
+    CHAT_WRITE_BATCHING,
+    CHAT_WRITE_BATCH_MAX_ROWS,
+    CHAT_WRITE_BATCH_MAX_DELAY_MS,
+)
+from .database import get_engine
+from .models import ChatModel
+from .orm import AsyncORM, SessionNotFoundError
+
+
+@dataclass
+class GroupCommitStats:
+    """
+    ChatWriteQueue의 누적 통계
+
+    Attributes:
+        batches (int): commit한 트랜잭션 수
+        rows (int): 저장한 채팅 수
+        failed_batches (int): commit에 실패한 트랜잭션 수 (실패한 배치는 행마다 다시 저장하며, 그 트랜잭션도 포함)
+        failed_rows (int): 혼자 저장해도 실패한 채팅 수
+        max_batch_rows (int): 한 트랜잭션에 담긴 최대 채팅 수
+        pending (int): 현재 commit을 기다리는 채팅 수
+    """
+
+    batches: int = 0
+    rows: int = 0
+    failed_batches: int = 0
+    failed_rows: int = 0
+    max_batch_rows: int = 0
+    pending: int = 0
+
+    def to_dict(self):
+        return {
+            **asdict(self),
+            "avg_batch_rows": self.rows / self.batches if self.batches else 0.0,
+        }
+
+
+class ChatWriteQueue:
+    """
+    여러 요청의 채팅 저장을 모아 하나의 트랜잭션으로 commit하는 write-behind 큐 (group commit)
+
+    [작동 방식]
+    1. submit()은 세션이 있는지 확인한 뒤 (세션 ID, 질문, 답변)을 큐에 넣고, 해당 행이 commit될 때까지 기다림.
+       (응답은 여전히 DB에 저장된 뒤에 반환되므로 요청 단위의 저장 보장은 그대로 유지)
+    2. 백그라운드 Task가 첫 항목을 받은 뒤 max_delay_ms 동안, 또는 max_rows개가 찰 때까지 항목을 더 모음.
+    3. 모은 항목을 하나의 세션에서 INSERT 후 한 번만 commit하고, 기다리던 요청에 생성된 ChatModel을 전달.
+       commit에 실패하면 배치를 rollback 하고 행마다 별도의 트랜잭션으로 다시 저장하여,
+       혼자서도 실패한 행의 요청에만 예외를 전달함. (한 요청의 잘못된 행 때문에 다른 요청의 채팅이 버려지지 않음)
+
+    요청마다 commit(fsync)하는 대신 배치마다 한 번만 commit하므로, 부하가 클수록 fsync 횟수가 크게 줄어듦.
+    백그라운드 Task는 연결 하나를 계속 유지하므로, 요청들이 연결 풀을 모두 차지하고 저장을 기다리더라도 멈추지 않음.
+    비활성화 상태(enabled=False)에서는 submit()이 전달받은 ORM으로 바로 저장함.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = CHAT_WRITE_BATCHING,
+        max_rows: int = CHAT_WRITE_BATCH_MAX_ROWS,
+        max_delay_ms: float = CHAT_WRITE_BATCH_MAX_DELAY_MS,
+    ):
+        self.enabled = enabled
+        self.max_rows = max(1, max_rows)
+        self.max_delay = max(0.0, max_delay_ms) / 1000
+        self.stats = GroupCommitStats()
+        self._queue: (
+            asyncio.Queue[tuple[tuple[int, str, str], asyncio.Future] | None] | None
+        ) = None
+        self._worker: asyncio.Task | None = None
+        self._connection: AsyncConnection | None = None
+        self._db: AsyncSession | None = None
+
+    def start(self):
+        """백그라운드 commit Task 시작하기 (lifespan 시작 시 호출)"""
+        if not self.enabled or self._worker is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def close(self):
+        """큐에 남은 채팅을 모두 commit한 뒤 백그라운드 Task 종료하기 (lifespan 종료 시 호출)"""
+        if self._worker is None:
+            return
+        await self._queue.put(None)
+        await self._worker
+        await self._disconnect()
+        self._worker = None
+        self._queue = None
+
+    async def submit(
+        self, orm: AsyncORM, session_id: int, question: str, answer: str
+    ) -> ChatModel:
+        """
+        채팅 하나를 저장하고, commit이 끝나면 생성된 채팅 반환하기
+
+        Args:
+            orm (AsyncORM): 큐를 사용하지 않을 때 바로 저장할 ORM
+            session_id (int): 채팅이 속한 세션 ID
+            question (str): 질문
+            answer (str): 답변
+
+        Returns:
+            ChatModel: 생성된 채팅 (id 포함)
+
+        Raises:
+            SessionNotFoundError: 세션이 없는 경우 (큐에 넣지 않음)
+        """
+        if await orm.get_session_by_id(session_id) is None:
+            raise SessionNotFoundError(session_id)
+        if self._worker is None:
+            return await orm.create_chat(session_id, question, answer)
+
+        future = asyncio.get_running_loop().create_future()
+        # 기다리던 요청이 취소된 뒤 실패한 경우에도 "exception was never retrieved" 경고가 나지 않도록 확인
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self.stats.pending += 1
+        await self._queue.put(((session_id, question, answer), future))
+        # 요청이 취소되더라도 이미 큐에 들어간 행은 저장되므로, future 자체는 취소하지 않음
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = asyncio.get_running_loop().time() + self.max_delay
+            while len(batch) < self.max_rows:
+                # 이미 큐에 쌓인 항목은 기다리지 않고 바로 가져옴
+                if self._queue.empty():
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            await self._commit(batch)
+
+    async def _commit(self, batch: list[tuple[tuple[int, str, str], asyncio.Future]]):
+        self.stats.pending -= len(batch)
+        try:
+            chats = await self._create_chats([row for row, _ in batch])
+        except Exception as error:
+            if len(batch) == 1:
+                self.stats.failed_rows += 1
+                _set_exception(batch[0][1], error)
+                return
+            # 어떤 행 때문에 실패했는지 알 수 없으므로 행마다 따로 저장
+            for row, future in batch:
+                try:
+                    chat = (await self._create_chats([row]))[0]
+                except Exception as row_error:
+                    self.stats.failed_rows += 1
+                    _set_exception(future, row_error)
+                else:
+                    _set_result(future, chat)
+            return
+
+        for (_, future), chat in zip(batch, chats):
+            _set_result(future, chat)
+
+    async def _create_chats(self, rows: list[tuple[int, str, str]]) -> list[ChatModel]:
+        """rows를 하나의 트랜잭션으로 저장하기 (실패하면 rollback 하고 연결을 닫은 뒤 예외를 그대로 전달)"""
+        try:
+            if self._db is None:
+                self._connection = await get_engine().connect()
+                self._db = AsyncSession(
+                    bind=self._connection, autoflush=False, expire_on_commit=False
+                )
+            chats = await AsyncORM(self._db).create_chats(rows)
+        except Exception:
+            # 연결이 끊어졌을 수 있으므로 다음 저장은 새 연결로 시도 (닫을 때 rollback 됨)
+            await self._disconnect()
+            self.stats.failed_batches += 1
+            raise
+        self.stats.batches += 1
+        self.stats.rows += len(rows)
+        self.stats.max_batch_rows = max(self.stats.max_batch_rows, len(rows))
+        return chats
+
+    async def _disconnect(self):
+        db, connection = self._db, self._connection
+        self._db = self._connection = None
+        try:
+            if db is not None:
+                await db.close()
+        finally:
+            if connection is not None:
+                await connection.close()
+
+
+def _set_result(future: asyncio.Future, chat: ChatModel):
+    if not future.done():
+        future.set_result(chat)
+
+
+def _set_exception(future: asyncio.Future, error: Exception):
+    if not future.done():
+        future.set_exception(error)
+
+
+chat_write_queue = ChatWriteQueue()
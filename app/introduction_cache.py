@@ -0,0 +1,81 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from .cache import LRUCache
+from .config import (
+    INTRO_CACHE_VARIANTS,
+    INTRO_CACHE_EXPIRE_SECONDS,
+    INTRO_CACHE_MEMORY_ENTRIES,
+    INTRO_CACHE_MEMORY_TTL_SECONDS,
+)
+from .orm import AsyncORM
+
+
+def make_persona_key(year: int, location: str, persona: str) -> tuple[int, str, str]:
+    """(연도, 지역, 인물)을 정규화하여 캐시 key 만들기 (앞뒤/중복 공백 제거, 대소문자 무시)"""
+
+    def _normalize(text: str) -> str:
+        return " ".join(text.split()).casefold()
+
+    return year, _normalize(location), _normalize(persona)
+
+
+class IntroductionCache:
+    """
+    같은 페르소나의 자기소개 답변을 여러 세션이 재사용하기 위한 2단계 캐시
+
+    [작동 방식]
+    1. 메모리(LRUCache) -> DB(introduction_cache 테이블) 순서로 만료되지 않은 답변 목록을 조회.
+    2. 답변이 variants개보다 적으면 None을 반환하여 호출한 쪽이 상위 LLM으로 새 답변을 생성하도록 함.
+       생성된 답변은 add()로 DB와 메모리에 함께 추가.
+    3. 답변이 variants개 이상 모이면 그중 하나를 무작위로 골라 상위 LLM 호출 없이 반환.
+       (모든 사용자가 똑같은 자기소개를 받지 않도록 여러 변형을 유지)
+    """
+
+    def __init__(
+        self,
+        variants: int = INTRO_CACHE_VARIANTS,
+        expire_seconds: float = INTRO_CACHE_EXPIRE_SECONDS,
+    ):
+        self.variants = variants
+        self.expire_seconds = expire_seconds
+        # key -> 만료되지 않은 자기소개 답변 목록
+        self.memory = LRUCache(
+            max_entries=INTRO_CACHE_MEMORY_ENTRIES,
+            ttl_seconds=min(INTRO_CACHE_MEMORY_TTL_SECONDS, expire_seconds),
+        )
+
+    async def _get_answers(self, orm: AsyncORM, key: tuple[int, str, str]) -> list[str]:
+        answers = self.memory.get(key)
+        if answers is None:
+            created_after = datetime.now(timezone.utc) - timedelta(
+                seconds=self.expire_seconds
+            )
+            rows = await orm.get_introduction_variants(
+                *key, created_after=created_after
+            )
+            answers = [str(row.answer) for row in rows]
+            self.memory.set(key, answers)
+        return answers
+
+    async def pick(self, orm: AsyncORM, key: tuple[int, str, str]) -> str | None:
+        """재사용할 자기소개 답변 고르기 (아직 변형이 충분히 모이지 않았으면 None)"""
+        if self.variants <= 0:
+            return None
+        answers = await self._get_answers(orm, key)
+        if len(answers) < self.variants:
+            return None
+        return random.choice(answers)
+
+    async def add(self, orm: AsyncORM, key: tuple[int, str, str], answer: str):
+        """새로 생성한 자기소개 답변을 DB와 메모리 캐시에 추가하기"""
+        if self.variants <= 0:
+            return
+        await orm.create_introduction_variant(*key, answer=answer)
+        answers = self.memory.peek(key)
+        if answers is not None:
+            answers.append(answer)
+            self.memory.resize(key)
+
+
+introduction_cache = IntroductionCache()
@@ -1,16 +1,44 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import (
+    FastAPI,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from contextlib import asynccontextmanager
 from datetime import timedelta
-from .database import create_tables, get_db
+import asyncio
+import contextlib
+import json
+import math
+import logging
+import time
+from .database import (
+    AsyncSessionLocal,
+    database,
+    get_db,
+    get_engine,
+    get_pool_stats,
+)
+from .admission import AdmissionTicket, admission_controller
 from .auth import (
-    verify_password,
+    password_hasher,
     create_token,
     get_user_from_token,
+    token_cache,
+    AuthenticatedUser,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
 )
@@ -22,26 +50,68 @@ from .schemas import (
     TokenResponse,
     SessionCreate,
     SessionCreateResponse,
+    SessionUpdate,
     SessionResponse,
+    SessionSummaryResponse,
     ChatCreate,
     ChatResponse,
+    ChatDeltaResponse,
+    ContextWindowStatsResponse,
+    CacheStatsResponse,
+    PoolStatsResponse,
+    SearchResponse,
+    TranscriptImportResponse,
 )
-from .models import UserModel
-from .chat import ChatManager
-from .orm import ORM
+from .chat import ChatManager, history_cache
+from .completion_cache import completion_cache
+from .config import (
+    DB_MIGRATE_ON_STARTUP,
+    LOG_LEVEL,
+    WS_AUTH_TIMEOUT_SECONDS,
+    WS_KEEPALIVE_SECONDS,
+    WS_IDLE_TIMEOUT_SECONDS,
+)
+from .context import context_window
+from .group_commit import chat_write_queue
+from .introduction_cache import introduction_cache
+from .metrics import (
+    MetricsMiddleware,
+    registry,
+    websocket_connections,
+    websocket_messages_total,
+)
+from .migrations import run_migrations
+from .models import SessionModel
+from .orm import AsyncORM, SessionNotFoundError
+from .static_files import static_assets
+from .transcripts import export_transcripts, import_transcripts
+from .upstream import UpstreamClient, UpstreamError, get_upstream_client
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    애플리케이션 시작 시 데이터베이스 테이블을 생성하는 lifespan 이벤트 핸들러
+    애플리케이션 시작 시 데이터베이스 스키마와 상위 LLM 연결 풀을 준비하는 lifespan 이벤트 핸들러
+
+    - 적용되지 않은 스키마 마이그레이션을 먼저 실행함. (app/migrations.py)
+      DB_MIGRATE_ON_STARTUP=0이면 건너뜀. (python -m app.serve가 워커를 띄우기 전에 한 번만 실행)
+    - 채팅 저장 group commit 큐를 사용하는 경우, 종료 시 남은 채팅을 모두 저장한 뒤 닫음.
+    - 상위 LLM 클라이언트는 모든 요청이 공유하며, 종료 시 연결 풀을 닫음.
     """
-    create_tables()
+    if DB_MIGRATE_ON_STARTUP:
+        await run_migrations()
+    app.state.upstream_client = UpstreamClient()
+    chat_write_queue.start()
     yield
+    await chat_write_queue.close()
+    await app.state.upstream_client.aclose()
+    completion_cache.close()
+    password_hasher.shutdown()
+    await database.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", static_assets, name="static")
 
 app.add_middleware(
     CORSMiddleware,
@@ -50,15 +120,50 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+# app.* 로거는 uvicorn 로거와 별도로 LOG_LEVEL 이상만 "key=value" 형식 메시지로 출력
+_app_logger = logging.getLogger("app")
+if not _app_logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+    )
+    _app_logger.addHandler(_log_handler)
+    _app_logger.setLevel(LOG_LEVEL)
+    _app_logger.propagate = False
+
+
+@app.exception_handler(UpstreamError)
+async def upstream_error_handler(request: Request, error: UpstreamError):
+    """
+    상위 LLM 호출 실패를 500 대신 502/503/504 응답으로 변환하는 예외 처리기
+
+    다시 시도해도 되는 시점을 알 수 있으면 Retry-After 헤더로 알려줌.
+    """
+    headers = None
+    if error.retry_after is not None:
+        headers = {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"detail": error.detail},
+        headers=headers,
+    )
+
+
+@app.exception_handler(SessionNotFoundError)
+async def session_not_found_handler(request: Request, error: SessionNotFoundError):
+    """채팅을 저장하려는 세션이 없는 경우를 500 대신 404 응답으로 변환하는 예외 처리기"""
+    return JSONResponse(status_code=404, content={"detail": "Session not found."})
 
 
 @app.get("/")
-def read_root():
-    return FileResponse("static/login.html")
+async def read_root(request: Request):
+    return await static_assets.response("login.html", request.headers)
 
 
 @app.post("/signup", response_model=UserCreateResposne)
-async def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     새로운 사용자를 등록하는 엔드포인트
 
@@ -73,6 +178,7 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
     Raises:
     - 400: username 또는 password가 최소 길이 조건을 만족하지 않는 경우
     - 409: 사용자명이 이미 존재하는 경우
+    - 503: 비밀번호 해시화 대기 작업이 너무 많은 경우 (Retry-After 헤더 포함)
     """
     if len(user.username) < 4:
         raise HTTPException(
@@ -84,17 +190,17 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
             status_code=400, detail="Password must be at least 6 characters long."
         )
 
-    orm = ORM(db)
-    if orm.check_username_exists(user.username):
+    orm = AsyncORM(db)
+    if await orm.check_username_exists(user.username):
         raise HTTPException(status_code=409, detail="Username is already taken.")
 
-    new_user = orm.create_user(user)
+    new_user = await orm.create_user(user)
     return new_user
 
 
 @app.post("/login", response_model=TokenResponse)
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
 ):
     """
     사용자 로그인을 처리하는 엔드포인트
@@ -110,13 +216,16 @@ async def login(
 
     Raises:
     - 401: 잘못된 사용자명이나 비밀번호
+    - 503: 비밀번호 검증 대기 작업이 너무 많은 경우 (Retry-After 헤더 포함)
     """
-    orm = ORM(db)
-    user = orm.get_user_by_username(form_data.username)
+    orm = AsyncORM(db)
+    user = await orm.get_user_by_username(form_data.username)
     if (
         not user
         or not form_data.password
-        or not verify_password(form_data.password, str(user.hashed_password))
+        or not await password_hasher.verify(
+            form_data.password, str(user.hashed_password)
+        )
     ):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
 
@@ -135,7 +244,7 @@ async def login(
 
 @app.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
-    token_refresh_data: TokenRefresh, db: Session = Depends(get_db)
+    token_refresh_data: TokenRefresh, db: AsyncSession = Depends(get_db)
 ):
     """
     사용자의 리프레시 토큰을 사용하여 새로운 토큰 세트를 발급하는 엔드포인트
@@ -151,7 +260,7 @@ async def refresh_token(
     Raises:
     - 401: 리프레시 토큰으로부터 사용자 정보 조회 실패
     """
-    user = get_user_from_token(token_refresh_data.refresh_token, db)
+    user = await get_user_from_token(token_refresh_data.refresh_token, db)
     access_token = create_token(
         str(user.username), timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
@@ -168,8 +277,8 @@ async def refresh_token(
 @app.post("/session", response_model=SessionCreateResponse)
 async def create_session(
     session_create_data: SessionCreate,
-    user: UserModel = Depends(get_user_from_token),
-    db: Session = Depends(get_db),
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     ChatGPT와의 새로운 채팅 세션을 생성하는 엔드포인트
@@ -178,38 +287,93 @@ async def create_session(
     - year: 가상인물의 시대 연도
     - location: 가상인물의 위치 정보
     - persona: 가상인물의 페르소나 정보
+    - use_completion_cache: 같은 질문에 대한 이전 답변 재사용 허용 여부 (선택, 기본 True)
 
     Returns: 생성된 세션 정보
     - id: 세션 ID
     """
-    orm = ORM(db)
-    new_session = orm.create_session(session_create_data, user.id)
+    orm = AsyncORM(db)
+    new_session = await orm.create_session(session_create_data, user.id)
     return new_session
 
 
-@app.get("/session", response_model=list[SessionResponse])
+@app.patch("/session/{session_id}", response_model=SessionResponse)
+async def update_session(
+    session_id: int,
+    session_update_data: SessionUpdate,
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    현재 사용자의 채팅 세션 설정을 변경하는 엔드포인트
+
+    Args: 세션 ID와 변경할 설정
+    - session_id: 세션 ID (path parameter)
+    - use_completion_cache: 같은 질문에 대한 이전 답변 재사용 허용 여부
+
+    Returns: 변경된 세션 정보
+
+    Raises:
+    - 404: 세션이 없거나 현재 사용자의 세션이 아닌 경우
+    """
+    orm = AsyncORM(db)
+    session = await orm.update_session(session_id, user.id, session_update_data)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    completion_cache.set_session_flag(session_id, bool(session.use_completion_cache))
+    return session
+
+
+@app.get("/session", response_model=list[SessionSummaryResponse])
 async def get_sessions(
-    user: UserModel = Depends(get_user_from_token), db: Session = Depends(get_db)
+    before_id: int | None = None,
+    limit: int = Query(5, ge=1, le=100),
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    현재 사용자의 모든 채팅 세션을 가져오는 엔드포인트
+    현재 사용자의 채팅 세션을 최근 순서로 가져오는 엔드포인트 ((created_at, id) 기준 keyset 페이지네이션)
+    Args: 페이지네이션 조건
+    - before_id: 이 세션보다 오래된 세션부터 조회 (query parameter, 선택, 이전 페이지의 마지막 세션 ID)
+    - limit: 최대 조회 개수 (기본 5, 최대 100)
 
-    Returns: 세션 목록
+    Returns: 세션 목록 (최근 순서, 세션 테이블만 한 번 조회)
     - id: 세션 ID
     - year: 가상인물의 연도 정보
     - location: 가상인물의 위치 정보
     - persona: 가상인물의 인물 정보
+    - message_count: 채팅(질문/답변 쌍) 수
+    - last_answer_preview: 마지막 답변의 앞부분
+    - created_at: 세션 생성 시간
     """
-    orm = ORM(db)
-    sessions = orm.get_sessions_by_user(user.id)
+    orm = AsyncORM(db)
+    sessions = await orm.get_sessions_by_user(
+        user.id, recent_count=limit, before_id=before_id
+    )
     return sessions
 
 
+async def _get_owned_session(
+    orm: AsyncORM, session_id: int, user: AuthenticatedUser
+) -> SessionModel:
+    """
+    현재 사용자의 세션 조회하기
+
+    Raises:
+        HTTPException(404): 세션이 없거나 현재 사용자의 세션이 아닌 경우
+    """
+    session = await orm.get_session_by_id(session_id)
+    if session is None or session.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return session
+
+
 @app.get("/introduction/{session_id}", response_model=ChatResponse)
 async def get_introduction(
     session_id: int,
-    user: UserModel = Depends(get_user_from_token),
-    db: Session = Depends(get_db),
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
+    upstream: UpstreamClient = Depends(get_upstream_client),
 ):
     """
     특정 세션에 해당되는 가상인물의 자기소개 문구를 가져오는 엔드포인트
@@ -220,55 +384,658 @@ async def get_introduction(
     Returns: 자기소개 응답
     - question: 빈 문자열
     - answer: 가상인물의 자기소개 문구
+
+    Raises:
+    - 404: 세션이 없거나 현재 사용자의 세션이 아닌 경우
     """
-    chat_manager = ChatManager(session_id, db)
-    _, introduction = chat_manager.get_introduction()
-    return {"question": "", "answer": introduction}
+    await _get_owned_session(AsyncORM(db), session_id, user)
+    chat_manager = await ChatManager.create(session_id, db, upstream)
+    if len(chat_manager.chat_history) > 0:
+        introduction = await chat_manager.get_introduction()
+    else:
+        # 자기소개를 새로 생성해야 하는 경우에만 상위 LLM 호출 슬롯을 사용
+        async with admission_controller.slot(user.id):
+            introduction = await chat_manager.get_introduction()
+    if introduction is None:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return {"question": "", "answer": introduction[1]}
 
 
-@app.post("/chat/{session_id}", response_model=list[ChatResponse])
+@app.post("/chat/{session_id}", response_model=ChatDeltaResponse)
 async def chat(
     session_id: int,
     chat_create_data: ChatCreate,
-    user: UserModel = Depends(get_user_from_token),
-    db: Session = Depends(get_db),
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
+    upstream: UpstreamClient = Depends(get_upstream_client),
 ):
     """
-    ChatGPT에 새로운 질문 메시지를 전송하고 모든 질문과 답변의 기록을 반환하는 엔드포인트
+    ChatGPT에 새로운 질문 메시지를 전송하고 새로 추가된 질문과 답변만 반환하는 엔드포인트
 
     Args: 세션 ID와 새로운 질문
     - session_id: 세션 ID (path parameter)
     - question: 사용자의 질문 메시지
 
-    Returns: 채팅 기록 목록 (질문과 답변 쌍의 리스트)
+    Returns: 새로 추가된 채팅
+    - id: 채팅 ID
     - question: 사용자 질문 메시지
     - answer: 가상인물의 답변 메시지
+    - cursor: 다음 GET /chat 조회 시 after_id로 사용할 커서
+
+    상위 LLM 호출 대기열이 가득 차면 429와 Retry-After 헤더를 반환함.
+
+    Raises:
+    - 404: 세션이 없거나 현재 사용자의 세션이 아닌 경우 (상위 LLM을 호출하지 않음)
     """
-    chat_manager = ChatManager(session_id, db)
-    question, answer = chat_manager.get_answer(chat_create_data.question)
-    orm = ORM(db)
-    orm.create_chat(session_id, question, answer)
-    chats = orm.get_chats_by_session(session_id)
-    chat_list = [{"question": chat.question, "answer": chat.answer} for chat in chats]
-    return chat_list
+    await _get_owned_session(AsyncORM(db), session_id, user)
+    async with admission_controller.slot(user.id):
+        chat_manager = await ChatManager.create(session_id, db, upstream)
+        question, answer = await chat_manager.get_answer(chat_create_data.question)
+    new_chat = await chat_manager.save_chat(question, answer)
+    return {
+        "id": new_chat.id,
+        "question": new_chat.question,
+        "answer": new_chat.answer,
+        "cursor": new_chat.id,
+    }
+
+
+def _format_sse(event: str, data: dict) -> str:
+    """Server-Sent Events 형식의 이벤트 문자열 만들기"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    """
+    응답이 어떻게 끝나든 상위 LLM 호출 슬롯을 반환하는 StreamingResponse
+
+    클라이언트가 스트리밍 시작 전에 연결을 끊으면 본문 generator의 finally가 실행되지 않으므로,
+    응답 처리 자체가 끝날 때도 슬롯을 반환함. (AdmissionTicket.release는 여러 번 호출해도 안전)
+    """
+
+    def __init__(self, *args, ticket: AdmissionTicket, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.ticket.release()
+
+
+@app.post("/chat/{session_id}/stream")
+async def chat_stream(
+    session_id: int,
+    chat_create_data: ChatCreate,
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
+    upstream: UpstreamClient = Depends(get_upstream_client),
+):
+    """
+    ChatGPT에 새로운 질문 메시지를 전송하고 답변을 Server-Sent Events로 스트리밍하는 엔드포인트
+
+    Args: 세션 ID와 새로운 질문
+    - session_id: 세션 ID (path parameter)
+    - question: 사용자의 질문 메시지
+
+    Returns: text/event-stream 응답
+    - delta 이벤트: {"delta": 답변 조각} (상위 LLM에서 도착하는 대로 전송)
+    - done 이벤트: {"id", "question", "answer", "cursor"} (저장 완료 후 전송)
+    - error 이벤트: {"detail": 오류 메시지} (재시도 후에도 상위 LLM 호출이 실패한 경우, 저장하지 않음)
+
+    Raises:
+    - 404: 세션이 없거나 현재 사용자의 세션이 아닌 경우 (상위 LLM을 호출하지 않음)
+    """
+    await _get_owned_session(AsyncORM(db), session_id, user)
+    # 대기열이 가득 차면 스트리밍을 시작하기 전에 429로 거절
+    ticket = await admission_controller.acquire(user.id)
+    try:
+        chat_manager = await ChatManager.create(session_id, db, upstream)
+    except BaseException:
+        ticket.release()
+        raise
+    question = chat_create_data.question
+
+    async def event_stream():
+        chunks = []
+        try:
+            async for delta in chat_manager.stream_answer(question):
+                chunks.append(delta)
+                yield _format_sse("delta", {"delta": delta})
+        except UpstreamError as error:
+            yield _format_sse("error", {"detail": error.detail})
+            return
+        finally:
+            ticket.release()
+
+        answer = "".join(chunks)
+        # 의존성으로 주입된 db 세션은 응답 스트리밍 전에 닫히므로 저장용 세션을 새로 열어 사용
+        async with AsyncSessionLocal() as stream_db:
+            new_chat = await chat_manager.save_chat(question, answer, db=stream_db)
+        yield _format_sse(
+            "done",
+            {
+                "id": new_chat.id,
+                "question": question,
+                "answer": answer,
+                "cursor": new_chat.id,
+            },
+        )
+
+    return _AdmittedStreamingResponse(
+        event_stream(),
+        ticket=ticket,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _authenticate_websocket(
+    websocket: WebSocket, db: AsyncSession
+) -> AuthenticatedUser | None:
+    """
+    WebSocket 연결의 첫 메시지 {"type": "auth", "token": 액세스 토큰}으로 사용자 인증하기
+
+    브라우저 WebSocket은 Authorization 헤더를 보낼 수 없고, 토큰을 주소에 넣으면 접근 로그에 남으므로 첫 메시지로 받음.
+    인증에 실패하면 1008 코드로 연결을 닫고 None을 반환함.
+    """
+    try:
+        message = await asyncio.wait_for(
+            websocket.receive_json(), WS_AUTH_TIMEOUT_SECONDS
+        )
+        if message.get("type") != "auth":
+            raise ValueError("first message must be auth")
+        return await get_user_from_token(str(message.get("token", "")), db)
+    except (asyncio.TimeoutError, ValueError, KeyError, AttributeError, HTTPException):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="Could not validate credentials",
+        )
+        return None
+
+
+async def _answer_over_websocket(
+    websocket: WebSocket,
+    chat_manager: ChatManager,
+    user: AuthenticatedUser,
+    question: str,
+):
+    """질문 하나의 답변을 delta 메시지로 스트리밍하고, 저장한 뒤 done 메시지 보내기"""
+    try:
+        ticket = await admission_controller.acquire(user.id)
+    except HTTPException as error:
+        await websocket.send_json(
+            {
+                "type": "error",
+                "detail": error.detail,
+                "retry_after": int(error.headers["Retry-After"]),
+            }
+        )
+        return
+
+    chunks = []
+    try:
+        # 연결 직후 자기소개가 아직 없었다면, 그 사이에 저장된 자기소개 prompt를 포함하도록 다시 읽음
+        if len(chat_manager.chat_history) == 0:
+            chat_manager.chat_history = await chat_manager.gather_chat_history()
+        async with contextlib.aclosing(chat_manager.stream_answer(question)) as deltas:
+            async for delta in deltas:
+                chunks.append(delta)
+                await websocket.send_json({"type": "delta", "delta": delta})
+    except UpstreamError as error:
+        chat_manager.forget_question()
+        await websocket.send_json(
+            {
+                "type": "error",
+                "detail": error.detail,
+                "retry_after": error.retry_after,
+            }
+        )
+        return
+    finally:
+        ticket.release()
+
+    answer = "".join(chunks)
+    new_chat = await chat_manager.save_chat(question, answer)
+    chat_manager.remember_answer(answer)
+    await websocket.send_json(
+        {
+            "type": "done",
+            "id": new_chat.id,
+            "question": question,
+            "answer": answer,
+            "cursor": new_chat.id,
+        }
+    )
+
+
+@app.websocket("/ws/chat/{session_id}")
+async def chat_websocket(websocket: WebSocket, session_id: int):
+    """
+    한 번 인증한 연결로 여러 질문을 주고받는 WebSocket 대화 채널
+
+    연결이 유지되는 동안 Session의 ChatHistory를 메모리에 유지하므로,
+    질문마다 토큰 확인, ChatManager 생성, 대화 내역 조회를 반복하지 않고 상위 LLM 호출만 수행함.
+
+    [메시지 형식] (모두 JSON)
+    1. 클라이언트 -> 서버
+       - {"type": "auth", "token": 액세스 토큰}: 연결 후 첫 메시지 (실패 시 1008 코드로 종료)
+       - {"type": "question", "question": 질문}: 이전 질문의 done/error를 받은 뒤에 보냄
+       - {"type": "ping"}: 서버가 {"type": "pong"}으로 응답
+    2. 서버 -> 클라이언트
+       - {"type": "ready", "session_id"}: 인증과 대화 내역 로딩 완료
+       - {"type": "delta", "delta"}: 답변 조각
+       - {"type": "done", "id", "question", "answer", "cursor"}: 저장 완료
+       - {"type": "error", "detail", "retry_after"}: 상위 LLM 호출 실패 또는 대기열 초과 (질문은 저장하지 않음)
+       - {"type": "ping"}: WS_KEEPALIVE_SECONDS 동안 메시지가 없을 때 보내는 keepalive
+
+    WS_IDLE_TIMEOUT_SECONDS 동안 질문이 없으면 연결을 닫음.
+    """
+    await websocket.accept()
+    websocket_connections.inc()
+    try:
+        # 연결 동안 하나의 DB 세션을 사용하되, 질문을 기다리는 동안에는 연결을 풀에 반환해 둠
+        async with AsyncSessionLocal() as db:
+            user = await _authenticate_websocket(websocket, db)
+            if user is None:
+                return
+            orm = AsyncORM(db)
+            session = await orm.get_session_by_id(session_id)
+            if session is None or session.user_id != user.id:
+                await websocket.close(
+                    code=status.WS_1008_POLICY_VIOLATION, reason="Session not found"
+                )
+                return
+            chat_manager = await ChatManager.create(
+                session_id, db, websocket.app.state.upstream_client
+            )
+            await orm.release_connection()
+            await websocket.send_json({"type": "ready", "session_id": session_id})
+
+            last_question_at = time.monotonic()
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        websocket.receive_json(), WS_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if time.monotonic() - last_question_at >= WS_IDLE_TIMEOUT_SECONDS:
+                        await websocket.close(
+                            code=status.WS_1000_NORMAL_CLOSURE, reason="Idle timeout"
+                        )
+                        return
+                    await websocket.send_json({"type": "ping"})
+                    continue
+                except (ValueError, KeyError):
+                    # JSON이 아니거나 바이너리 메시지인 경우
+                    message = None
+
+                message_type = (
+                    message.get("type") if isinstance(message, dict) else None
+                )
+                if message_type not in ("ping", "pong", "question"):
+                    message_type = "invalid"
+                websocket_messages_total.inc(type=message_type)
+                if message_type == "ping":
+                    await websocket.send_json({"type": "pong"})
+                elif message_type == "pong":
+                    continue
+                elif (
+                    message_type == "question"
+                    and str(message.get("question", "")).strip()
+                ):
+                    await _answer_over_websocket(
+                        websocket, chat_manager, user, str(message["question"])
+                    )
+                    await orm.release_connection()
+                    last_question_at = time.monotonic()
+                else:
+                    await websocket.send_json(
+                        {
+                            "type": "error",
+                            "detail": "Invalid message.",
+                            "retry_after": None,
+                        }
+                    )
+    except WebSocketDisconnect:
+        pass
+    finally:
+        websocket_connections.dec()
 
 
 @app.get("/chat/{session_id}", response_model=list[ChatResponse])
 async def get_chats(
     session_id: int,
-    user: UserModel = Depends(get_user_from_token),
-    db: Session = Depends(get_db),
+    after_id: int | None = None,
+    before_id: int | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    특정 세션의 모든 대화 내역을 가져오는 엔드포인트
-    Args: 세션 ID
+    특정 세션의 대화 내역을 채팅 ID 기준 keyset 페이지네이션으로 가져오는 엔드포인트
+    Args: 세션 ID와 페이지네이션 조건
     - session_id: 세션 ID (path parameter)
+    - after_id: 이 ID 이후의 채팅부터 조회 (query parameter, 선택)
+    - before_id: 이 ID 이전의 채팅까지 조회 (query parameter, 선택)
+    - limit: 최대 조회 개수 (기본 50, 최대 200)
+
+    after_id가 없으면 before_id 이전(없으면 가장 최근)의 limit개를 조회함.
 
-    Returns: 채팅 기록 목록 (질문과 답변 쌍의 리스트)
+    Returns: 채팅 기록 목록 (ID 오름차순, 질문과 답변 쌍의 리스트)
+    - id: 채팅 ID
     - question: 사용자 질문 메시지
     - answer: 가상인물의 답변 메시지
+
+    Raises:
+    - 404: 세션이 없거나 현재 사용자의 세션이 아닌 경우
     """
-    orm = ORM(db)
-    chats = orm.get_chats_by_session(session_id)
-    chat_list = [{"question": chat.question, "answer": chat.answer} for chat in chats]
+    orm = AsyncORM(db)
+    await _get_owned_session(orm, session_id, user)
+    chats = await orm.get_chats_by_session(
+        session_id, after_id=after_id, before_id=before_id, limit=limit
+    )
+    chat_list = [
+        {"id": chat.id, "question": chat.question, "answer": chat.answer}
+        for chat in chats
+    ]
     return chat_list
+
+
+@app.get("/search", response_model=SearchResponse)
+async def search_chats(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    현재 사용자의 모든 세션의 대화 내역을 전문 검색하는 엔드포인트
+
+    검색어의 모든 단어를 (접두사로) 포함하는 채팅을 관련도 순으로 반환함.
+    Args:
+    - q: 검색어 (query parameter)
+    - limit: 최대 조회 개수 (기본 20, 최대 50)
+    - offset: 건너뛸 결과 수 (기본 0, 최대 1000)
+
+    Returns: 검색 결과
+    - results: [{chat_id, session_id, year, location, persona, question, answer}]
+      (question/answer는 HTML escape 된 snippet이며 일치한 부분은 <mark>로 감쌈)
+    - next_offset: 다음 페이지의 offset (마지막 페이지이면 null)
+    """
+    orm = AsyncORM(db)
+    # 다음 페이지가 있는지 확인하기 위해 하나 더 조회
+    matches = await orm.search_chats(user.id, q, limit=limit + 1, offset=offset)
+    next_offset = offset + limit if len(matches) > limit else None
+    matches = matches[:limit]
+    sessions = {
+        session.id: session
+        for session in await orm.get_sessions_by_ids(
+            list({match["session_id"] for match in matches})
+        )
+    }
+    results = []
+    for match in matches:
+        # 세션을 삭제해도 검색 색인에는 채팅이 남아 있을 수 있으므로, 세션이 없는 결과는 건너뜀
+        session = sessions.get(match["session_id"])
+        if session is None:
+            continue
+        results.append(
+            {
+                **match,
+                "year": session.year,
+                "location": session.location,
+                "persona": session.persona,
+            }
+        )
+    return {"results": results, "next_offset": next_offset}
+
+
+def _transcript_response(chunks, filename: str, compress: bool) -> StreamingResponse:
+    """NDJSON 내보내기 응답 만들기 (gzip이면 .ndjson.gz 파일로 내려받음)"""
+    if compress:
+        filename += ".ndjson.gz"
+        media_type = "application/gzip"
+    else:
+        filename += ".ndjson"
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/export/session/{session_id}")
+async def export_session(
+    session_id: int,
+    gzip: bool = False,
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    세션 하나의 전체 대화 내역을 NDJSON으로 스트리밍하는 엔드포인트
+
+    Args:
+    - session_id: 세션 ID (path parameter)
+    - gzip: true이면 gzip으로 압축 (query parameter, 기본 false)
+
+    Returns: application/x-ndjson (gzip이면 application/gzip) 응답
+    - 첫 줄: {"type": "session", "id", "year", "location", "persona", "use_completion_cache", "created_at"}
+    - 이후: {"type": "chat", "id", "session_id", "question", "answer", "created_at"} (ID 오름차순)
+    """
+    await _get_owned_session(AsyncORM(db), session_id, user)
+    return _transcript_response(
+        export_transcripts(user.id, [session_id], compress=gzip),
+        f"session-{session_id}",
+        gzip,
+    )
+
+
+@app.get("/export/sessions")
+async def export_sessions(
+    gzip: bool = False,
+    user: AuthenticatedUser = Depends(get_user_from_token),
+):
+    """
+    현재 사용자의 모든 세션의 대화 내역을 NDJSON으로 스트리밍하는 엔드포인트
+
+    세션을 오래된 순서로, 각 세션 레코드 다음에 그 세션의 채팅 레코드를 이어서 내보냄.
+    (형식은 GET /export/session/{session_id}와 같음)
+    """
+    return _transcript_response(
+        export_transcripts(user.id, compress=gzip), f"user-{user.id}-sessions", gzip
+    )
+
+
+@app.post("/import/sessions", response_model=TranscriptImportResponse)
+async def import_sessions(
+    request: Request,
+    user: AuthenticatedUser = Depends(get_user_from_token),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    내보낸 NDJSON 대화 내역을 현재 사용자의 새 세션으로 가져오는 엔드포인트
+
+    요청 본문은 GET /export/sessions와 같은 형식이며,
+    Content-Encoding: gzip 헤더 또는 Content-Type: application/gzip이면 gzip으로 압축된 본문으로 처리함.
+    세션마다 그 채팅과 함께 한 트랜잭션으로 저장되므로, 중간에 400이 반환되면 가져오던 세션은 저장되지 않고 그 전에 끝난 세션만 남음.
+
+    Returns: 가져온 결과
+    - sessions: 새로 만든 세션 수
+    - chats: 저장한 채팅 수
+    """
+    compressed = request.headers.get(
+        "content-encoding", ""
+    ).lower() == "gzip" or request.headers.get("content-type", "").startswith(
+        "application/gzip"
+    )
+    return await import_transcripts(db, user.id, request.stream(), compressed)
+
+
+@app.get("/stats/context", response_model=ContextWindowStatsResponse)
+async def get_context_window_stats():
+    """
+    상위 LLM에 보내는 대화 내역의 토큰 예산 적용 통계를 가져오는 엔드포인트
+
+    Returns: 누적 통계
+    - token_budget: 요청 한 번에 허용되는 토큰 예산
+    - requests / trimmed_requests: 전체 요청 수 / 대화가 잘린 요청 수
+    - trimmed_messages / trimmed_tokens: 잘린 메시지 수 / 토큰 수
+    - sent_tokens: 전송된 토큰 수
+    """
+    return {
+        "token_budget": context_window.token_budget,
+        **context_window.stats.to_dict(),
+    }
+
+
+@app.get("/stats/cache", response_model=dict[str, CacheStatsResponse])
+async def get_cache_stats():
+    """
+    프로세스 내부 캐시들의 hit/miss 통계를 가져오는 엔드포인트
+
+    Returns: 캐시 이름별 통계
+    - history: Session별 ChatHistory 캐시
+    - introduction: (연도, 지역, 인물)별 자기소개 캐시의 메모리 계층
+    - completion: 상위 LLM 답변 캐시 전체 (entries/size_bytes는 SQLite에 저장된 항목 기준)
+    - completion_memory: 상위 LLM 답변 캐시의 메모리 계층
+    - token: 검증된 토큰 -> 사용자 캐시
+    """
+    return {
+        "token": token_cache.stats.to_dict(),
+        "history": history_cache.stats.to_dict(),
+        "introduction": introduction_cache.memory.stats.to_dict(),
+        "completion": await completion_cache.get_stats(),
+        "completion_memory": completion_cache.memory.stats.to_dict(),
+    }
+
+
+@app.get("/stats/db", response_model=PoolStatsResponse)
+async def get_db_stats(db: AsyncSession = Depends(get_db)):
+    """
+    데이터베이스 연결 풀 상태를 가져오는 엔드포인트
+
+    Returns: 드라이버, 풀 크기, 사용 중/대기 중 연결 수 (SQLite는 journal_mode 포함),
+    채팅 저장 group commit 통계
+    """
+    engine = get_engine()
+    stats = get_pool_stats(engine)
+    stats["chat_writes"] = chat_write_queue.stats.to_dict()
+    if engine.dialect.name == "sqlite":
+        result = await db.execute(text("PRAGMA journal_mode"))
+        stats["journal_mode"] = result.scalar()
+    return stats
+
+
+def _collect_app_stats():
+    """/stats/* 엔드포인트가 보여 주는 캐시, 컨텍스트 윈도우, 연결 풀 통계를 측정값으로 변환하기"""
+    caches = {
+        "token": token_cache.stats,
+        "history": history_cache.stats,
+        "introduction": introduction_cache.memory.stats,
+        "completion": completion_cache.stats,
+        "completion_memory": completion_cache.memory.stats,
+    }
+    for field, type_name, help in (
+        ("hits", "counter", "캐시에서 값을 찾은 횟수"),
+        ("misses", "counter", "캐시에서 값을 찾지 못한 횟수"),
+        ("evictions", "counter", "한도 초과로 밀려난 항목 수"),
+        ("expirations", "counter", "TTL 만료로 제거된 항목 수"),
+        ("entries", "gauge", "현재 항목 수"),
+        ("size_bytes", "gauge", "현재 항목의 추정 메모리 크기"),
+    ):
+        suffix = "_total" if type_name == "counter" else ""
+        samples = [
+            ({"cache": name}, getattr(stats, field)) for name, stats in caches.items()
+        ]
+        yield f"app_cache_{field}{suffix}", type_name, help, samples
+
+    context_stats = context_window.stats
+    yield (
+        "context_window_token_budget",
+        "gauge",
+        "요청 한 번에 허용되는 토큰 예산",
+        [({}, context_window.token_budget)],
+    )
+    for field, help in (
+        ("requests", "토큰 예산이 적용된 상위 LLM 요청 수"),
+        ("trimmed_requests", "대화가 잘린 요청 수"),
+        ("trimmed_messages", "잘려서 전송되지 않은 메시지 수"),
+        ("trimmed_tokens", "잘려서 전송되지 않은 토큰 수 (근사값)"),
+        ("sent_tokens", "전송된 토큰 수 (근사값)"),
+    ):
+        yield (
+            f"context_window_{field}_total",
+            "counter",
+            help,
+            [({}, getattr(context_stats, field))],
+        )
+
+    pool_stats = get_pool_stats(get_engine())
+    for field, help in (
+        ("checked_out", "요청이 사용 중인 DB 연결 수"),
+        ("checked_in", "풀에서 대기 중인 DB 연결 수"),
+        ("overflow", "기본 크기를 넘어 추가로 연 DB 연결 수"),
+    ):
+        if pool_stats[field] is not None:
+            yield f"db_pool_{field}", "gauge", help, [({}, pool_stats[field])]
+
+    admission_stats = admission_controller.get_stats()
+    yield (
+        "admission_active",
+        "gauge",
+        "상위 LLM 호출 슬롯을 사용 중인 요청 수",
+        [({}, admission_stats["active"])],
+    )
+    yield (
+        "admission_queued",
+        "gauge",
+        "상위 LLM 호출 슬롯을 기다리는 요청 수",
+        [({}, admission_stats["queued"])],
+    )
+
+    write_stats = chat_write_queue.stats
+    yield (
+        "chat_write_batches_total",
+        "counter",
+        "group commit으로 commit한 트랜잭션 수",
+        [({}, write_stats.batches)],
+    )
+    yield (
+        "chat_write_rows_total",
+        "counter",
+        "group commit으로 저장한 채팅 수",
+        [({}, write_stats.rows)],
+    )
+    yield (
+        "chat_write_failed_rows_total",
+        "counter",
+        "group commit에서 혼자 저장해도 실패한 채팅 수",
+        [({}, write_stats.failed_rows)],
+    )
+    yield (
+        "chat_write_pending",
+        "gauge",
+        "group commit을 기다리는 채팅 수",
+        [({}, write_stats.pending)],
+    )
+
+
+registry.add_collector(_collect_app_stats)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus 텍스트 형식의 측정값을 가져오는 엔드포인트
+
+    Returns: 라우트별 요청 수/처리 시간, 처리 중인 요청 수, 요청별 DB 쿼리 수/시간,
+    상위 LLM 호출 시간과 prompt 크기, 대화 내역 길이, 상위 LLM 호출 슬롯 대기 시간/거절 수,
+    캐시/컨텍스트 윈도우/연결 풀 통계
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,354 @@
+import time
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 요청 지연 시간 등 초 단위 측정값의 기본 구간 (Prometheus 기본값에 LLM 호출을 위한 긴 구간 추가)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 개수/크기 측정값의 구간
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (100, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+# (이름, 종류, 설명, [(라벨, 값), ...]) - collector가 반환하는 측정값 묶음
+MetricFamily = tuple[str, str, str, list[tuple[dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type_name}"
+        for key, value in self._values.items():
+            labels = _format_labels(self._labels(key))
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """계속 증가하기만 하는 누적값 (요청 수 등)"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """증가/감소하는 현재값 (처리 중인 요청 수 등)"""
+
+    type_name = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """측정값의 분포를 구간별 누적 개수, 합계, 개수로 기록 (지연 시간 등)"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label 값 -> [구간별 개수..., 합계, 개수]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type_name}"
+        for key, series in self._series.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f'{self.name}_bucket{_format_labels({**labels, "le": "+Inf"})} {series[-1]}'
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}"
+            yield f"{self.name}_count{_format_labels(labels)} {series[-1]}"
+
+
+class MetricsRegistry:
+    """
+    프로세스 내부 측정값을 모아 Prometheus 텍스트 형식으로 출력하는 클래스
+
+    - counter/gauge/histogram으로 만든 측정값은 코드에서 직접 갱신.
+    - add_collector로 등록한 함수는 출력할 때마다 호출되어, 이미 다른 곳에서 모으고 있는 통계
+      (캐시, 컨텍스트 윈도우, 연결 풀 등)를 그대로 내보냄.
+
+    단일 이벤트 루프 안에서 사용하는 것을 전제로 하므로 별도의 lock은 사용하지 않음.
+    """
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[MetricFamily]]] = []
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, help, tuple(labelnames)))
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help, tuple(labelnames)))
+
+    def histogram(
+        self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, tuple(labelnames), buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        self._collectors.append(collector)
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """등록된 모든 측정값을 Prometheus 텍스트 형식(0.0.4)으로 출력"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, type_name, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for labels, value in samples:
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP 요청
+http_requests_total = registry.counter(
+    "http_requests_total", "처리한 HTTP 요청 수", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP 요청 처리 시간 (스트리밍 응답은 마지막 조각까지)",
+    ("method", "route"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "현재 처리 중인 HTTP 요청 수"
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "HTTP 요청 하나가 실행한 DB 쿼리 수",
+    ("route",),
+    buckets=COUNT_BUCKETS,
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "HTTP 요청 하나가 DB 쿼리에 쓴 시간", ("route",)
+)
+websocket_connections = registry.gauge(
+    "websocket_connections", "현재 열려 있는 WebSocket 대화 채널 수"
+)
+websocket_messages_total = registry.counter(
+    "websocket_messages_total", "WebSocket 대화 채널로 받은 메시지 수", ("type",)
+)
+
+# DB 쿼리
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "DB 쿼리 실행 시간", ("operation",)
+)
+
+# 상위 LLM
+upstream_request_duration_seconds = registry.histogram(
+    "upstream_request_duration_seconds",
+    "상위 LLM 호출 시간 (스트리밍은 마지막 조각까지)",
+    ("operation", "outcome"),
+)
+upstream_time_to_first_token_seconds = registry.histogram(
+    "upstream_time_to_first_token_seconds", "상위 LLM 스트리밍의 첫 조각까지 걸린 시간"
+)
+upstream_retries_total = registry.counter(
+    "upstream_retries_total", "상위 LLM 호출 재시도 횟수", ("reason",)
+)
+upstream_errors_total = registry.counter(
+    "upstream_errors_total", "재시도 후에도 실패한 상위 LLM 호출 수", ("reason",)
+)
+upstream_hedged_requests_total = registry.counter(
+    "upstream_hedged_requests_total",
+    "응답이 늦어 추가로 보낸 상위 LLM 요청 수 (winner: 먼저 답한 쪽)",
+    ("winner",),
+)
+upstream_circuit_state = registry.gauge(
+    "upstream_circuit_state",
+    "상위 LLM 회로 차단기 상태 (0: closed, 1: half_open, 2: open)",
+)
+upstream_prompt_messages = registry.histogram(
+    "upstream_prompt_messages",
+    "상위 LLM에 보낸 메시지 수 (토큰 예산 적용 후)",
+    buckets=COUNT_BUCKETS,
+)
+upstream_prompt_characters = registry.histogram(
+    "upstream_prompt_characters",
+    "상위 LLM에 보낸 메시지 본문의 글자 수 (토큰 예산 적용 후)",
+    buckets=SIZE_BUCKETS,
+)
+
+# 상위 LLM 호출 요청의 동시 실행 제한 (app/admission.py)
+admission_queue_wait_seconds = registry.histogram(
+    "admission_queue_wait_seconds",
+    "상위 LLM 호출 슬롯을 얻기까지 대기열에서 기다린 시간",
+    ("outcome",),
+)
+admission_rejections_total = registry.counter(
+    "admission_rejections_total",
+    "대기열 초과/대기 시간 초과로 거절한 요청 수",
+    ("reason",),
+)
+
+# 대화 내역
+chat_history_messages = registry.histogram(
+    "chat_history_messages",
+    "DB에서 다시 읽어 온 Session 대화 내역의 메시지 수",
+    buckets=COUNT_BUCKETS,
+)
+chat_history_stale_total = registry.counter(
+    "chat_history_stale_total",
+    "캐시된 대화 내역이 DB보다 오래되어(다른 워커가 저장한 채팅이 있어) 다시 읽은 횟수",
+)
+
+
+@dataclass
+class RequestDBUsage:
+    """HTTP 요청 하나가 실행한 DB 쿼리 수와 시간"""
+
+    queries: int = 0
+    seconds: float = 0.0
+
+
+# 현재 처리 중인 HTTP 요청의 DB 사용량 (요청 밖에서 실행된 쿼리는 None)
+request_db_usage: ContextVar[RequestDBUsage | None] = ContextVar(
+    "request_db_usage", default=None
+)
+
+
+def instrument_engine(engine: Engine):
+    """엔진이 실행하는 모든 쿼리의 시간을 기록하고, 요청별 쿼리 수/시간에 더하기"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        db_query_duration_seconds.observe(elapsed, operation=operation)
+        usage = request_db_usage.get()
+        if usage is not None:
+            usage.queries += 1
+            usage.seconds += elapsed
+
+
+class MetricsMiddleware:
+    """
+    HTTP 요청마다 처리 시간, 상태 코드, 처리 중인 요청 수, DB 쿼리 사용량을 기록하는 ASGI 미들웨어
+
+    route 라벨에는 실제 주소(/chat/12) 대신 라우트 경로(/chat/{session_id})를 사용하여
+    라벨 값의 종류가 무한히 늘어나지 않도록 함. (일치하는 라우트가 없으면 "unmatched")
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: dict | None = None
+
+    def _route_of(self, scope) -> str:
+        if self._route_paths is None:
+            self._route_paths = {
+                getattr(route, "endpoint", None)
+                or getattr(route, "app", None): route.path
+                for route in scope["app"].routes
+            }
+        return self._route_paths.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        usage = RequestDBUsage()
+        token = request_db_usage.set(usage)
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            request_db_usage.reset(token)
+            method, route = scope["method"], self._route_of(scope)
+            http_requests_total.inc(method=method, route=route, status=str(status))
+            http_request_duration_seconds.observe(elapsed, method=method, route=route)
+            http_request_db_queries.observe(usage.queries, route=route)
+            http_request_db_seconds.observe(usage.seconds, route=route)
@@ -0,0 +1,430 @@
+"""
+버전 기반 데이터베이스 스키마 마이그레이션
+
+애플리케이션 시작 시(lifespan) 자동으로 실행되며, CLI로도 실행할 수 있음.
+
+실행 방법:
+    python -m app.migrations upgrade       # 적용되지 않은 마이그레이션 실행
+    python -m app.migrations current       # 현재 스키마 버전 출력
+    python -m app.migrations check-plans   # ORM 쿼리가 모두 인덱스를 사용하는지 검사 (SQLite)
+
+[마이그레이션 작성 규칙]
+1. MIGRATIONS 목록의 끝에만 추가하고, 이미 배포된 항목의 번호와 내용은 바꾸지 않음.
+2. 새 DB에서는 1번 마이그레이션이 현재 모델 기준으로 모든 테이블을 만들기 때문에,
+   이후 마이그레이션은 대상이 이미 존재하는 경우에도 안전하게 넘어가도록 작성해야 함.
+3. 각 마이그레이션은 별도의 트랜잭션에서 실행되고, 성공하면 schema_migrations에 버전을 기록함.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, LargeBinary, bindparam, event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from . import models  # noqa: F401  (모든 모델을 Base.metadata에 등록)
+from .compression import decompress_text
+from .database import Base, create_database_engine, database, get_engine
+from .orm import answer_preview
+from .prompts import INTRODUCTION_PROMPT
+from .search import create_search_index
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    스키마 변경 하나를 나타내는 클래스
+
+    Attributes:
+        version (int): 적용 순서이자 고유 번호
+        description (str): 변경 내용 설명
+        upgrade (Callable): 동기 Connection을 받아 스키마를 변경하는 함수
+    """
+
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _create_tables(conn: Connection):
+    Base.metadata.create_all(bind=conn)
+
+
+def _add_sessions_use_completion_cache(conn: Connection):
+    columns = {column["name"] for column in inspect(conn).get_columns("sessions")}
+    if "use_completion_cache" in columns:
+        return
+    default = "1" if conn.dialect.name == "sqlite" else "true"
+    conn.execute(
+        text(
+            "ALTER TABLE sessions "
+            f"ADD COLUMN use_completion_cache BOOLEAN DEFAULT {default}"
+        )
+    )
+
+
+def _create_hot_query_indexes(conn: Connection):
+    for table in (models.SessionModel.__table__, models.ChatModel.__table__):
+        for index in table.indexes:
+            if index.name in (
+                "ix_sessions_user_id_created_at",
+                "ix_chats_session_id_id",
+            ):
+                index.create(bind=conn, checkfirst=True)
+
+
+def _add_prompt_templates_and_binary_chats(conn: Connection):
+    models.PromptTemplateModel.__table__.create(bind=conn, checkfirst=True)
+    columns = {
+        column["name"]: column["type"] for column in inspect(conn).get_columns("chats")
+    }
+    if "prompt_template_id" not in columns:
+        conn.execute(
+            text(
+                "ALTER TABLE chats ADD COLUMN prompt_template_id INTEGER "
+                "REFERENCES prompt_templates(id)"
+            )
+        )
+    if "prompt_params" not in columns:
+        conn.execute(text("ALTER TABLE chats ADD COLUMN prompt_params VARCHAR"))
+    # 압축한 값을 저장할 수 있도록 question/answer를 바이너리 컬럼으로 변경
+    # (SQLite는 선언된 타입과 관계없이 BLOB을 저장할 수 있으므로 기존 TEXT 값을 그대로 두고 읽을 때 구분함)
+    if conn.dialect.name == "postgresql":
+        for column in ("question", "answer"):
+            if not isinstance(columns[column], LargeBinary):
+                conn.execute(
+                    text(
+                        f"ALTER TABLE chats ALTER COLUMN {column} TYPE BYTEA "
+                        f"USING convert_to({column}, 'UTF8')"
+                    )
+                )
+
+
+def _deduplicate_introduction_prompts(conn: Connection, batch_size: int = 500):
+    """
+    세션마다 첫 채팅에 통째로 저장된 자기소개 prompt를 템플릿 참조로 바꾸기
+
+    세션의 (연도, 지역, 인물)로 만든 prompt와 정확히 같은 경우에만 바꾸므로, 다른 문장으로 저장된 예전 채팅은 그대로 둠.
+    """
+    template = INTRODUCTION_PROMPT
+    find_template = text("SELECT id FROM prompt_templates WHERE checksum = :checksum")
+    template_id = conn.execute(find_template, {"checksum": template.checksum}).scalar()
+    if template_id is None:
+        conn.execute(
+            models.PromptTemplateModel.__table__.insert(),
+            {
+                "name": template.name,
+                "checksum": template.checksum,
+                "template": template.text,
+            },
+        )
+        template_id = conn.execute(
+            find_template, {"checksum": template.checksum}
+        ).scalar_one()
+
+    last_session_id = 0
+    while True:
+        sessions = conn.execute(
+            text(
+                "SELECT id, year, location, persona FROM sessions "
+                "WHERE id > :last ORDER BY id LIMIT :limit"
+            ),
+            {"last": last_session_id, "limit": batch_size},
+        ).all()
+        if not sessions:
+            return
+        last_session_id = sessions[-1].id
+        first_chats = conn.execute(
+            text(
+                "SELECT id, session_id, question FROM chats WHERE id IN "
+                "(SELECT min(id) FROM chats WHERE session_id IN :session_ids "
+                "GROUP BY session_id) AND prompt_template_id IS NULL"
+            ).bindparams(bindparam("session_ids", expanding=True)),
+            {"session_ids": [session.id for session in sessions]},
+        ).all()
+        sessions_by_id = {session.id: session for session in sessions}
+        updates = []
+        for chat in first_chats:
+            if chat.question is None:
+                continue
+            session = sessions_by_id[chat.session_id]
+            prompt = template.render(
+                year=session.year, location=session.location, persona=session.persona
+            )
+            if decompress_text(chat.question) == prompt:
+                updates.append(
+                    {
+                        "id": chat.id,
+                        "template_id": template_id,
+                        "params": prompt.params_json(),
+                    }
+                )
+        if updates:
+            conn.execute(
+                text(
+                    "UPDATE chats SET question = NULL, "
+                    "prompt_template_id = :template_id, prompt_params = :params "
+                    "WHERE id = :id"
+                ),
+                updates,
+            )
+
+
+def _add_session_summaries(conn: Connection, batch_size: int = 500):
+    """sessions에 채팅 수/마지막 답변 미리보기 컬럼을 추가하고, 기존 세션의 값을 채우기"""
+    columns = {column["name"] for column in inspect(conn).get_columns("sessions")}
+    if "message_count" not in columns:
+        conn.execute(
+            text(
+                "ALTER TABLE sessions "
+                "ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0"
+            )
+        )
+    if "last_answer_preview" not in columns:
+        conn.execute(
+            text("ALTER TABLE sessions ADD COLUMN last_answer_preview VARCHAR")
+        )
+
+    last_session_id = 0
+    while True:
+        session_ids = (
+            conn.execute(
+                text(
+                    "SELECT id FROM sessions WHERE id > :last ORDER BY id LIMIT :limit"
+                ),
+                {"last": last_session_id, "limit": batch_size},
+            )
+            .scalars()
+            .all()
+        )
+        if not session_ids:
+            return
+        last_session_id = session_ids[-1]
+        summaries = conn.execute(
+            text(
+                "SELECT chats.session_id, counts.message_count, chats.answer "
+                "FROM (SELECT session_id, count(*) AS message_count, max(id) AS last_id "
+                "FROM chats WHERE session_id IN :session_ids GROUP BY session_id) AS counts "
+                "JOIN chats ON chats.id = counts.last_id"
+            ).bindparams(bindparam("session_ids", expanding=True)),
+            {"session_ids": session_ids},
+        ).all()
+        if summaries:
+            conn.execute(
+                text(
+                    "UPDATE sessions SET message_count = :message_count, "
+                    "last_answer_preview = :preview WHERE id = :id"
+                ),
+                [
+                    {
+                        "id": summary.session_id,
+                        "message_count": summary.message_count,
+                        "preview": (
+                            None
+                            if summary.answer is None
+                            else answer_preview(decompress_text(summary.answer))
+                        ),
+                    }
+                    for summary in summaries
+                ],
+            )
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "create tables", _create_tables),
+    Migration(
+        2, "add sessions.use_completion_cache", _add_sessions_use_completion_cache
+    ),
+    Migration(
+        3,
+        "index chats(session_id, id) and sessions(user_id, created_at DESC)",
+        _create_hot_query_indexes,
+    ),
+    Migration(
+        4,
+        "add prompt_templates and store chats.question/answer as binary",
+        _add_prompt_templates_and_binary_chats,
+    ),
+    Migration(
+        5,
+        "replace stored introduction prompts with template references",
+        _deduplicate_introduction_prompts,
+    ),
+    Migration(
+        6,
+        "add full-text search index over chats (FTS5 / tsvector)",
+        create_search_index,
+    ),
+    Migration(
+        7,
+        "add sessions.message_count and sessions.last_answer_preview",
+        _add_session_summaries,
+    ),
+]
+
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, description VARCHAR NOT NULL, "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        )
+    )
+
+
+def _current_version(conn: Connection) -> int:
+    _ensure_version_table(conn)
+    version = conn.execute(text("SELECT max(version) FROM schema_migrations")).scalar()
+    return version or 0
+
+
+async def get_current_version(engine: AsyncEngine | None = None) -> int:
+    """DB에 적용된 마지막 마이그레이션 번호 조회하기 (없으면 0)"""
+    engine = engine or get_engine()
+    async with engine.begin() as conn:
+        return await conn.run_sync(_current_version)
+
+
+async def run_migrations(engine: AsyncEngine | None = None) -> list[Migration]:
+    """
+    적용되지 않은 마이그레이션을 순서대로 실행하기
+
+    Returns:
+        list[Migration]: 이번에 새로 적용된 마이그레이션 목록
+    """
+    engine = engine or get_engine()
+    current = await get_current_version(engine)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        async with engine.begin() as conn:
+            await conn.run_sync(migration.upgrade)
+            await conn.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, description) "
+                    "VALUES (:version, :description)"
+                ),
+                {"version": migration.version, "description": migration.description},
+            )
+        applied.append(migration)
+    return applied
+
+
+async def _exercise_orm(session_factory):
+    """ORM의 모든 조회/저장 메서드를 한 번씩 실행하기 (쿼리 계획 검사용)"""
+    from datetime import datetime, timezone
+
+    from .orm import AsyncORM
+    from .schemas import SessionCreate, SessionUpdate, UserCreate
+
+    async with session_factory() as db:
+        orm = AsyncORM(db)
+        await orm.check_username_exists("plan-user")
+        user = await orm.create_user(
+            UserCreate(username="plan-user", password="plan-password")
+        )
+        session = await orm.create_session(
+            SessionCreate(year=1800, location="Paris", persona="artist"), user.id
+        )
+        await orm.update_session(
+            session.id, user.id, SessionUpdate(use_completion_cache=False)
+        )
+        await orm.get_sessions_by_user(user.id)
+        await orm.get_sessions_by_user(user.id, get_recent=False)
+        await orm.get_sessions_by_user(user.id, before_id=session.id)
+        await orm.get_session_ids_by_user(user.id)
+        await orm.get_session_message_count(session.id)
+        await orm.create_introduction(
+            session.id,
+            INTRODUCTION_PROMPT.render(year=1800, location="Paris", persona="artist"),
+            "introduction",
+        )
+        chat = await orm.create_chat(session.id, "question", "answer" * 1000)
+        await orm.get_chats_by_session(session.id)
+        await orm.get_chats_by_session(session.id, limit=10)
+        await orm.get_chats_by_session(session.id, after_id=0, limit=10)
+        await orm.get_chats_by_session(session.id, before_id=chat.id, limit=10)
+        async for _ in orm.iter_chats_by_session(session.id, batch_size=10):
+            pass
+        results = await orm.search_chats(user.id, "answer", limit=10)
+        await orm.get_sessions_by_ids([result["session_id"] for result in results])
+        await orm.create_introduction_variant(1800, "paris", "artist", "answer")
+        await orm.get_introduction_variants(
+            1800, "paris", "artist", datetime.now(timezone.utc)
+        )
+
+
+async def check_query_plans() -> list[str]:
+    """
+    ORM이 실행하는 모든 SELECT 쿼리의 SQLite 실행 계획을 검사하기
+
+    임시 SQLite DB에 마이그레이션을 적용한 뒤 ORM 메서드를 실행하면서 SELECT 문을 기록하고,
+    각 문장을 EXPLAIN QUERY PLAN 하여 테이블 전체 스캔(SCAN)이나 정렬용 임시 B-tree가 있으면 문제로 보고함.
+    (FTS5 가상 테이블의 SCAN은 전문 색인을 사용하므로 제외)
+
+    Returns:
+        list[str]: 발견된 문제 목록 (비어 있으면 모든 쿼리가 인덱스를 사용)
+    """
+    with tempfile.TemporaryDirectory(prefix="query-plans-") as workdir:
+        engine = create_database_engine(
+            f"sqlite:///{os.path.join(workdir, 'plans.db')}"
+        )
+        await run_migrations(engine)
+
+        statements: list[tuple[str, tuple]] = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        await _exercise_orm(async_sessionmaker(engine, expire_on_commit=False))
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+        problems = []
+        async with engine.connect() as conn:
+            for statement, parameters in dict.fromkeys(statements):
+                raw = await conn.get_raw_connection()
+                cursor = await raw.driver_connection.execute(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+                plan = [row[-1] for row in await cursor.fetchall()]
+                for step in plan:
+                    full_scan = step.startswith("SCAN") and "VIRTUAL TABLE" not in step
+                    if full_scan or "TEMP B-TREE" in step:
+                        problems.append(
+                            f"{step}\n    in: {' '.join(statement.split())}"
+                        )
+        await engine.dispose()
+        return problems
+
+
+async def _main(command: str) -> int:
+    if command == "upgrade":
+        applied = await run_migrations()
+        for migration in applied:
+            print(f"applied {migration.version}: {migration.description}")
+        print(f"schema version: {await get_current_version()}")
+    elif command == "current":
+        print(f"schema version: {await get_current_version()}")
+    elif command == "check-plans":
+        problems = await check_query_plans()
+        for problem in problems:
+            print(f"NOT INDEXED: {problem}")
+        if problems:
+            return 1
+        print("all ORM queries use an index")
+    await database.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="데이터베이스 스키마 마이그레이션")
+    parser.add_argument("command", choices=["upgrade", "current", "check-plans"])
+    sys.exit(asyncio.run(_main(parser.parse_args().command)))
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, true
+from .compression import CompressedText
 from .database import Base
 
 
@@ -38,6 +39,9 @@ class SessionModel(Base):
         year (int): 세션의 연도 설정
         location (str): 세션의 위치 설정
         persona (str): 세션의 인물 설정
+        use_completion_cache (bool): 같은 질문에 대한 이전 답변 재사용(완성 캐시) 허용 여부
+        message_count (int): 세션의 채팅(질문/답변 쌍) 수 (채팅을 저장할 때 함께 갱신)
+        last_answer_preview (str | None): 마지막 답변의 앞부분 (채팅을 저장할 때 함께 갱신)
         created_at (datetime): 세션 생성 시간
 
     Relationships:
@@ -52,11 +56,18 @@ class SessionModel(Base):
     year = Column(Integer)
     location = Column(String)
     persona = Column(String)
+    use_completion_cache = Column(Boolean, default=True, server_default=true())
+    # 세션 목록에서 채팅을 읽지 않고 보여줄 수 있도록 저장해 두는 값
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_answer_preview = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("UserModel", back_populates="sessions")
     chats = relationship(
-        "ChatModel", back_populates="session", cascade="all, delete-orphan"
+        "ChatModel",
+        back_populates="session",
+        cascade="all, delete-orphan",
+        order_by="ChatModel.id",
     )
 
 
@@ -67,20 +78,89 @@ class ChatModel(Base):
     Attributes:
         id (int): 대화의 고유 식별자
         session_id (int): 대화가 속한 세션의 ID (Foreign Key)
-        question (str): 사용자의 질문 내용
-        answer (str): ChatGPT의 응답 내용
+        question (str | None): 사용자의 질문 내용 (템플릿 prompt이면 None, 긴 값은 압축 저장)
+        answer (str): ChatGPT의 응답 내용 (긴 값은 압축 저장)
+        prompt_template_id (int | None): 질문이 템플릿 prompt인 경우 템플릿 ID (Foreign Key)
+        prompt_params (str | None): 템플릿에 채워 넣을 파라미터 (JSON)
         created_at (datetime): 대화 생성 시간
 
+    템플릿 prompt의 question은 AsyncORM이 조회할 때 템플릿과 파라미터로 다시 만들어서 채워 줌.
+
     Relationships:
         - session: 다대일 관계로 SessionModel과 연결됨
     """
 
     __tablename__ = "chats"
+    # INSERT ... RETURNING으로 created_at까지 받아 오므로 저장 후 refresh(SELECT)가 필요 없음
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"))
-    question = Column(String)
-    answer = Column(String)
+    question = Column(CompressedText)
+    answer = Column(CompressedText)
+    prompt_template_id = Column(Integer, ForeignKey("prompt_templates.id"))
+    prompt_params = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     session = relationship("SessionModel", back_populates="chats")
+
+
+class PromptTemplateModel(Base):
+    """
+    여러 채팅이 공유하는 prompt 템플릿 문장을 저장하는 모델 (app/prompts.py 참고)
+
+    Attributes:
+        id (int): 템플릿의 고유 식별자
+        name (str): 템플릿 이름
+        checksum (str): 템플릿 문장의 SHA-256 (같은 문장은 한 번만 저장)
+        template (str): str.format 형식의 자리표시자를 포함한 문장
+        created_at (datetime): 생성 시간
+    """
+
+    __tablename__ = "prompt_templates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String)
+    checksum = Column(String, unique=True, index=True)
+    template = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# 사용자별 최근 세션 목록 조회용 (created_at이 같을 때는 id로 순서를 고정)
+Index(
+    "ix_sessions_user_id_created_at",
+    SessionModel.user_id,
+    SessionModel.created_at.desc(),
+    SessionModel.id.desc(),
+)
+
+# 세션별 대화 내역 조회 및 ChatModel.id 기준 keyset 페이지네이션용
+Index("ix_chats_session_id_id", ChatModel.session_id, ChatModel.id)
+
+
+class IntroductionCacheModel(Base):
+    """
+    (연도, 지역, 인물) 조합별로 생성해 둔 자기소개 답변을 저장하는 모델
+
+    같은 페르소나의 새 세션은 상위 LLM을 호출하지 않고 저장된 답변 중 하나를 재사용함.
+
+    Attributes:
+        id (int): 캐시 항목의 고유 식별자
+        year (int): 페르소나의 연도
+        location_key (str): 정규화된 지역 (공백 정리, 대소문자 무시)
+        persona_key (str): 정규화된 인물 (공백 정리, 대소문자 무시)
+        answer (str): ChatGPT가 생성한 자기소개 답변
+        created_at (datetime): 생성 시간 (만료 판단에 사용)
+    """
+
+    __tablename__ = "introduction_cache"
+    __table_args__ = (
+        Index("ix_introduction_cache_key", "year", "location_key", "persona_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    year = Column(Integer)
+    location_key = Column(String)
+    persona_key = Column(String)
+    answer = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
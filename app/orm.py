@@ -1,65 +1,504 @@
-from sqlalchemy.orm import Session
-from .models import UserModel, SessionModel, ChatModel
-from .schemas import UserCreate, SessionCreate
-from .auth import get_hashed_password
+import json
+from collections.abc import AsyncIterator
 
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime
+from .models import (
+    UserModel,
+    SessionModel,
+    ChatModel,
+    IntroductionCacheModel,
+    PromptTemplateModel,
+)
+from .prompts import PromptTemplate, RenderedPrompt
+from . import search
+from .schemas import UserCreate, SessionCreate, SessionUpdate
+from .auth import password_hasher
+from .config import SESSION_PREVIEW_CHARS
 
-class ORM:
-    def __init__(self, db: Session):
+# 템플릿 checksum -> 템플릿 ID, 템플릿 ID -> 템플릿 문장 (저장된 템플릿은 바뀌지 않으므로 프로세스 동안 유지)
+_prompt_template_ids: dict[str, int] = {}
+_prompt_template_texts: dict[int, str] = {}
+
+
+class SessionNotFoundError(Exception):
+    """
+    채팅을 저장하려는 세션이 없는 경우
+
+    Attributes:
+        session_id (int): 찾지 못한 세션 ID
+    """
+
+    def __init__(self, session_id: int):
+        super().__init__(f"session {session_id} not found")
+        self.session_id = session_id
+
+
+def answer_preview(answer: str) -> str:
+    """세션 목록에 보여줄 답변 미리보기 (공백을 정리한 앞부분)"""
+    return " ".join(answer.split())[:SESSION_PREVIEW_CHARS]
+
+
+class AsyncORM:
+    """
+    AsyncSession 위에서 사용자/세션/채팅을 조회하고 저장하는 클래스
+
+    모든 조회/저장 메서드가 awaitable 이므로 async def 핸들러에서 이벤트 루프를 막지 않음.
+    관계(relationship) 지연 로딩은 비동기 세션에서 사용할 수 없으므로, 필요한 데이터는 명시적인 쿼리로 조회함.
+    """
+
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_user_by_username(self, username: str) -> UserModel | None:
+    async def get_user_by_username(self, username: str) -> UserModel | None:
         """사용자 이름으로 유저 조회"""
-        return self.db.query(UserModel).filter(UserModel.username == username).first()
+        return await self.db.scalar(
+            select(UserModel).where(UserModel.username == username)
+        )
 
-    def check_username_exists(self, username: str) -> bool:
+    async def check_username_exists(self, username: str) -> bool:
         """사용자 이름 존재 여부 확인"""
-        return self.get_user_by_username(username) is not None
+        return await self.get_user_by_username(username) is not None
 
-    def create_user(self, user: UserCreate) -> UserModel:
+    async def create_user(self, user: UserCreate) -> UserModel:
         """새로운 유저 생성"""
-        hashed_password = get_hashed_password(user.password)
+        hashed_password = await password_hasher.hash(user.password)
         new_user = UserModel(username=user.username, hashed_password=hashed_password)
         self.db.add(new_user)
-        self.db.commit()
-        self.db.refresh(new_user)
+        await self.db.commit()
+        await self.db.refresh(new_user)
         return new_user
 
-    def create_session(self, session_data: SessionCreate, user_id: int) -> SessionModel:
+    async def create_session(
+        self, session_data: SessionCreate, user_id: int
+    ) -> SessionModel:
         """새로운 세션 생성"""
         new_session = SessionModel(user_id=user_id, **session_data.model_dump())
         self.db.add(new_session)
-        self.db.commit()
-        self.db.refresh(new_session)
+        await self.db.commit()
+        await self.db.refresh(new_session)
+        return new_session
+
+    async def add_session(
+        self, session_data: SessionCreate, user_id: int
+    ) -> SessionModel:
+        """새로운 세션을 commit 하지 않고 추가 (ID는 flush로 받아 옴, 여러 저장을 한 트랜잭션으로 묶을 때 사용)"""
+        new_session = SessionModel(user_id=user_id, **session_data.model_dump())
+        self.db.add(new_session)
+        await self.db.flush()
         return new_session
 
-    def get_session_by_id(self, session_id: int) -> SessionModel | None:
+    async def get_session_by_id(self, session_id: int) -> SessionModel | None:
         """세션 ID로 세션 조회"""
-        return self.db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        return await self.db.get(SessionModel, session_id)
 
-    def get_sessions_by_user(
-        self, user_id: int, get_recent: bool = True, recent_count: int = 5
-    ) -> list[SessionModel]:
-        """사용자 ID로 세션 조회"""
-        sessions_for_user_id = self.db.query(SessionModel).filter(
-            SessionModel.user_id == user_id
+    async def get_session_message_count(self, session_id: int) -> int | None:
+        """세션의 채팅(질문/답변 쌍) 수 조회 (세션이 없으면 None)"""
+        return await self.db.scalar(
+            select(SessionModel.message_count).where(SessionModel.id == session_id)
         )
+
+    async def update_session(
+        self, session_id: int, user_id: int, session_data: SessionUpdate
+    ) -> SessionModel | None:
+        """사용자가 소유한 세션의 설정 변경 (세션이 없거나 다른 사용자의 세션이면 None)"""
+        session = await self.get_session_by_id(session_id)
+        if session is None or session.user_id != user_id:
+            return None
+        for field, value in session_data.model_dump(exclude_unset=True).items():
+            setattr(session, field, value)
+        await self.db.commit()
+        return session
+
+    async def get_sessions_by_user(
+        self,
+        user_id: int,
+        get_recent: bool = True,
+        recent_count: int = 5,
+        before_id: int | None = None,
+    ) -> list[SessionModel]:
+        """
+        사용자 ID로 세션 조회
+
+        get_recent이면 최근 세션부터 recent_count개를 조회하며,
+        before_id가 주어지면 그 세션보다 오래된 세션부터 조회함. ((created_at, id) 기준 keyset 페이지네이션)
+        """
+        query = select(SessionModel).where(SessionModel.user_id == user_id)
         if not get_recent:
-            return sessions_for_user_id.all()
-        return (
-            sessions_for_user_id.order_by(SessionModel.created_at.desc())
-            .limit(recent_count)
-            .all()
+            return list(await self.db.scalars(query))
+        if before_id is not None:
+            # 커서 세션의 created_at을 DB에서 직접 비교하여, 저장된 시각과 파라미터의 형식 차이에 영향받지 않음
+            cursor_created_at = (
+                select(SessionModel.created_at)
+                .where(SessionModel.id == before_id)
+                .scalar_subquery()
+            )
+            query = query.where(
+                tuple_(SessionModel.created_at, SessionModel.id)
+                < tuple_(cursor_created_at, before_id)
+            )
+        query = query.order_by(
+            SessionModel.created_at.desc(), SessionModel.id.desc()
+        ).limit(recent_count)
+        return list(await self.db.scalars(query))
+
+    async def get_session_ids_by_user(self, user_id: int) -> list[int]:
+        """사용자의 모든 세션 ID를 오래된 순서로 조회 (세션 인덱스만 읽음)"""
+        query = (
+            select(SessionModel.id)
+            .where(SessionModel.user_id == user_id)
+            .order_by(SessionModel.created_at.desc(), SessionModel.id.desc())
         )
+        return list(await self.db.scalars(query))[::-1]
+
+    async def create_chat(
+        self, session_id: int, question: str, answer: str
+    ) -> ChatModel:
+        """새로운 채팅 생성 (id, created_at은 INSERT ... RETURNING으로 채워짐)"""
+        return (await self.create_chats([(session_id, question, answer)]))[0]
+
+    async def release_connection(self):
+        """
+        진행 중인 읽기 트랜잭션을 끝내고 연결을 풀에 반환하기
+
+        상위 LLM 호출처럼 오래 기다리는 작업 전에 호출하여, 기다리는 동안 연결을 붙잡고 있지 않도록 함.
+        (expire_on_commit=False 이므로 이미 읽은 객체는 그대로 사용할 수 있음)
+        """
+        await self.db.commit()
+
+    async def create_chats(self, rows: list[tuple[int, str, str]]) -> list[ChatModel]:
+        """
+        여러 채팅을 하나의 트랜잭션으로 생성
+
+        질문이 RenderedPrompt(템플릿 prompt)이면 문장 대신 템플릿 ID와 파라미터만 저장하고,
+        반환하는 객체의 question에는 전체 문장을 채워 둠.
+        같은 트랜잭션에서 검색 색인(chat_search)과 세션의 채팅 수/마지막 답변 미리보기도 갱신함.
+
+        Args:
+            rows (list[tuple[int, str, str]]): (세션 ID, 질문, 답변) 목록
+
+        Returns:
+            list[ChatModel]: rows와 같은 순서로 생성된 채팅 목록
+        """
+        new_chats = await self.add_chats(rows)
+        await self.db.commit()
+        for new_chat, (_, question, _) in zip(new_chats, rows):
+            if new_chat.prompt_template_id is not None:
+                set_committed_value(new_chat, "question", str(question))
+        return new_chats
+
+    async def add_chats(self, rows: list[tuple[int, str, str]]) -> list[ChatModel]:
+        """
+        여러 채팅을 commit 하지 않고 추가 (검색 색인과 세션 요약도 같은 트랜잭션에서 갱신, 여러 저장을 한 트랜잭션으로 묶을 때 사용)
+
+        Args:
+            rows (list[tuple[int, str, str]]): (세션 ID, 질문, 답변) 목록
+
+        Returns:
+            list[ChatModel]: rows와 같은 순서로 추가된 채팅 목록 (템플릿 prompt 채팅의 question은 비어 있음)
+        """
+        new_chats = [
+            await self._new_chat(session_id, question, answer)
+            for session_id, question, answer in rows
+        ]
+        self.db.add_all(new_chats)
+        await self.db.flush()
+        await self._index_chats(new_chats)
+        await self._update_session_summaries(new_chats)
+        return new_chats
+
+    async def create_introduction(
+        self, session_id: int, question: str, answer: str
+    ) -> ChatModel | None:
+        """
+        세션의 첫 채팅(자기소개)을 생성 (이미 채팅이 있거나 세션이 없으면 저장하지 않고 None 반환)
 
-    def create_chat(self, session_id: int, question: str, answer: str) -> ChatModel:
-        """새로운 채팅 생성"""
-        new_chat = ChatModel(session_id=session_id, question=question, answer=answer)
+        sessions.message_count가 0일 때만 1로 바꾸는 조건부 UPDATE를 같은 트랜잭션에서 먼저 실행하므로,
+        여러 워커 프로세스가 동시에 같은 세션의 자기소개를 저장하려 해도 하나만 저장됨.
+
+        Args:
+            session_id (int): 세션 ID
+            question (str): 자기소개 prompt (RenderedPrompt이면 템플릿 ID와 파라미터만 저장)
+            answer (str): 자기소개 답변
+
+        Returns:
+            ChatModel | None: 생성된 채팅 (다른 요청이 먼저 저장했으면 None)
+        """
+        # 처음 사용하는 템플릿은 저장 후 바로 commit 되므로 조건부 UPDATE보다 먼저 준비
+        new_chat = await self._new_chat(session_id, question, answer)
+        sessions = SessionModel.__table__
+        claimed = await self.db.execute(
+            update(sessions)
+            .where(sessions.c.id == session_id, sessions.c.message_count == 0)
+            .values(message_count=1, last_answer_preview=answer_preview(answer))
+        )
+        if claimed.rowcount == 0:
+            await self.db.rollback()
+            return None
         self.db.add(new_chat)
-        self.db.commit()
-        self.db.refresh(new_chat)
+        await self.db.flush()
+        await self._index_chats([new_chat])
+        await self.db.commit()
+        if new_chat.prompt_template_id is not None:
+            set_committed_value(new_chat, "question", str(question))
         return new_chat
 
-    def get_chats_by_session(self, session_id: int) -> list[ChatModel]:
-        """세션 ID로 채팅 내역 조회"""
-        return self.db.query(ChatModel).filter(ChatModel.session_id == session_id).all()
+    async def _new_chat(self, session_id: int, question: str, answer: str) -> ChatModel:
+        """저장할 채팅 객체 만들기 (질문이 RenderedPrompt이면 템플릿 ID와 파라미터만 저장)"""
+        if isinstance(question, RenderedPrompt):
+            return ChatModel(
+                session_id=session_id,
+                question=None,
+                answer=answer,
+                prompt_template_id=await self.get_prompt_template_id(question.template),
+                prompt_params=question.params_json(),
+            )
+        return ChatModel(session_id=session_id, question=question, answer=answer)
+
+    async def _index_chats(self, chats: list[ChatModel]):
+        """
+        flush 된 채팅을 검색 색인에 추가하기 (commit 하지 않음)
+
+        Raises:
+            SessionNotFoundError: 채팅이 속한 세션이 없는 경우 (호출하는 쪽에서 rollback)
+        """
+        dialect = self.db.get_bind().dialect.name
+        if not search.is_supported(dialect):
+            return
+        session_ids = {chat.session_id for chat in chats}
+        owners = dict(
+            (
+                await self.db.execute(
+                    select(SessionModel.id, SessionModel.user_id).where(
+                        SessionModel.id.in_(session_ids)
+                    )
+                )
+            )
+            .tuples()
+            .all()
+        )
+        missing = session_ids - owners.keys()
+        if missing:
+            raise SessionNotFoundError(min(missing))
+        await self.db.execute(
+            search.insert_statement(dialect),
+            [
+                {
+                    "chat_id": chat.id,
+                    "user_id": owners[chat.session_id],
+                    "session_id": chat.session_id,
+                    "question": search.indexed_question(
+                        chat.question, chat.prompt_params
+                    ),
+                    "answer": chat.answer,
+                }
+                for chat in chats
+            ],
+        )
+
+    async def _update_session_summaries(self, chats: list[ChatModel]):
+        """세션별로 채팅 수를 늘리고 마지막 답변 미리보기를 바꾸기 (commit 하지 않음)"""
+        summaries: dict[int, dict] = {}
+        for chat in chats:
+            summary = summaries.setdefault(
+                chat.session_id, {"session_id": chat.session_id, "added": 0}
+            )
+            summary["added"] += 1
+            summary["preview"] = answer_preview(chat.answer)
+        sessions = SessionModel.__table__
+        await self.db.execute(
+            update(sessions)
+            .where(sessions.c.id == bindparam("session_id"))
+            .values(
+                message_count=sessions.c.message_count + bindparam("added"),
+                last_answer_preview=bindparam("preview"),
+            ),
+            list(summaries.values()),
+        )
+
+    async def search_chats(
+        self, user_id: int, query: str, limit: int, offset: int = 0
+    ) -> list[dict]:
+        """
+        사용자의 모든 채팅에서 검색어의 모든 단어를 포함하는 채팅을 관련도 순으로 조회
+
+        Args:
+            user_id (int): 검색할 채팅을 소유한 사용자 ID
+            query (str): 검색어 (단어마다 접두사 검색)
+            limit (int): 최대 조회 개수
+            offset (int): 건너뛸 결과 수
+
+        Returns:
+            list[dict]: chat_id, session_id, question, answer(일치한 부분을 <mark>로 감싼 snippet) 목록
+        """
+        dialect = self.db.get_bind().dialect.name
+        terms = search.search_terms(query)
+        if not terms or not search.is_supported(dialect):
+            return []
+        statement, params = search.search_statement(dialect, user_id, terms)
+        rows = await self.db.execute(
+            statement, {**params, "limit": limit, "offset": offset}
+        )
+        return [
+            {
+                "chat_id": row.chat_id,
+                "session_id": row.session_id,
+                "question": search.format_snippet(row.question),
+                "answer": search.format_snippet(row.answer),
+            }
+            for row in rows
+        ]
+
+    async def get_sessions_by_ids(self, session_ids: list[int]) -> list[SessionModel]:
+        """세션 ID 목록으로 세션 조회"""
+        if not session_ids:
+            return []
+        query = select(SessionModel).where(SessionModel.id.in_(session_ids))
+        return list(await self.db.scalars(query))
+
+    async def get_prompt_template_id(self, template: PromptTemplate) -> int:
+        """
+        템플릿 ID 조회 (처음 사용하는 템플릿이면 저장)
+
+        여러 워커가 동시에 저장하더라도 checksum이 같은 템플릿은 한 번만 저장됨.
+        """
+        template_id = _prompt_template_ids.get(template.checksum)
+        if template_id is not None:
+            return template_id
+
+        query = select(PromptTemplateModel.id).where(
+            PromptTemplateModel.checksum == template.checksum
+        )
+        template_id = await self.db.scalar(query)
+        if template_id is None:
+            values = {
+                "name": template.name,
+                "checksum": template.checksum,
+                "template": template.text,
+            }
+            dialect = self.db.get_bind().dialect.name
+            if dialect in ("sqlite", "postgresql"):
+                dialect_insert = (
+                    sqlite.insert if dialect == "sqlite" else postgresql.insert
+                )
+                statement = dialect_insert(PromptTemplateModel).on_conflict_do_nothing(
+                    index_elements=["checksum"]
+                )
+            else:
+                statement = insert(PromptTemplateModel)
+            await self.db.execute(statement.values(**values))
+            # 채팅 저장이 실패하더라도 템플릿은 남겨 두어, 캐시한 ID가 항상 DB에 존재하도록 바로 commit
+            await self.db.commit()
+            template_id = await self.db.scalar(query)
+
+        _prompt_template_ids[template.checksum] = template_id
+        _prompt_template_texts[template_id] = template.text
+        return template_id
+
+    async def _render_prompts(self, chats: list[ChatModel]) -> list[ChatModel]:
+        """템플릿 prompt로 저장된 채팅의 question을 템플릿과 파라미터로 다시 만들어 채우기"""
+        templated = [
+            chat
+            for chat in chats
+            if chat.prompt_template_id is not None and chat.question is None
+        ]
+        if not templated:
+            return chats
+
+        missing = {chat.prompt_template_id for chat in templated}
+        missing.difference_update(_prompt_template_texts)
+        if missing:
+            rows = await self.db.execute(
+                select(PromptTemplateModel.id, PromptTemplateModel.template).where(
+                    PromptTemplateModel.id.in_(missing)
+                )
+            )
+            _prompt_template_texts.update(rows.tuples().all())
+
+        for chat in templated:
+            params = json.loads(chat.prompt_params or "{}")
+            question = _prompt_template_texts[chat.prompt_template_id].format(**params)
+            # 변경으로 표시하지 않아야 commit 할 때 문장 전체가 다시 저장되지 않음
+            set_committed_value(chat, "question", question)
+        return chats
+
+    async def get_chats_by_session(
+        self,
+        session_id: int,
+        after_id: int | None = None,
+        before_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[ChatModel]:
+        """
+        세션 ID로 채팅 내역을 ID 오름차순으로 조회 (ChatModel.id 기준 keyset 페이지네이션)
+
+        - after_id가 주어지면 그 이후의 채팅을 앞에서부터 limit개 조회
+        - 그 외에는 before_id 이전(없으면 가장 최근)의 채팅을 뒤에서부터 limit개 조회
+        """
+        query = select(ChatModel).where(ChatModel.session_id == session_id)
+        if after_id is not None:
+            query = query.where(ChatModel.id > after_id)
+        if before_id is not None:
+            query = query.where(ChatModel.id < before_id)
+        if limit is None:
+            chats = list(await self.db.scalars(query.order_by(ChatModel.id)))
+        elif after_id is not None:
+            chats = list(
+                await self.db.scalars(query.order_by(ChatModel.id).limit(limit))
+            )
+        else:
+            chats = list(
+                await self.db.scalars(query.order_by(ChatModel.id.desc()).limit(limit))
+            )[::-1]
+        return await self._render_prompts(chats)
+
+    async def iter_chats_by_session(
+        self, session_id: int, batch_size: int
+    ) -> AsyncIterator[list[ChatModel]]:
+        """
+        세션의 채팅을 ID 오름차순으로 batch_size개씩 나누어 조회
+
+        서버 측 커서(yield_per)로 읽으므로 채팅 수와 관계없이 한 번에 batch_size개만 메모리에 올라옴.
+        """
+        query = (
+            select(ChatModel)
+            .where(ChatModel.session_id == session_id)
+            .order_by(ChatModel.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream_scalars(query)
+        try:
+            async for partition in result.partitions():
+                yield await self._render_prompts(list(partition))
+        finally:
+            await result.close()
+
+    async def get_introduction_variants(
+        self, year: int, location_key: str, persona_key: str, created_after: datetime
+    ) -> list[IntroductionCacheModel]:
+        """페르소나 조합으로 만료되지 않은 자기소개 캐시 항목 조회"""
+        query = (
+            select(IntroductionCacheModel)
+            .where(
+                IntroductionCacheModel.year == year,
+                IntroductionCacheModel.location_key == location_key,
+                IntroductionCacheModel.persona_key == persona_key,
+                IntroductionCacheModel.created_at > created_after,
+            )
+            .order_by(IntroductionCacheModel.id)
+        )
+        return list(await self.db.scalars(query))
+
+    async def create_introduction_variant(
+        self, year: int, location_key: str, persona_key: str, answer: str
+    ) -> IntroductionCacheModel:
+        """새로운 자기소개 캐시 항목 생성"""
+        new_variant = IntroductionCacheModel(
+            year=year, location_key=location_key, persona_key=persona_key, answer=answer
+        )
+        self.db.add(new_variant)
+        await self.db.commit()
+        return new_variant
@@ -0,0 +1,63 @@
+import hashlib
+import json
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    파라미터만 바꿔서 반복해서 사용하는 prompt 문장
+
+    DB에는 템플릿 문장을 prompt_templates 테이블에 한 번만 저장하고,
+    각 채팅에는 템플릿 ID와 파라미터만 저장함. (app/orm.py 참고)
+    문장을 수정하면 checksum이 달라져 새 템플릿으로 저장되므로, 이전 대화는 당시의 문장 그대로 복원됨.
+
+    Attributes:
+        name (str): 템플릿 이름 (사람이 알아보기 위한 용도)
+        text (str): str.format 형식의 자리표시자({year} 등)를 포함한 문장
+    """
+
+    name: str
+    text: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+    def render(self, **params) -> "RenderedPrompt":
+        """파라미터를 채워 넣은 prompt 문자열 만들기"""
+        return RenderedPrompt(self, params)
+
+
+class RenderedPrompt(str):
+    """
+    PromptTemplate으로 만든 prompt 문자열
+
+    일반 문자열처럼 ChatHistory와 상위 LLM 요청에 그대로 사용할 수 있고,
+    채팅으로 저장할 때는 전체 문장 대신 template과 params만 저장됨.
+    """
+
+    template: PromptTemplate
+    params: dict
+
+    def __new__(cls, template: PromptTemplate, params: dict):
+        rendered = super().__new__(cls, template.text.format(**params))
+        rendered.template = template
+        rendered.params = params
+        return rendered
+
+    def params_json(self) -> str:
+        return json.dumps(self.params, ensure_ascii=False, sort_keys=True)
+
+
+INTRODUCTION_PROMPT = PromptTemplate(
+    name="introduction",
+    text=(
+        "너는 {year}년에 {location} 지역에 살고 있는 '{persona}'인 사람이야. "
+        "이 조건에 부합하는 실제 역사의 인물을 반드시 찾아보고, 찾았다면 그 사람인 것처럼 말해줘. "
+        "못 찾았다면 최대한 그 시대와 지역에 있었을 법한 사람인 것처럼 대답해줘."
+        "앞으로 말투도 그런 사람인 것처럼 대답해. 그렇지만 한국어로 말해야 해. "
+        "너의 시대와 지역을 벗어나는 지식, 기술, 용어 등에 대해서는 전혀 몰라야 해. "
+        "이름을 반드시 포함해서, 짧게 너 자신을 소개해줘."
+    ),
+)
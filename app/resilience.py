@@ -0,0 +1,152 @@
+import random
+import time
+from collections import deque
+from collections.abc import Callable
+
+
+class Deadline:
+    """요청 하나에 허용된 전체 시간 (재시도/hedging을 포함한 모든 시도가 공유)"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """
+    재시도 전에 기다릴 시간 (full jitter 지수 백오프)
+
+    0 ~ min(maximum, base * 2^attempt) 사이의 무작위 값을 사용하여,
+    여러 요청이 동시에 실패했을 때 재시도가 한꺼번에 몰리지 않도록 함.
+    """
+    return random.uniform(0, min(maximum, base * 2**attempt))
+
+
+class LatencyTracker:
+    """
+    최근 성공한 호출의 소요 시간으로 분위수(p95 등)를 계산하는 클래스
+
+    최근 window개만 유지하므로 상위 서버의 상태 변화를 빠르게 반영함.
+    """
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """q 분위(0~1)의 소요 시간 (표본이 없으면 None)"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class CircuitOpenError(Exception):
+    """회로가 열려 있어 호출하지 않고 바로 실패한 경우 (retry_after초 뒤에 다시 시도 가능)"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("circuit breaker is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    상위 서버가 계속 실패할 때 호출을 잠시 멈추고 즉시 실패시키는 회로 차단기
+
+    [작동 방식]
+    1. closed: 평소 상태. 연속 실패가 failure_threshold번이 되면 open으로 전환.
+    2. open: reset_seconds 동안 호출하지 않고 CircuitOpenError를 발생시킴.
+    3. half_open: reset_seconds가 지나면 시험 호출 하나만 허용.
+       시험 호출이 성공하면 closed, 실패하면 다시 open으로 전환.
+       (회로가 열리기 전에 시작된 호출의 결과는 시험 호출 자리나 상태를 바꾸지 않음)
+
+    before_call()로 호출 가능 여부를 확인하고, 호출이 끝나면 반드시 before_call()이 반환한 호출 ID와 함께 after_call()로 결과를 알려야 함.
+    단일 이벤트 루프 안에서 사용하는 것을 전제로 하므로 별도의 lock은 사용하지 않음.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        on_state_change: Callable[[str], None] | None = None,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.on_state_change = on_state_change
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._last_call_id = 0
+        self._trial_call_id: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def before_call(self) -> int:
+        """
+        호출해도 되는지 확인하기
+
+        Returns:
+            int: after_call()에 전달할 호출 ID
+
+        Raises:
+            CircuitOpenError: 회로가 열려 있거나, half_open 상태에서 이미 시험 호출이 진행 중인 경우
+        """
+        self._last_call_id += 1
+        if not self.enabled:
+            return self._last_call_id
+        if self.state == self.OPEN:
+            waited = time.monotonic() - self._opened_at
+            if waited < self.reset_seconds:
+                raise CircuitOpenError(self.reset_seconds - waited)
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._trial_call_id is not None:
+                raise CircuitOpenError(1.0)
+            self._trial_call_id = self._last_call_id
+        return self._last_call_id
+
+    def after_call(self, call_id: int, healthy: bool | None):
+        """
+        호출 결과 알리기
+
+        Args:
+            call_id (int): before_call()이 반환한 호출 ID
+            healthy (bool | None): 상위 서버가 정상 응답했으면 True, 상위 서버 문제로 실패했으면 False,
+                호출이 취소되어 알 수 없으면 None
+        """
+        if not self.enabled:
+            return
+        if call_id == self._trial_call_id:
+            self._trial_call_id = None
+        elif self.state != self.CLOSED:
+            # 회로가 열리기 전에 시작된 호출은 open/half_open 상태를 바꾸지 않음
+            return
+        if healthy is None:
+            return
+        if healthy:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def _set_state(self, state: str):
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(state)
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
 
@@ -61,11 +64,24 @@ class SessionCreate(BaseModel):
     - year (int): 세션의 연도 설정값
     - location (str): 세션의 위치 설정값
     - persona (str): 세션의 인물 설정값
+    - use_completion_cache (bool): 같은 질문에 대한 이전 답변 재사용 허용 여부 (기본 True)
     """
 
     year: int
     location: str
     persona: str
+    use_completion_cache: bool = True
+
+
+class SessionUpdate(BaseModel):
+    """
+    대화 세션 설정 변경 요청을 위한 스키마
+
+    Attributes:
+    - use_completion_cache (bool): 같은 질문에 대한 이전 답변 재사용 허용 여부
+    """
+
+    use_completion_cache: bool
 
 
 class SessionCreateResponse(BaseModel):
@@ -88,12 +104,29 @@ class SessionResponse(BaseModel):
     - year (int): 세션의 연도 설정값
     - location (str): 세션의 위치 설정값
     - persona (str): 세션의 인물 설정값
+    - use_completion_cache (bool): 같은 질문에 대한 이전 답변 재사용 허용 여부
     """
 
     id: int
     year: int
     location: str
     persona: str
+    use_completion_cache: bool = True
+
+
+class SessionSummaryResponse(SessionResponse):
+    """
+    세션 목록의 항목을 반환하기 위한 스키마 (세션 정보 + 대화 요약)
+
+    Attributes:
+    - message_count (int): 세션의 채팅(질문/답변 쌍) 수 (자기소개 포함)
+    - last_answer_preview (str | None): 마지막 답변의 앞부분 (채팅이 없으면 None)
+    - created_at (datetime | None): 세션 생성 시간
+    """
+
+    message_count: int = 0
+    last_answer_preview: str | None = None
+    created_at: datetime | None = None
 
 
 class ChatCreate(BaseModel):
@@ -112,9 +145,184 @@ class ChatResponse(BaseModel):
     채팅 메시지 응답을 위한 스키마
 
     Attributes:
+        id (int | None): 채팅의 고유 ID (페이지네이션 커서로 사용, 자기소개 응답에서는 None)
         question (str): 사용자가 보낸 원본 질문
         answer (str): ChatGPT가 생성한 응답
     """
 
+    id: int | None = None
     question: str
     answer: str
+
+
+class ChatDeltaResponse(ChatResponse):
+    """
+    새로운 질문에 대한 응답만 반환하기 위한 스키마 (전체 대화 기록 대신 추가된 한 쌍만 전송)
+
+    Attributes:
+        cursor (int): 다음 조회 시 after_id로 사용할 수 있는 마지막 채팅 ID
+    """
+
+    cursor: int
+
+
+class ContextWindowStatsResponse(BaseModel):
+    """
+    대화 내역 토큰 예산 적용 통계를 반환하기 위한 스키마
+
+    Attributes:
+    - token_budget (int): 요청 한 번에 허용되는 토큰 예산 (0 이하이면 무제한)
+    - requests (int): 예산이 적용된 상위 LLM 요청 수
+    - trimmed_requests (int): 대화가 잘린 요청 수
+    - trimmed_messages (int): 잘려서 전송되지 않은 메시지 수
+    - trimmed_tokens (int): 잘려서 전송되지 않은 토큰 수 (근사값)
+    - sent_tokens (int): 전송된 토큰 수 (근사값)
+    """
+
+    token_budget: int
+    requests: int
+    trimmed_requests: int
+    trimmed_messages: int
+    trimmed_tokens: int
+    sent_tokens: int
+
+
+class CacheStatsResponse(BaseModel):
+    """
+    프로세스 내부 캐시의 통계를 반환하기 위한 스키마
+
+    Attributes:
+    - hits (int): 캐시에서 값을 찾은 횟수
+    - misses (int): 캐시에서 값을 찾지 못한 횟수
+    - hit_rate (float): hits / (hits + misses)
+    - evictions (int): 한도 초과로 밀려난 항목 수
+    - expirations (int): TTL 만료로 제거된 항목 수
+    - entries (int): 현재 항목 수
+    - size_bytes (int): 현재 항목의 추정 메모리 크기
+    """
+
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    expirations: int
+    entries: int
+    size_bytes: int
+
+
+class PoolStatsResponse(BaseModel):
+    """
+    데이터베이스 연결 풀 상태를 반환하기 위한 스키마
+
+    Attributes:
+    - driver (str): 사용 중인 드라이버 (예: sqlite+aiosqlite, postgresql+asyncpg)
+    - pool_class (str): 연결 풀 종류
+    - size (int | None): 유지하는 기본 연결 수
+    - checked_in (int | None): 풀에서 대기 중인 연결 수
+    - checked_out (int | None): 요청이 사용 중인 연결 수
+    - overflow (int | None): 기본 크기를 넘어 추가로 연 연결 수
+    - journal_mode (str | None): SQLite의 현재 journal_mode (SQLite가 아니면 None)
+    - chat_writes (dict): 채팅 저장 group commit 통계 (batches, rows, avg_batch_rows 등)
+    """
+
+    driver: str
+    pool_class: str
+    size: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    journal_mode: str | None = None
+    chat_writes: dict = {}
+
+
+class TranscriptSessionRecord(BaseModel):
+    """
+    대화 내역 내보내기/가져오기(NDJSON)의 세션 한 줄
+
+    Attributes:
+    - type ("session"): 레코드 종류
+    - id (int): 내보낸 DB에서의 세션 ID (같은 파일의 chat 레코드가 session_id로 참조)
+    - year (int): 세션의 연도 설정값
+    - location (str): 세션의 위치 설정값
+    - persona (str): 세션의 인물 설정값
+    - use_completion_cache (bool): 같은 질문에 대한 이전 답변 재사용 허용 여부
+    - created_at (datetime | None): 세션 생성 시간 (가져올 때는 사용하지 않음)
+    """
+
+    type: Literal["session"]
+    id: int
+    year: int
+    location: str
+    persona: str
+    use_completion_cache: bool = True
+    created_at: datetime | None = None
+
+
+class TranscriptChatRecord(BaseModel):
+    """
+    대화 내역 내보내기/가져오기(NDJSON)의 채팅 한 줄
+
+    Attributes:
+    - type ("chat"): 레코드 종류
+    - id (int | None): 내보낸 DB에서의 채팅 ID
+    - session_id (int): 채팅이 속한 세션 레코드의 id
+    - question (str): 질문 (세션의 첫 채팅은 자기소개 prompt)
+    - answer (str): 답변
+    - created_at (datetime | None): 채팅 생성 시간 (가져올 때는 사용하지 않음)
+    """
+
+    type: Literal["chat"]
+    id: int | None = None
+    session_id: int
+    question: str
+    answer: str
+    created_at: datetime | None = None
+
+
+class TranscriptImportResponse(BaseModel):
+    """
+    대화 내역 가져오기 결과를 반환하기 위한 스키마
+
+    Attributes:
+    - sessions (int): 새로 만든 세션 수
+    - chats (int): 저장한 채팅 수
+    """
+
+    sessions: int
+    chats: int
+
+
+class SearchResultResponse(BaseModel):
+    """
+    대화 내역 검색 결과 하나
+
+    Attributes:
+    - chat_id (int): 일치한 채팅 ID
+    - session_id (int): 채팅이 속한 세션 ID
+    - year (int): 세션의 연도 설정값
+    - location (str): 세션의 위치 설정값
+    - persona (str): 세션의 인물 설정값
+    - question (str): 질문 snippet (HTML escape 되어 있으며, 일치한 부분은 <mark>로 감쌈)
+    - answer (str): 답변 snippet (question과 같은 형식)
+    """
+
+    chat_id: int
+    session_id: int
+    year: int
+    location: str
+    persona: str
+    question: str
+    answer: str
+
+
+class SearchResponse(BaseModel):
+    """
+    대화 내역 검색 응답을 위한 스키마
+
+    Attributes:
+    - results (list[SearchResultResponse]): 관련도 순 검색 결과
+    - next_offset (int | None): 다음 페이지를 조회할 때 사용할 offset (마지막 페이지이면 None)
+    """
+
+    results: list[SearchResultResponse]
+    next_offset: int | None = None
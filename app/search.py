@@ -0,0 +1,205 @@
+"""
+채팅 전문 검색 (SQLite FTS5 / PostgreSQL tsvector)
+
+chats.question/answer는 압축된 바이너리로 저장되므로 DB가 직접 색인할 수 없어,
+채팅을 저장할 때 평문을 별도의 검색 테이블(chat_search)에 함께 넣어 색인을 유지함.
+
+- SQLite: FTS5 가상 테이블. rowid가 채팅 ID이고, owner 컬럼에 "u<사용자 ID>" 토큰을 넣어
+  사용자 조건도 전문 색인 안에서 교차(intersection)로 처리함. 순위는 bm25.
+- PostgreSQL: 채팅 ID를 기본 키로 하는 일반 테이블. 질문/답변으로 만든 tsvector 생성 컬럼에 GIN 인덱스를 사용하고,
+  순위는 ts_rank_cd.
+
+검색어는 단어 단위로 나누어 모든 단어를 접두사로 포함하는 채팅을 찾음.
+(한국어는 조사가 붙은 형태로 저장되므로 "서울"로 "서울에서"도 찾을 수 있도록 접두사 검색을 사용)
+"""
+
+import html
+import json
+import re
+
+from sqlalchemy import Connection, text
+
+from .compression import decompress_text
+
+SEARCH_TABLE = "chat_search"
+# 검색어에서 사용하는 최대 단어 수
+MAX_SEARCH_TERMS = 8
+# 검색 결과 snippet의 최대 토큰 수
+SNIPPET_TOKENS = 16
+
+# 일치한 부분을 표시하는 임시 문자 (HTML escape 후 <mark>로 바꿈)
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+_ELLIPSIS = "…"
+
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "question, answer, owner, session_id UNINDEXED)",
+    # owner 컬럼은 사용자 조건에만 사용하므로 순위 계산에서 제외
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) "
+    "VALUES ('rank', 'bm25(1.0, 1.0, 0.0, 0.0)')",
+]
+_POSTGRESQL_DDL = [
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+    "chat_id INTEGER PRIMARY KEY REFERENCES chats(id) ON DELETE CASCADE, "
+    "user_id INTEGER NOT NULL, session_id INTEGER NOT NULL, "
+    "question TEXT NOT NULL, answer TEXT NOT NULL, "
+    "document tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', question), 'A') || "
+    "setweight(to_tsvector('simple', answer), 'B')) STORED)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document "
+    f"ON {SEARCH_TABLE} USING gin (document)",
+]
+
+_SQLITE_INSERT = text(
+    f"INSERT INTO {SEARCH_TABLE} (rowid, question, answer, owner, session_id) "
+    "VALUES (:chat_id, :question, :answer, 'u' || :user_id, :session_id)"
+)
+_POSTGRESQL_INSERT = text(
+    f"INSERT INTO {SEARCH_TABLE} (chat_id, user_id, session_id, question, answer) "
+    "VALUES (:chat_id, :user_id, :session_id, :question, :answer) "
+    "ON CONFLICT (chat_id) DO NOTHING"
+)
+
+_SQLITE_SEARCH = text(
+    f"SELECT rowid AS chat_id, session_id, "
+    f"snippet({SEARCH_TABLE}, 0, :mark_start, :mark_end, :ellipsis, :tokens) "
+    "AS question, "
+    f"snippet({SEARCH_TABLE}, 1, :mark_start, :mark_end, :ellipsis, :tokens) "
+    "AS answer "
+    f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :query "
+    "ORDER BY rank LIMIT :limit OFFSET :offset"
+)
+# 순위를 매긴 뒤 현재 페이지의 행에 대해서만 ts_headline을 계산
+_POSTGRESQL_SEARCH = text(
+    "SELECT page.chat_id, page.session_id, "
+    "ts_headline('simple', page.question, page.query, :headline) AS question, "
+    "ts_headline('simple', page.answer, page.query, :headline) AS answer "
+    "FROM (SELECT chat_id, session_id, question, answer, query, "
+    "ts_rank_cd(document, query) AS rank "
+    f"FROM {SEARCH_TABLE}, to_tsquery('simple', :query) AS query "
+    "WHERE user_id = :user_id AND document @@ query "
+    "ORDER BY rank DESC, chat_id DESC LIMIT :limit OFFSET :offset) AS page "
+    "ORDER BY page.rank DESC, page.chat_id DESC"
+)
+
+
+def is_supported(dialect: str) -> bool:
+    """검색 색인을 지원하는 DB인지 여부"""
+    return dialect in ("sqlite", "postgresql")
+
+
+def search_terms(query: str) -> list[str]:
+    """검색어를 단어 목록으로 나누기 (따옴표, 연산자 등 단어가 아닌 문자는 버림)"""
+    return re.findall(r"\w+", query)[:MAX_SEARCH_TERMS]
+
+
+def indexed_question(question: str | None, prompt_params: str | None) -> str:
+    """
+    색인에 넣을 질문 문장
+
+    템플릿 prompt(자기소개 요청)는 문장 대부분이 모든 세션에서 같으므로 파라미터 값(연도, 지역, 인물)만 색인함.
+    """
+    if prompt_params is not None and question is None:
+        return " ".join(str(value) for value in json.loads(prompt_params).values())
+    return question or ""
+
+
+def insert_statement(dialect: str):
+    """
+    검색 테이블에 채팅을 추가하는 문장
+
+    파라미터: chat_id, user_id, session_id, question, answer
+    """
+    return _SQLITE_INSERT if dialect == "sqlite" else _POSTGRESQL_INSERT
+
+
+def search_statement(dialect: str, user_id: int, terms: list[str]):
+    """
+    사용자의 채팅에서 모든 단어를 포함하는 채팅을 순위 순으로 찾는 문장과 검색어 파라미터
+
+    결과 행: chat_id, session_id, question(snippet), answer(snippet)
+    나머지 파라미터(limit, offset)는 호출하는 쪽에서 채움.
+    """
+    if dialect == "sqlite":
+        words = " AND ".join(f'"{term}"*' for term in terms)
+        return _SQLITE_SEARCH, {
+            "query": f'owner : "u{user_id}" AND {{question answer}} : ({words})',
+            "mark_start": _MARK_START,
+            "mark_end": _MARK_END,
+            "ellipsis": _ELLIPSIS,
+            "tokens": SNIPPET_TOKENS,
+        }
+    return _POSTGRESQL_SEARCH, {
+        "query": " & ".join(f"{term}:*" for term in terms),
+        "user_id": user_id,
+        "headline": (
+            f"StartSel={_MARK_START}, StopSel={_MARK_END}, "
+            f"MaxWords={SNIPPET_TOKENS}, MinWords={SNIPPET_TOKENS // 2}"
+        ),
+    }
+
+
+def format_snippet(snippet: str | None) -> str:
+    """snippet을 HTML escape 하고, 일치한 부분을 <mark>로 감싸기"""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def _decompress(value: bytes | str | None) -> str | None:
+    return None if value is None else decompress_text(value)
+
+
+def create_search_index(conn: Connection, batch_size: int = 500):
+    """
+    검색 테이블을 만들고 기존 채팅을 모두 색인하기 (마이그레이션용)
+
+    채팅 ID 순서로 batch_size개씩 읽어 넣으므로 채팅 수와 관계없이 메모리 사용량이 일정함.
+    이미 색인된 채팅이 있으면 그 이후부터 이어서 색인함.
+    """
+    dialect = conn.dialect.name
+    if not is_supported(dialect):
+        return
+    if dialect == "sqlite":
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+            {"name": SEARCH_TABLE},
+        ).scalar()
+        ddl = [] if exists else _SQLITE_DDL
+        last_indexed = f"SELECT max(rowid) FROM {SEARCH_TABLE}"
+    else:
+        ddl = _POSTGRESQL_DDL
+        last_indexed = f"SELECT max(chat_id) FROM {SEARCH_TABLE}"
+    for statement in ddl:
+        conn.execute(text(statement))
+
+    last_chat_id = conn.execute(text(last_indexed)).scalar() or 0
+    insert = insert_statement(dialect)
+    while True:
+        chats = conn.execute(
+            text(
+                "SELECT chats.id, chats.session_id, sessions.user_id, "
+                "chats.question, chats.answer, chats.prompt_params "
+                "FROM chats JOIN sessions ON sessions.id = chats.session_id "
+                "WHERE chats.id > :last ORDER BY chats.id LIMIT :limit"
+            ),
+            {"last": last_chat_id, "limit": batch_size},
+        ).all()
+        if not chats:
+            return
+        last_chat_id = chats[-1].id
+        conn.execute(
+            insert,
+            [
+                {
+                    "chat_id": chat.id,
+                    "user_id": chat.user_id,
+                    "session_id": chat.session_id,
+                    "question": indexed_question(
+                        _decompress(chat.question), chat.prompt_params
+                    ),
+                    "answer": _decompress(chat.answer) or "",
+                }
+                for chat in chats
+            ],
+        )
@@ -0,0 +1,75 @@
+"""
+여러 워커 프로세스로 앱 실행하기 (운영 배포용)
+
+실행 방법:
+    python -m app.serve --workers 4 --host 0.0.0.0 --port 8000
+
+[작동 방식]
+1. 워커를 띄우기 전에 이 프로세스에서 스키마 마이그레이션을 한 번만 실행함.
+   (워커마다 실행하면 부팅이 느려지고, 여러 워커가 동시에 스키마를 바꾸려다 충돌할 수 있음)
+2. 워커에는 DB_MIGRATE_ON_STARTUP=0을 전달하므로 워커는 부팅할 때 DB에 접근하지 않음.
+3. 워커는 uvicorn이 새 프로세스(spawn)로 시작하며, DB 엔진과 연결 풀은 각 워커 안에서 처음 사용할 때 만들어짐.
+   (fork 방식의 서버(gunicorn --preload 등)로 띄워도 app/database.py의 ProcessLocalEngine이 워커마다 새 엔진을 만듦)
+
+다음 메모리 상태는 워커마다 따로 유지됨.
+- 대화 내역 캐시(history_cache): 사용할 때마다 sessions.message_count와 비교하여, 다른 워커가 저장한 채팅이 있으면 DB에서 다시 읽음.
+- 토큰 캐시(token_cache): 검증된 토큰은 워커마다 최대 TOKEN_CACHE_TTL_SECONDS 동안 DB 조회 없이 인정되므로,
+  이 값이 토큰 폐기/사용자 삭제가 모든 워커에 반영되는 시간의 상한.
+- 자기소개 생성 중복 제거(introduction_flights): 상위 LLM 호출은 워커마다 일어날 수 있지만,
+  저장은 AsyncORM.create_introduction이 세션마다 하나만 성공시킴.
+- 답변 캐시와 자기소개 캐시의 메모리 계층, 세션별 답변 캐시 사용 설정
+- 동시 실행 제한(ADMISSION_*), 상위 LLM 회로 차단기, 측정값(/metrics)
+"""
+
+import argparse
+import asyncio
+import os
+
+import uvicorn
+
+from .config import LOG_LEVEL
+
+
+async def _migrate():
+    from .database import database
+    from .migrations import get_current_version, run_migrations
+
+    applied = await run_migrations()
+    for migration in applied:
+        print(f"applied {migration.version}: {migration.description}")
+    print(f"schema version: {await get_current_version()}")
+    # 이 프로세스의 연결은 워커가 물려받지 않도록 워커를 띄우기 전에 닫음
+    await database.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 워커 프로세스로 앱 실행")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        help="워커 프로세스 수 (기본: WEB_CONCURRENCY 또는 CPU 수)",
+    )
+    parser.add_argument(
+        "--skip-migrations",
+        action="store_true",
+        help="마이그레이션을 실행하지 않음 (배포 파이프라인에서 따로 실행한 경우)",
+    )
+    args = parser.parse_args()
+
+    if not args.skip_migrations:
+        asyncio.run(_migrate())
+    os.environ["DB_MIGRATE_ON_STARTUP"] = "0"
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=LOG_LEVEL.lower(),
+    )
+
+
+if __name__ == "__main__":
+    main()
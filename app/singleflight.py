@@ -0,0 +1,41 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    같은 key에 대한 동시 작업을 하나로 합치는 클래스
+
+    [작동 방식]
+    1. key에 진행 중인 작업이 없으면 fn()을 별도 Task로 시작하고 key에 등록.
+    2. 진행 중인 작업이 있으면 새로 시작하지 않고 같은 Task의 결과를 함께 기다림.
+    3. 작업이 끝나면 성공/실패와 관계없이 key를 해제하므로, 실패한 경우 다음 호출이 다시 시도함.
+       (실패 시에는 기다리던 모든 호출에 같은 예외가 전달됨)
+
+    Task는 asyncio.shield로 보호되므로, 먼저 호출한 요청이 취소되어도 다른 요청을 위한 작업은 계속 진행됨.
+    """
+
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key):
+        return key in self._tasks
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """key에 대한 작업을 한 번만 실행하고, 동시에 호출한 모두에게 같은 결과를 반환"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # 기다리는 호출이 모두 취소된 경우에도 "exception was never retrieved" 경고가 나지 않도록 확인
+        if not task.cancelled():
+            task.exception()
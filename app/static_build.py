@@ -0,0 +1,197 @@
+"""
+정적 파일 빌드 (파일 이름 fingerprint + gzip/brotli 미리 압축)
+
+실행 방법:
+    python -m app.static_build    # STATIC_SOURCE_DIR -> STATIC_BUILD_DIR
+
+[작동 방식]
+1. HTML이 아닌 파일(CSS, JS, 이미지)은 내용의 해시를 이름에 붙여 저장함. (css/chat.css -> css/chat.1a2b3c4d5e6f.css)
+   내용이 바뀌면 이름도 바뀌므로 브라우저가 기간 제한 없이(immutable) 캐시해도 됨.
+2. STATIC_IMAGE_RECOMPRESS_MIN_BYTES 이상인 이미지는 최대 너비 STATIC_IMAGE_MAX_WIDTH로 줄여 WebP로 다시 압축함.
+3. CSS의 url(...)과 HTML의 src/href가 가리키는 파일을 fingerprint 된 이름으로 바꿈.
+   HTML은 주소가 바뀌면 안 되므로 이름을 그대로 두고, 서버가 ETag로 재검증하게 함.
+4. 텍스트 파일은 .gz(gzip)와 .br(brotli)로 미리 압축해 두어, 요청마다 압축하지 않고 그대로 보냄.
+5. 원래 경로 -> fingerprint 된 경로 목록을 manifest.json에 저장함.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+import brotli
+from PIL import Image
+
+from .config import (
+    STATIC_BUILD_DIR,
+    STATIC_IMAGE_MAX_WIDTH,
+    STATIC_IMAGE_QUALITY,
+    STATIC_IMAGE_RECOMPRESS_MIN_BYTES,
+    STATIC_SOURCE_DIR,
+)
+from .static_files import MANIFEST_NAME
+
+# 미리 압축할 텍스트 파일 확장자
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".json", ".svg", ".txt")
+# 다시 압축할 이미지 확장자
+RECOMPRESSIBLE_IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg")
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_HTML_REFERENCE = re.compile(r"""\b(src|href)=(["'])([^"']+)\2""")
+
+
+def _fingerprint(path: str, data: bytes) -> str:
+    root, suffix = posixpath.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:12]}{suffix}"
+
+
+def _recompress_image(data: bytes) -> bytes | None:
+    """이미지를 줄여 WebP로 다시 압축하기 (더 작아지지 않으면 None)"""
+    with Image.open(io.BytesIO(data)) as image:
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        if image.width > STATIC_IMAGE_MAX_WIDTH:
+            height = round(image.height * STATIC_IMAGE_MAX_WIDTH / image.width)
+            image = image.resize((STATIC_IMAGE_MAX_WIDTH, height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, "WEBP", quality=STATIC_IMAGE_QUALITY, method=6)
+    recompressed = output.getvalue()
+    return recompressed if len(recompressed) < len(data) else None
+
+
+def _resolve(reference: str, from_path: str) -> str | None:
+    """파일 안의 상대 경로를 빌드 디렉터리 기준 경로로 바꾸기 (외부 주소, 절대 경로, data: 등은 None)"""
+    if re.match(r"^([a-z][a-z0-9+.-]*:|/|#)", reference, re.IGNORECASE):
+        return None
+    reference = reference.split("#", 1)[0].split("?", 1)[0]
+    if not reference:
+        return None
+    return posixpath.normpath(posixpath.join(posixpath.dirname(from_path), reference))
+
+
+def _rewrite(
+    path: str, text: str, pattern: re.Pattern, group: int, manifest: dict[str, str]
+) -> str:
+    def _replace(match: re.Match) -> str:
+        target = _resolve(match.group(group), path)
+        if target not in manifest:
+            return match.group(0)
+        relative = posixpath.relpath(manifest[target], posixpath.dirname(path) or ".")
+        start, end = match.span(group)
+        offset = match.start(0)
+        whole = match.group(0)
+        return whole[: start - offset] + relative + whole[end - offset :]
+
+    return pattern.sub(_replace, text)
+
+
+def _write(build_dir: str, path: str, data: bytes) -> dict:
+    """파일과 (더 작아지는 경우) .gz/.br 압축본 저장하기, 저장한 크기 반환"""
+    target = os.path.join(build_dir, *path.split("/"))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as file:
+        file.write(data)
+    sizes = {"identity": len(data)}
+    if path.endswith(COMPRESSIBLE_SUFFIXES):
+        for encoding, suffix, compressed in (
+            ("gzip", ".gz", gzip.compress(data, compresslevel=9, mtime=0)),
+            ("br", ".br", brotli.compress(data, quality=11)),
+        ):
+            if len(compressed) < len(data):
+                with open(target + suffix, "wb") as file:
+                    file.write(compressed)
+                sizes[encoding] = len(compressed)
+    return sizes
+
+
+def build_static(
+    source_dir: str = STATIC_SOURCE_DIR, build_dir: str = STATIC_BUILD_DIR
+) -> dict[str, dict]:
+    """
+    정적 파일을 빌드하기 (기존 빌드 결과는 새 결과로 교체)
+
+    Args:
+        source_dir (str): 원본 정적 파일 디렉터리
+        build_dir (str): 빌드 결과를 저장할 디렉터리
+
+    Returns:
+        dict[str, dict]: 원래 경로 -> {"path": 저장한 경로, "source": 원본 크기, "identity"/"gzip"/"br": 저장한 크기}
+    """
+    sources: dict[str, bytes] = {}
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            full_path = os.path.join(root, name)
+            path = os.path.relpath(full_path, source_dir).replace(os.sep, "/")
+            with open(full_path, "rb") as file:
+                sources[path] = file.read()
+
+    # 다른 파일을 참조할 수 있는 CSS는 이미지 다음에, HTML은 모든 파일 다음에 처리
+    def _order(path: str) -> int:
+        if path.endswith(".html"):
+            return 2
+        return 1 if path.endswith(".css") else 0
+
+    staging_dir = build_dir.rstrip("/\\") + ".tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    manifest: dict[str, str] = {}
+    report: dict[str, dict] = {}
+    for path in sorted(sources, key=lambda path: (_order(path), path)):
+        data = sources[path]
+        output_path = path
+        if path.endswith(".css"):
+            text = _rewrite(path, data.decode("utf-8"), _CSS_URL, 2, manifest)
+            data = text.encode("utf-8")
+        elif path.endswith(".html"):
+            text = _rewrite(path, data.decode("utf-8"), _HTML_REFERENCE, 3, manifest)
+            data = text.encode("utf-8")
+        elif (
+            path.lower().endswith(RECOMPRESSIBLE_IMAGE_SUFFIXES)
+            and len(data) >= STATIC_IMAGE_RECOMPRESS_MIN_BYTES
+        ):
+            recompressed = _recompress_image(data)
+            if recompressed is not None:
+                data = recompressed
+                output_path = posixpath.splitext(path)[0] + ".webp"
+        if not path.endswith(".html"):
+            output_path = _fingerprint(output_path, data)
+            manifest[path] = output_path
+        report[path] = {
+            "path": output_path,
+            "source": len(sources[path]),
+            **_write(staging_dir, output_path, data),
+        }
+
+    with open(os.path.join(staging_dir, MANIFEST_NAME), "w", encoding="utf-8") as file:
+        json.dump({"assets": manifest}, file, indent=2, sort_keys=True)
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(os.path.dirname(os.path.abspath(build_dir)), exist_ok=True)
+    os.replace(staging_dir, build_dir)
+    return report
+
+
+def _main() -> int:
+    report = build_static()
+    total = {"source": 0, "identity": 0, "gzip": 0, "br": 0}
+    print(f"{'file':<40} {'source':>10} {'built':>10} {'gzip':>8} {'br':>8}")
+    for entry in report.values():
+        for key in total:
+            total[key] += entry.get(key, entry["identity"])
+        print(
+            f"{entry['path']:<40} {entry['source']:>10} {entry['identity']:>10} "
+            f"{entry.get('gzip', '-'):>8} {entry.get('br', '-'):>8}"
+        )
+    print(
+        f"{'total':<40} {total['source']:>10} {total['identity']:>10} "
+        f"{total['gzip']:>8} {total['br']:>8}"
+    )
+    print(f"built {len(report)} files into {STATIC_BUILD_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
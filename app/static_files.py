@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import stat
+from dataclasses import dataclass, field
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from .config import STATIC_BUILD_DIR, STATIC_SOURCE_DIR
+
+# 빌드 결과 디렉터리에 저장하는 원래 경로 -> fingerprint 된 경로 목록
+MANIFEST_NAME = "manifest.json"
+# fingerprint 된 파일 (내용이 바뀌면 주소도 바뀜)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# HTML 등 주소가 고정된 파일 (매번 ETag로 재검증)
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# 선호하는 순서대로 (Content-Encoding, 미리 압축한 파일 확장자)
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@dataclass
+class _Asset:
+    """정적 파일 하나와 미리 압축한 변형들"""
+
+    file_path: str
+    media_type: str
+    etag: str
+    immutable: bool
+    # 파일이 바뀌었는지 확인하기 위한 (mtime_ns, size)
+    signature: tuple[int, int]
+    # Content-Encoding -> 미리 압축한 파일 경로
+    variants: dict[str, str] = field(default_factory=dict)
+
+
+def _signature(stat: os.stat_result) -> tuple[int, int]:
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_asset(
+    file_path: str, stored_path: str, immutable: bool, file_stat: os.stat_result
+) -> _Asset:
+    """파일을 읽어 해시를 계산하고 미리 압축한 변형 찾기 (파일 I/O를 하므로 이벤트 루프 밖에서 실행)"""
+    with open(file_path, "rb") as file:
+        digest = hashlib.sha256(file.read()).hexdigest()[:20]
+    return _Asset(
+        file_path=file_path,
+        media_type=mimetypes.guess_type(stored_path)[0] or "application/octet-stream",
+        etag=digest,
+        immutable=immutable,
+        signature=_signature(file_stat),
+        variants={
+            encoding: file_path + suffix
+            for encoding, suffix in _ENCODINGS
+            if os.path.isfile(file_path + suffix)
+        },
+    )
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Accept-Encoding 헤더에서 q=0이 아닌 인코딩 목록 구하기"""
+    accepted, rejected = set(), set()
+    wildcard = False
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        target = accepted if quality > 0 else rejected
+        if name == "*":
+            wildcard = quality > 0
+        elif name:
+            target.add(name)
+    if wildcard:
+        accepted.update(encoding for encoding, _ in _ENCODINGS)
+    return accepted - rejected
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in tags
+
+
+class StaticAssets:
+    """
+    빌드된 정적 파일을 제공하는 ASGI 앱 (/static에 mount)
+
+    [작동 방식]
+    1. STATIC_BUILD_DIR에 manifest.json이 있으면 빌드 결과를, 없으면 STATIC_SOURCE_DIR의 원본을 그대로 제공.
+    2. Accept-Encoding에 따라 미리 압축한 .br/.gz 파일을 그대로 보냄. (요청마다 압축하지 않음, Vary: Accept-Encoding)
+    3. fingerprint 된 파일은 Cache-Control: immutable로 1년 동안 캐시하게 하고,
+       HTML처럼 주소가 고정된 파일은 no-cache로 매번 재검증하게 함.
+    4. ETag는 파일 내용의 해시(압축 변형마다 다름)이며, If-None-Match가 같으면 본문 없이 304를 반환.
+    5. 원래 경로(css/chat.css)로 요청하면 fingerprint 된 파일의 내용을 no-cache로 제공.
+
+    파일 정보(해시 등)는 처음 요청될 때 계산해 두고, 파일의 수정 시각/크기가 바뀌면 다시 계산함.
+    (파일을 읽고 해시를 계산하는 작업은 이벤트 루프를 막지 않도록 별도 thread에서 실행)
+    """
+
+    def __init__(
+        self, build_dir: str = STATIC_BUILD_DIR, source_dir: str = STATIC_SOURCE_DIR
+    ):
+        manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as file:
+                self.manifest: dict[str, str] = json.load(file)["assets"]
+            self.directory = build_dir
+        else:
+            self.manifest = {}
+            self.directory = source_dir
+        self._fingerprinted = set(self.manifest.values())
+        self._assets: dict[str, _Asset] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["method"] not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405)
+        else:
+            path = scope["path"].removeprefix(scope.get("root_path", ""))
+            response = await self.response(path, Headers(scope=scope))
+        await response(scope, receive, send)
+
+    async def response(self, path: str, request_headers: Headers) -> Response:
+        """
+        정적 파일 하나에 대한 응답 만들기
+
+        Args:
+            path (str): 정적 파일 디렉터리 기준 경로 (예: "login.html", "css/chat.css")
+            request_headers (Headers): Accept-Encoding, If-None-Match를 확인할 요청 헤더
+
+        Returns:
+            Response: 파일 응답, 304 응답, 또는 파일이 없으면 404 응답
+        """
+        asset = await self._get_asset(path)
+        if asset is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        encoding = None
+        file_path = asset.file_path
+        headers = {
+            "Cache-Control": (
+                IMMUTABLE_CACHE_CONTROL if asset.immutable else REVALIDATE_CACHE_CONTROL
+            )
+        }
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+            accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+            encoding = next(
+                (
+                    name
+                    for name, _ in _ENCODINGS
+                    if name in accepted and name in asset.variants
+                ),
+                None,
+            )
+        if encoding is not None:
+            file_path = asset.variants[encoding]
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = f'"{asset.etag}-{encoding}"'
+        else:
+            headers["ETag"] = f'"{asset.etag}"'
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, headers["ETag"]):
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+        return FileResponse(file_path, media_type=asset.media_type, headers=headers)
+
+    async def _get_asset(self, path: str) -> _Asset | None:
+        path = posixpath.normpath(path.lstrip("/"))
+        if path.startswith("..") or path in (".", MANIFEST_NAME):
+            return None
+        immutable = path in self._fingerprinted
+        stored_path = self.manifest.get(path, path)
+        file_path = os.path.join(self.directory, *stored_path.split("/"))
+        try:
+            file_stat = os.stat(file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not stat.S_ISREG(file_stat.st_mode):
+            return None
+
+        asset = self._assets.get(path)
+        if asset is not None and asset.signature == _signature(file_stat):
+            return asset
+        asset = await asyncio.to_thread(
+            _load_asset, file_path, stored_path, immutable, file_stat
+        )
+        self._assets[path] = asset
+        return asset
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,298 @@
+"""
+대화 내역 내보내기/가져오기 (NDJSON)
+
+한 줄에 JSON 레코드 하나씩, 세션 레코드 다음에 그 세션의 채팅 레코드가 이어지는 형식:
+    {"type": "session", "id": 1, "year": 1800, "location": "Paris", "persona": "artist", ...}
+    {"type": "chat", "id": 1, "session_id": 1, "question": "...", "answer": "...", ...}
+
+내보내기는 서버 측 커서로 채팅을 조금씩 읽어 바로 응답으로 내보내고,
+가져오기는 요청 본문을 한 줄씩 읽으면서 채팅을 일정 개수마다 flush 하고 세션마다 한 트랜잭션으로 저장하므로,
+내역의 크기와 관계없이 메모리 사용량이 일정함.
+"""
+
+import json
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import HTTPException, status
+from pydantic import Field, TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import (
+    TRANSCRIPT_EXPORT_BATCH_ROWS,
+    TRANSCRIPT_IMPORT_BATCH_ROWS,
+    TRANSCRIPT_IMPORT_MAX_LINE_BYTES,
+)
+from .database import AsyncSessionLocal
+from .models import ChatModel, SessionModel
+from .orm import AsyncORM
+from .prompts import INTRODUCTION_PROMPT, RenderedPrompt
+from .schemas import SessionCreate, TranscriptChatRecord, TranscriptSessionRecord
+
+# gzip 형식 (zlib wbits: 16 + 15)
+_GZIP_WBITS = 31
+# gzip 본문을 풀 때 한 번에 만드는 최대 크기 (압축 폭탄으로 메모리가 한꺼번에 늘어나지 않도록 제한)
+_DECOMPRESS_CHUNK_BYTES = 64 * 1024
+
+_record_adapter = TypeAdapter(
+    Annotated[
+        TranscriptSessionRecord | TranscriptChatRecord, Field(discriminator="type")
+    ]
+)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_line(record: dict) -> bytes:
+    line = json.dumps(record, ensure_ascii=False, default=_json_default) + "\n"
+    return line.encode("utf-8")
+
+
+def _session_record(session: SessionModel) -> dict:
+    return {
+        "type": "session",
+        "id": session.id,
+        "year": session.year,
+        "location": session.location,
+        "persona": session.persona,
+        "use_completion_cache": session.use_completion_cache,
+        "created_at": session.created_at,
+    }
+
+
+def _chat_record(chat: ChatModel) -> dict:
+    return {
+        "type": "chat",
+        "id": chat.id,
+        "session_id": chat.session_id,
+        "question": chat.question,
+        "answer": chat.answer,
+        "created_at": chat.created_at,
+    }
+
+
+async def _gzip_chunks(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, _GZIP_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def _export_chunks(
+    user_id: int, session_ids: list[int] | None, batch_size: int
+) -> AsyncIterator[bytes]:
+    # 응답을 스트리밍하는 동안에는 요청 DB 세션이 이미 닫혀 있으므로 별도의 세션을 사용
+    async with AsyncSessionLocal() as db:
+        orm = AsyncORM(db)
+        if session_ids is None:
+            session_ids = await orm.get_session_ids_by_user(user_id)
+        for session_id in session_ids:
+            session = await orm.get_session_by_id(session_id)
+            if session is None or session.user_id != user_id:
+                continue
+            yield _ndjson_line(_session_record(session))
+            async for chats in orm.iter_chats_by_session(session_id, batch_size):
+                yield b"".join(_ndjson_line(_chat_record(chat)) for chat in chats)
+            # 다음 세션으로 넘어가기 전에 이미 읽은 객체를 세션에서 떼어 내 메모리에 쌓이지 않도록 함
+            db.expunge_all()
+
+
+def export_transcripts(
+    user_id: int,
+    session_ids: list[int] | None = None,
+    compress: bool = False,
+    batch_size: int = TRANSCRIPT_EXPORT_BATCH_ROWS,
+) -> AsyncIterator[bytes]:
+    """
+    사용자의 대화 내역을 NDJSON 조각으로 내보내기
+
+    Args:
+        user_id (int): 대화 내역을 소유한 사용자 ID (다른 사용자의 세션은 건너뜀)
+        session_ids (list[int] | None): 내보낼 세션 ID 목록 (None이면 사용자의 모든 세션을 오래된 순서로)
+        compress (bool): gzip으로 압축할지 여부
+        batch_size (int): DB에서 한 번에 읽을 채팅 수
+
+    Returns:
+        AsyncIterator[bytes]: StreamingResponse에 그대로 넘길 수 있는 응답 본문 조각
+    """
+    chunks = _export_chunks(user_id, session_ids, batch_size)
+    return _gzip_chunks(chunks) if compress else chunks
+
+
+async def _gunzip_chunks(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(_GZIP_WBITS)
+    try:
+        async for chunk in chunks:
+            data = chunk
+            while data:
+                decompressed = decompressor.decompress(data, _DECOMPRESS_CHUNK_BYTES)
+                if decompressed:
+                    yield decompressed
+                data = decompressor.unconsumed_tail
+    except zlib.error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip body."
+        )
+    if not decompressor.eof:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Truncated gzip body."
+        )
+
+
+async def _iter_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[bytes]:
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) >= 0:
+            yield bytes(buffer[start:end])
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"A line is longer than {max_line_bytes} bytes.",
+            )
+    if buffer:
+        yield bytes(buffer)
+
+
+@dataclass
+class _ImportedSession:
+    # 가져오는 파일 안의 세션 ID와 새로 만든 세션 ID
+    source_id: int
+    id: int
+    # 아직 첫 채팅을 받지 않은 경우, 첫 채팅의 질문과 비교할 자기소개 prompt
+    introduction_prompt: RenderedPrompt | None
+    # 이 세션에 추가한 채팅 수 (세션과 함께 commit 되기 전까지는 결과에 포함하지 않음)
+    chats: int = 0
+
+
+async def import_transcripts(
+    db: AsyncSession,
+    user_id: int,
+    body: AsyncIterable[bytes],
+    compressed: bool = False,
+    batch_size: int = TRANSCRIPT_IMPORT_BATCH_ROWS,
+    max_line_bytes: int = TRANSCRIPT_IMPORT_MAX_LINE_BYTES,
+) -> dict:
+    """
+    NDJSON 대화 내역을 사용자의 새 세션으로 가져오기
+
+    세션 레코드마다 새 세션을 만들고, 세션과 그 채팅을 하나의 트랜잭션으로 저장함.
+    채팅은 batch_size개씩 flush 하므로 세션의 채팅 수와 관계없이 메모리 사용량이 일정함.
+    채팅 레코드는 자기 세션 레코드 바로 뒤에 이어져야 함. (내보내기 형식과 같음)
+    세션의 첫 채팅이 자기소개 prompt와 같으면 문장 대신 템플릿 참조로 저장함.
+    중간에 잘못된 줄을 만나면 가져오던 세션을 채팅과 함께 rollback 하고 400을 반환하며,
+    그 전에 끝난 세션은 모든 채팅과 함께 저장된 상태로 남음.
+
+    Args:
+        db (AsyncSession): 저장에 사용할 DB 세션
+        user_id (int): 새 세션을 소유할 사용자 ID
+        body (AsyncIterable[bytes]): 요청 본문 조각
+        compressed (bool): 본문이 gzip으로 압축되어 있는지 여부
+
+    Returns:
+        dict: 새로 만든 세션 수(sessions)와 저장한 채팅 수(chats)
+
+    Raises:
+        HTTPException(400): JSON/레코드 형식이 잘못되었거나, 채팅이 자기 세션 레코드 뒤에 이어지지 않은 경우
+        HTTPException(413): 한 줄이 max_line_bytes보다 긴 경우
+    """
+    orm = AsyncORM(db)
+    current: _ImportedSession | None = None
+    rows: list[tuple[int, str, str]] = []
+    counts = {"sessions": 0, "chats": 0}
+
+    def _bad_line(line_number: int, message: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Line {line_number}: {message} "
+                f"({counts['sessions']} sessions with {counts['chats']} chats "
+                "were already imported.)"
+            ),
+        )
+
+    async def _flush():
+        await orm.add_chats(rows)
+        current.chats += len(rows)
+        rows.clear()
+
+    async def _commit_session():
+        """가져오던 세션을 지금까지 받은 채팅과 함께 commit"""
+        if rows:
+            await _flush()
+        await db.commit()
+        counts["sessions"] += 1
+        counts["chats"] += current.chats
+
+    # 처음 사용하는 템플릿은 저장하면서 바로 commit 되므로, 세션을 추가하기 전에 미리 확인
+    await orm.get_prompt_template_id(INTRODUCTION_PROMPT)
+    chunks = _gunzip_chunks(body) if compressed else body
+    line_number = 0
+    try:
+        async for line in _iter_lines(chunks, max_line_bytes):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = _record_adapter.validate_json(line)
+            except ValidationError as error:
+                raise _bad_line(line_number, error.errors()[0]["msg"])
+
+            if isinstance(record, TranscriptSessionRecord):
+                if current is not None:
+                    await _commit_session()
+                new_session = await orm.add_session(
+                    SessionCreate(
+                        year=record.year,
+                        location=record.location,
+                        persona=record.persona,
+                        use_completion_cache=record.use_completion_cache,
+                    ),
+                    user_id,
+                )
+                current = _ImportedSession(
+                    source_id=record.id,
+                    id=new_session.id,
+                    introduction_prompt=INTRODUCTION_PROMPT.render(
+                        year=record.year,
+                        location=record.location,
+                        persona=record.persona,
+                    ),
+                )
+                continue
+
+            if current is None or record.session_id != current.source_id:
+                raise _bad_line(
+                    line_number,
+                    f"chats of session {record.session_id} must follow its session record.",
+                )
+            question = record.question
+            if current.introduction_prompt is not None:
+                if question == current.introduction_prompt:
+                    question = current.introduction_prompt
+                current.introduction_prompt = None
+            rows.append((current.id, question, record.answer))
+            if len(rows) >= batch_size:
+                await _flush()
+
+        if current is not None:
+            await _commit_session()
+    except Exception:
+        # 가져오던 세션과 그 채팅은 저장하지 않음
+        await db.rollback()
+        raise
+    return counts
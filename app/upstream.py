@@ -0,0 +1,434 @@
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+import httpx
+from fastapi import Request, status
+
+from .config import (
+    URL_ENDPOINT,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_READ_TIMEOUT,
+    UPSTREAM_WRITE_TIMEOUT,
+    UPSTREAM_POOL_TIMEOUT,
+    UPSTREAM_MAX_CONNECTIONS,
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+    UPSTREAM_KEEPALIVE_EXPIRY,
+    UPSTREAM_DEADLINE_SECONDS,
+    UPSTREAM_MAX_RETRIES,
+    UPSTREAM_RETRY_BASE_DELAY,
+    UPSTREAM_RETRY_MAX_DELAY,
+    UPSTREAM_HEDGE_ENABLED,
+    UPSTREAM_HEDGE_QUANTILE,
+    UPSTREAM_HEDGE_MIN_SAMPLES,
+    UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+    UPSTREAM_BREAKER_RESET_SECONDS,
+)
+from .metrics import (
+    upstream_request_duration_seconds,
+    upstream_time_to_first_token_seconds,
+    upstream_retries_total,
+    upstream_errors_total,
+    upstream_hedged_requests_total,
+    upstream_circuit_state,
+)
+from .resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    LatencyTracker,
+    backoff_delay,
+)
+
+# 일시적인 문제일 수 있어 재시도하는 상위 서버 응답 코드
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_CIRCUIT_STATE_VALUES = {
+    CircuitBreaker.CLOSED: 0,
+    CircuitBreaker.HALF_OPEN: 1,
+    CircuitBreaker.OPEN: 2,
+}
+
+
+class UpstreamError(Exception):
+    """
+    상위 LLM 호출 실패
+
+    Attributes:
+        status_code (int): 클라이언트에게 반환할 HTTP 상태 코드
+            (502: 상위 서버 오류/잘못된 응답, 503: 상위 서버 과부하/회로 차단, 504: 시간 초과)
+        detail (str): 오류 메시지
+        reason (str): 측정값에 기록할 실패 원인 (timeout, transport, status_503, invalid_response 등)
+        retryable (bool): 같은 요청을 다시 보내면 성공할 수 있는 일시적인 실패인지 여부
+        retry_after (float | None): 다시 시도해도 되는 시점까지 남은 시간 (초)
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        detail: str,
+        reason: str,
+        retryable: bool = False,
+        retry_after: float | None = None,
+    ):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.reason = reason
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _error_for_response(response: httpx.Response) -> UpstreamError:
+    code = response.status_code
+    if code in RETRYABLE_STATUS_CODES:
+        overloaded = code in (429, 503)
+        return UpstreamError(
+            (
+                status.HTTP_503_SERVICE_UNAVAILABLE
+                if overloaded
+                else status.HTTP_502_BAD_GATEWAY
+            ),
+            f"Upstream completion failed with status {code}.",
+            reason=f"status_{code}",
+            retryable=True,
+            retry_after=_parse_retry_after(response),
+        )
+    return UpstreamError(
+        status.HTTP_502_BAD_GATEWAY,
+        f"Upstream completion failed with status {code}.",
+        reason=f"status_{code}",
+    )
+
+
+def _timeout_error() -> UpstreamError:
+    return UpstreamError(
+        status.HTTP_504_GATEWAY_TIMEOUT,
+        "Upstream completion timed out.",
+        reason="timeout",
+        retryable=True,
+    )
+
+
+def _transport_error() -> UpstreamError:
+    return UpstreamError(
+        status.HTTP_502_BAD_GATEWAY,
+        "Could not reach the upstream completion server.",
+        reason="transport",
+        retryable=True,
+    )
+
+
+def _invalid_response_error() -> UpstreamError:
+    return UpstreamError(
+        status.HTTP_502_BAD_GATEWAY,
+        "Upstream completion returned an invalid response.",
+        reason="invalid_response",
+    )
+
+
+class UpstreamClient:
+    """
+    ChatGPT 프록시 서버와 통신하기 위한 비동기 HTTP 클라이언트
+
+    [작동 방식]
+    1. 애플리케이션 lifespan 시작 시 한 번 생성되어 모든 요청이 공유함.
+    2. 내부의 httpx.AsyncClient가 HTTP/1.1 keep-alive 연결 풀을 유지하므로,
+       매 질문마다 TCP/TLS 연결을 새로 맺지 않음.
+    3. 응답을 기다리는 동안 이벤트 루프를 막지 않으므로, 하나의 워커가 여러 대화를 동시에 처리함.
+
+    [실패 처리]
+    1. 호출마다 전체 시간(deadline)을 정하고, 재시도를 포함한 모든 시도는 남은 시간 안에서만 실행. (초과 시 504)
+    2. 연결 오류, 시간 초과, 429/5xx 응답은 full jitter 백오프 후 max_retries번까지 재시도.
+       (답변 생성은 상태를 바꾸지 않으므로 같은 요청을 다시 보내도 안전함)
+    3. hedging을 켜면, 응답이 최근 p95보다 늦을 때 같은 요청을 한 번 더 보내 먼저 온 답변을 사용.
+    4. 연속으로 실패하면 회로 차단기가 열려 일정 시간 동안 호출하지 않고 바로 503을 반환.
+    모든 실패는 UpstreamError(502/503/504)로 변환되어 호출한 쪽에 전달됨.
+    """
+
+    def __init__(
+        self,
+        url_endpoint: str = URL_ENDPOINT,
+        client: httpx.AsyncClient | None = None,
+        deadline_seconds: float = UPSTREAM_DEADLINE_SECONDS,
+        max_retries: int = UPSTREAM_MAX_RETRIES,
+        hedge_enabled: bool = UPSTREAM_HEDGE_ENABLED,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.url_endpoint = url_endpoint
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.hedge_enabled = hedge_enabled
+        self.latency = LatencyTracker()
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+            reset_seconds=UPSTREAM_BREAKER_RESET_SECONDS,
+            on_state_change=lambda state: upstream_circuit_state.set(
+                _CIRCUIT_STATE_VALUES[state]
+            ),
+        )
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=UPSTREAM_CONNECT_TIMEOUT,
+                read=UPSTREAM_READ_TIMEOUT,
+                write=UPSTREAM_WRITE_TIMEOUT,
+                pool=UPSTREAM_POOL_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    def _check_circuit(self) -> int:
+        try:
+            return self.breaker.before_call()
+        except CircuitOpenError as error:
+            upstream_errors_total.inc(reason="circuit_open")
+            raise UpstreamError(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Upstream completion is temporarily unavailable.",
+                reason="circuit_open",
+                retry_after=error.retry_after,
+            )
+
+    async def _retry_delay(
+        self, error: UpstreamError, attempt: int, deadline: Deadline
+    ):
+        """재시도 전에 기다리기 (재시도할 수 없거나 남은 시간이 부족하면 error를 그대로 발생)"""
+        if not error.retryable or attempt >= self.max_retries:
+            raise error
+        delay = backoff_delay(
+            attempt, UPSTREAM_RETRY_BASE_DELAY, UPSTREAM_RETRY_MAX_DELAY
+        )
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        if delay >= deadline.remaining():
+            raise error
+        upstream_retries_total.inc(reason=error.reason)
+        await asyncio.sleep(delay)
+
+    async def _complete_once(self, messages: list[dict], deadline: Deadline) -> str:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise _timeout_error()
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self._client.post(url=self.url_endpoint, json=messages), remaining
+            )
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            raise _timeout_error()
+        except httpx.TransportError:
+            raise _transport_error()
+        if response.is_error:
+            raise _error_for_response(response)
+        try:
+            answer = response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise _invalid_response_error()
+        self.latency.add(time.perf_counter() - started)
+        return answer
+
+    def _hedge_delay(self) -> float | None:
+        if not self.hedge_enabled or len(self.latency) < UPSTREAM_HEDGE_MIN_SAMPLES:
+            return None
+        return self.latency.quantile(UPSTREAM_HEDGE_QUANTILE)
+
+    async def _complete_hedged(self, messages: list[dict], deadline: Deadline) -> str:
+        """
+        요청을 보내고, hedge 지연 시간 안에 답이 없으면 같은 요청을 하나 더 보내 먼저 성공한 답변 사용하기
+        """
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return await self._complete_once(messages, deadline)
+
+        primary = asyncio.ensure_future(self._complete_once(messages, deadline))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(
+                pending, timeout=min(hedge_delay, deadline.remaining())
+            )
+            if done:
+                return primary.result()
+
+            pending.add(asyncio.ensure_future(self._complete_once(messages, deadline)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        upstream_hedged_requests_total.inc(
+                            winner="primary" if task is primary else "hedge"
+                        )
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # 먼저 끝난 쪽의 결과를 사용하고, 아직 진행 중인 나머지 요청은 취소
+            for task in pending:
+                task.cancel()
+
+    async def _run_with_breaker(self, fn: Callable[[], Awaitable]):
+        call_id = self._check_circuit()
+        healthy = None
+        try:
+            result = await fn()
+            healthy = True
+            return result
+        except UpstreamError as error:
+            # 재시도할 수 없는 실패(4xx, 잘못된 응답 형식)는 상위 서버가 살아 있다는 뜻
+            healthy = not error.retryable
+            upstream_errors_total.inc(reason=error.reason)
+            raise
+        finally:
+            self.breaker.after_call(call_id, healthy)
+
+    async def complete(self, messages: list[dict]) -> str:
+        """
+        ChatGPT 형식의 메시지 목록을 전송하고 답변 문자열 받기
+
+        Raises:
+            UpstreamError: 재시도 후에도 실패했거나, 시간이 초과되었거나, 회로 차단기가 열려 있는 경우
+        """
+        deadline = Deadline(self.deadline_seconds)
+
+        async def _with_retries():
+            attempt = 0
+            while True:
+                try:
+                    return await self._complete_hedged(messages, deadline)
+                except UpstreamError as error:
+                    await self._retry_delay(error, attempt, deadline)
+                    attempt += 1
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            answer = await self._run_with_breaker(_with_retries)
+            outcome = "ok"
+            return answer
+        finally:
+            upstream_request_duration_seconds.observe(
+                time.perf_counter() - started, operation="complete", outcome=outcome
+            )
+
+    async def _stream_once(
+        self, messages: list[dict], deadline: Deadline
+    ) -> AsyncIterator[str]:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise _timeout_error()
+        # 첫 응답까지는 남은 시간 안에서만 기다림 (이후 조각 사이의 간격은 read 타임아웃 적용)
+        timeout = httpx.Timeout(
+            connect=min(UPSTREAM_CONNECT_TIMEOUT, remaining),
+            read=min(UPSTREAM_READ_TIMEOUT, remaining),
+            write=min(UPSTREAM_WRITE_TIMEOUT, remaining),
+            pool=min(UPSTREAM_POOL_TIMEOUT, remaining),
+        )
+        try:
+            async with self._client.stream(
+                "POST",
+                self.url_endpoint,
+                json=messages,
+                headers={"Accept": "text/event-stream"},
+                timeout=timeout,
+            ) as response:
+                if response.is_error:
+                    raise _error_for_response(response)
+                content_type = response.headers.get("content-type", "")
+                if not content_type.startswith("text/event-stream"):
+                    body = json.loads(await response.aread())
+                    yield body["choices"][0]["message"]["content"]
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = (
+                        json.loads(data)["choices"][0].get("delta", {}).get("content")
+                    )
+                    if delta:
+                        yield delta
+        except httpx.TimeoutException:
+            raise _timeout_error()
+        except httpx.TransportError:
+            raise _transport_error()
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise _invalid_response_error()
+
+    async def stream(self, messages: list[dict]) -> AsyncIterator[str]:
+        """
+        ChatGPT 형식의 메시지 목록을 전송하고, 답변을 토큰 조각(delta) 단위로 받기
+
+        상위 서버가 text/event-stream으로 응답하면 OpenAI 스트리밍 형식의
+        `data: {...}` 이벤트를 해석하여 조각을 순서대로 yield 함.
+        스트리밍을 지원하지 않아 일반 JSON으로 응답하면 전체 답변을 한 번에 yield 함.
+        첫 조각을 받기 전의 실패만 재시도하며, hedging은 사용하지 않음.
+
+        Raises:
+            UpstreamError: 재시도 후에도 실패했거나, 시간이 초과되었거나, 회로 차단기가 열려 있는 경우
+        """
+        deadline = Deadline(self.deadline_seconds)
+        call_id = self._check_circuit()
+        started = time.perf_counter()
+        first_token = None
+        outcome = "error"
+        healthy = None
+        try:
+            attempt = 0
+            while True:
+                try:
+                    async for delta in self._stream_once(messages, deadline):
+                        if first_token is None:
+                            first_token = time.perf_counter() - started
+                        yield delta
+                    break
+                except UpstreamError as error:
+                    healthy = not error.retryable
+                    if first_token is not None:
+                        upstream_errors_total.inc(reason=error.reason)
+                        raise
+                    try:
+                        await self._retry_delay(error, attempt, deadline)
+                    except UpstreamError:
+                        upstream_errors_total.inc(reason=error.reason)
+                        raise
+                    attempt += 1
+            healthy = True
+            outcome = "ok"
+        finally:
+            self.breaker.after_call(call_id, healthy)
+            upstream_request_duration_seconds.observe(
+                time.perf_counter() - started, operation="stream", outcome=outcome
+            )
+            if first_token is not None:
+                upstream_time_to_first_token_seconds.observe(first_token)
+
+    async def aclose(self):
+        """연결 풀에 남아 있는 모든 연결을 닫기"""
+        await self._client.aclose()
+
+
+def get_upstream_client(request: Request) -> UpstreamClient:
+    """
+    lifespan에서 생성한 공유 UpstreamClient를 반환하는 의존성 주입 함수
+
+    Returns:
+        UpstreamClient: 애플리케이션 전체가 공유하는 상위 LLM 클라이언트
+    """
+    return request.app.state.upstream_client
@@ -0,0 +1,74 @@
+"""
+인증 의존성(get_user_from_token)의 요청당 오버헤드 측정
+
+토큰 캐시를 끈 상태(매 요청 JWT 디코딩 + 사용자 DB 조회)와 켠 상태를 같은 조건에서 비교함.
+
+실행 방법:
+    python -m benchmarks.auth_overhead --iterations 2000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# app 모듈을 import 하기 전에 벤치마크 전용 DB와 키를 지정
+_workdir = tempfile.mkdtemp(prefix="auth-bench-")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/bench.db"
+
+from datetime import timedelta  # noqa: E402
+
+from app import auth  # noqa: E402
+from app.database import AsyncSessionLocal  # noqa: E402
+from app.migrations import run_migrations  # noqa: E402
+from app.models import UserModel  # noqa: E402
+
+
+async def _measure(token: str, iterations: int) -> list[float]:
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await auth.get_user_from_token(token, db)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _summary(label: str, timings: list[float]) -> str:
+    timings = sorted(timings)
+    mean = sum(timings) / len(timings)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return (
+        f"{label:<18} mean={mean * 1e6:8.1f}us  "
+        f"p50={p50 * 1e6:8.1f}us  p99={p99 * 1e6:8.1f}us"
+    )
+
+
+async def main(iterations: int):
+    await run_migrations()
+    async with AsyncSessionLocal() as db:
+        db.add(UserModel(username="bench-user", hashed_password="unused"))
+        await db.commit()
+    token = auth.create_token("bench-user", timedelta(minutes=30))
+
+    max_entries = auth.token_cache.max_entries
+    auth.token_cache.max_entries = 0
+    uncached = await _measure(token, iterations)
+
+    auth.token_cache.max_entries = max_entries
+    auth.token_cache.clear()
+    cached = await _measure(token, iterations)
+
+    print(_summary("before (no cache)", uncached))
+    print(_summary("after (cached)", cached))
+    speedup = (sum(uncached) / len(uncached)) / (sum(cached) / len(cached))
+    print(f"speedup            x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    asyncio.run(main(parser.parse_args().iterations))
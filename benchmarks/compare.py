@@ -0,0 +1,95 @@
+"""
+두 벤치마크 결과(JSON)를 엔드포인트별로 비교
+
+benchmarks.scenario가 저장한 결과 두 개를 받아 처리량과 p50/p95/p99 변화율을 출력함.
+--threshold를 넘는 지연 시간 증가(또는 처리량 감소)가 있으면 종료 코드 1을 반환하므로 CI에서 사용할 수 있음.
+
+실행 방법:
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(before: dict, after: dict, threshold: float) -> list[str]:
+    """
+    두 결과를 비교하여 표를 출력하고, threshold(%)를 넘게 나빠진 항목 목록 반환하기
+
+    지연 시간은 증가, 처리량은 감소를 악화로 판단함.
+    """
+    regressions = []
+    print(
+        f"{'endpoint':<30} {'req/s':>17} "
+        + " ".join(f"{key[:-3]:>21}" for key in LATENCY_KEYS)
+    )
+    rows = [
+        (label, before["endpoints"][label], after["endpoints"][label])
+        for label in after["endpoints"]
+        if label in before["endpoints"]
+    ]
+    rows.append(("TOTAL", before["total"], after["total"]))
+    for label, old, new in rows:
+        cells = []
+        throughput_change = _change(old["throughput_rps"], new["throughput_rps"])
+        cells.append(f"{new['throughput_rps']:>8.1f} ({throughput_change:+6.1f}%)")
+        if -throughput_change > threshold:
+            regressions.append(f"{label} req/s {throughput_change:+.1f}%")
+        for key in LATENCY_KEYS:
+            change = _change(old[key], new[key])
+            cells.append(f"{new[key]:>10.1f}ms ({change:+6.1f}%)")
+            if change > threshold:
+                regressions.append(f"{label} {key[:-3]} {change:+.1f}%")
+        print(f"{label:<30} " + " ".join(cells))
+
+    for label in after["endpoints"].keys() - before["endpoints"].keys():
+        print(f"{label:<30} (new)")
+    for label in before["endpoints"].keys() - after["endpoints"].keys():
+        print(f"{label:<30} (missing)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="이 비율(%%)보다 나빠진 항목이 있으면 실패 (기본: 비교만 하고 실패하지 않음)",
+    )
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as file:
+        before = json.load(file)
+    with open(args.after, encoding="utf-8") as file:
+        after = json.load(file)
+
+    for name, result in (("before", before), ("after", after)):
+        meta = result.get("meta", {})
+        dirty = " (dirty)" if meta.get("dirty") else ""
+        print(
+            f"{name:<7} {meta.get('commit', '?')}{dirty}  {meta.get('timestamp', '')}"
+        )
+    print()
+
+    threshold = float("inf") if args.threshold is None else args.threshold
+    regressions = compare(before, after, threshold)
+    if regressions:
+        print(f"\nregressions over {args.threshold}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
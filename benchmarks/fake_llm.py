@@ -0,0 +1,72 @@
+"""
+벤치마크용 로컬 ChatGPT 프록시 대역 서버 (OpenAI 호환 응답 형식)
+
+실제 상위 서버처럼 ChatGPT 형식의 메시지 목록을 받아 일정 시간 뒤에 답변을 반환함.
+요청의 Accept 헤더가 text/event-stream이면 OpenAI 스트리밍 형식(`data: {...}`)으로 답변을 조각내어 보냄.
+
+환경변수:
+    FAKE_LLM_LATENCY: 첫 응답(스트리밍은 첫 조각)까지의 지연 시간 (초, 기본 0.5)
+    FAKE_LLM_JITTER: 지연 시간에 더해지는 무작위 추가 지연의 최댓값 (초, 기본 0)
+    FAKE_LLM_STREAM: 0이면 스트리밍 요청에도 일반 JSON으로 응답 (기본 1)
+    FAKE_LLM_CHUNKS: 스트리밍 답변의 조각 수 (기본 20)
+    FAKE_LLM_CHUNK_INTERVAL: 스트리밍 조각 사이의 간격 (초, 기본 0.01)
+    FAKE_LLM_ERROR_RATE: 503으로 응답하는 요청의 비율 (0~1, 기본 0)
+    FAKE_LLM_STALL_RATE: 응답이 FAKE_LLM_STALL_SECONDS만큼 멈추는 요청의 비율 (0~1, 기본 0)
+    FAKE_LLM_STALL_SECONDS: 멈춘 요청의 지연 시간 (초, 기본 10)
+
+실행 방법:
+    uvicorn benchmarks.fake_llm:app --port 9100
+"""
+
+import asyncio
+import json
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+JITTER = float(os.getenv("FAKE_LLM_JITTER", "0"))
+STREAM = os.getenv("FAKE_LLM_STREAM", "1") != "0"
+CHUNKS = max(1, int(os.getenv("FAKE_LLM_CHUNKS", "20")))
+CHUNK_INTERVAL = float(os.getenv("FAKE_LLM_CHUNK_INTERVAL", "0.01"))
+ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+STALL_RATE = float(os.getenv("FAKE_LLM_STALL_RATE", "0"))
+STALL_SECONDS = float(os.getenv("FAKE_LLM_STALL_SECONDS", "10"))
+
+app = FastAPI()
+
+
+def _make_answer(messages: list[dict]) -> str:
+    return f"{len(messages)}번째 메시지에 대한 답변이오. 그 시절 이야기를 들려주겠소."
+
+
+def _split(text: str, parts: int) -> list[str]:
+    size = max(1, -(-len(text) // parts))
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+async def _stream(content: str):
+    for index, piece in enumerate(_split(content, CHUNKS)):
+        if index:
+            await asyncio.sleep(CHUNK_INTERVAL)
+        chunk = {"choices": [{"delta": {"content": piece}}]}
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/")
+async def complete(request: Request):
+    messages = await request.json()
+    # 일시적인 장애를 흉내 냄: 일부 요청은 과부하(503)로 거절하고, 일부는 한참 동안 응답하지 않음
+    if random.random() < ERROR_RATE:
+        return JSONResponse({"error": "overloaded"}, status_code=503)
+    delay = LATENCY + random.uniform(0, JITTER)
+    if random.random() < STALL_RATE:
+        delay += STALL_SECONDS
+    await asyncio.sleep(delay)
+    content = _make_answer(messages)
+    if STREAM and "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(_stream(content), media_type="text/event-stream")
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
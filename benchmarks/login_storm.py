@@ -0,0 +1,102 @@
+"""
+로그인 폭주 중 로그인 처리량과 채팅 응답 지연(p50/p99) 측정
+
+비밀번호 해시화를 이벤트 루프에서 직접 하는 경우(PASSWORD_HASH_WORKERS=0)와
+전용 작업 풀에서 하는 경우를 같은 조건에서 비교함.
+
+실행 방법:
+    python -m benchmarks.login_storm --logins 400 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .servers import run_stack
+from .stats import percentile
+
+
+async def _storm(base_url: str, logins: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        users = [f"storm{i:04d}" for i in range(concurrency)]
+        for username in users + ["chatter"]:
+            await client.post(
+                "/signup", json={"username": username, "password": "password"}
+            )
+        response = await client.post(
+            "/login", data={"username": "chatter", "password": "password"}
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post(
+            "/session",
+            json={"year": 1900, "location": "서울", "persona": "신문기자"},
+            headers=headers,
+        )
+        session_id = response.json()["id"]
+        await client.get(f"/introduction/{session_id}", headers=headers)
+
+        login_results = {"ok": 0, "rejected": 0}
+        chat_latencies = []
+        storm_done = asyncio.Event()
+
+        async def login_worker(username: str, count: int):
+            for _ in range(count):
+                response = await client.post(
+                    "/login", data={"username": username, "password": "password"}
+                )
+                login_results["ok" if response.status_code == 200 else "rejected"] += 1
+
+        async def chat_worker():
+            while not storm_done.is_set():
+                started = time.perf_counter()
+                await client.post(
+                    f"/chat/{session_id}",
+                    json={"question": "요즘 소식은?"},
+                    headers=headers,
+                )
+                chat_latencies.append(time.perf_counter() - started)
+
+        chat_task = asyncio.create_task(chat_worker())
+        started = time.perf_counter()
+        per_user = max(1, logins // concurrency)
+        await asyncio.gather(*(login_worker(username, per_user) for username in users))
+        elapsed = time.perf_counter() - started
+        storm_done.set()
+        await chat_task
+
+    return {
+        "logins_per_sec": login_results["ok"] / elapsed,
+        "rejected": login_results["rejected"],
+        "chat_p50_ms": percentile(chat_latencies, 0.50) * 1000,
+        "chat_p99_ms": percentile(chat_latencies, 0.99) * 1000,
+        "chat_samples": len(chat_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    modes = {
+        "inline (before)": {"PASSWORD_HASH_WORKERS": "0"},
+        "pool (after)": {},
+    }
+    llm_env = {"FAKE_LLM_LATENCY": str(args.llm_latency)}
+    for label, app_env in modes.items():
+        with run_stack(app_env, llm_env) as base_url:
+            result = asyncio.run(_storm(base_url, args.logins, args.concurrency))
+        print(
+            f"{label:<16} logins/s={result['logins_per_sec']:7.1f}  "
+            f"rejected={result['rejected']:<4} "
+            f"chat p50={result['chat_p50_ms']:7.1f}ms  "
+            f"p99={result['chat_p99_ms']:7.1f}ms  (n={result['chat_samples']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
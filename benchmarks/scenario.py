@@ -0,0 +1,329 @@
+"""
+사용자 시나리오 부하 테스트
+
+가상 사용자마다 회원가입 -> 로그인 -> 세션 생성 -> 자기소개 -> 채팅 N회 -> 대화 내역/세션 목록 다시 읽기를
+순서대로 실행하고, 엔드포인트별 처리량과 p50/p95/p99 지연 시간을 출력한 뒤 JSON으로 저장함.
+저장한 결과는 benchmarks.compare로 커밋 간에 비교할 수 있음.
+
+기본적으로 로컬 상위 LLM 대역 서버(benchmarks.fake_llm)와 임시 DB로 앱을 직접 띄워서 측정하며,
+--url을 주면 이미 실행 중인 서버를 대상으로 측정함.
+
+실행 방법:
+    python -m benchmarks.scenario --users 50 --turns 5
+    python -m benchmarks.scenario --users 50 --turns 5 --stream --llm-jitter 0.2
+    python -m benchmarks.scenario --app-env CHAT_WRITE_BATCHING=1 --output after.json
+    python -m benchmarks.scenario --llm-error-rate 0.1 --llm-stall-rate 0.02 --app-env UPSTREAM_HEDGE_ENABLED=1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from .servers import ROOT_DIR, run_stack
+from .stats import summarize
+
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+QUESTIONS = [
+    "요즘 가장 큰 소식은 무엇이오?",
+    "평소에 무엇을 먹고 지내시오?",
+    "그 시절 사람들은 어떤 옷을 입었소?",
+    "가장 자랑스러운 일은 무엇이오?",
+    "앞으로의 세상은 어떻게 될 것 같소?",
+]
+
+
+class Recorder:
+    """엔드포인트 이름별로 요청 지연 시간과 오류 수를 기록하는 클래스"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def add(self, label: str, elapsed: float, ok: bool):
+        self.latencies[label].append(elapsed)
+        if not ok:
+            self.errors[label] += 1
+
+    async def request(
+        self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        """요청 하나를 보내고 지연 시간 기록하기 (연결 오류도 오류로 기록하고 None 반환)"""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.add(label, time.perf_counter() - started, ok=False)
+            return None
+        self.add(label, time.perf_counter() - started, ok=response.is_success)
+        return response
+
+    async def stream(
+        self, client: httpx.AsyncClient, label: str, url: str, **kwargs
+    ) -> bool:
+        """SSE 스트리밍 요청을 끝까지 읽고, 첫 조각까지의 시간(ttfb)과 전체 시간을 각각 기록하기"""
+        started = time.perf_counter()
+        first_chunk = None
+        ok = False
+        try:
+            async with client.stream("POST", url, **kwargs) as response:
+                async for line in response.aiter_lines():
+                    if first_chunk is None and line.startswith("data:"):
+                        first_chunk = time.perf_counter() - started
+                    if line == "event: done":
+                        ok = response.is_success
+                    elif line == "event: error":
+                        break
+        except httpx.HTTPError:
+            pass
+        elapsed = time.perf_counter() - started
+        self.add(label, elapsed, ok)
+        self.add(f"{label} (ttfb)", first_chunk or elapsed, ok)
+        return ok
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {
+            label: summarize(latencies, self.errors[label], elapsed)
+            for label, latencies in sorted(self.latencies.items())
+        }
+        all_latencies = [
+            latency
+            for label, latencies in self.latencies.items()
+            if not label.endswith("(ttfb)")
+            for latency in latencies
+        ]
+        total_errors = sum(
+            count
+            for label, count in self.errors.items()
+            if not label.endswith("(ttfb)")
+        )
+        return {
+            "total": summarize(all_latencies, total_errors, elapsed),
+            "endpoints": endpoints,
+        }
+
+
+async def _user_journey(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    turns: int,
+    stream: bool,
+    think_time: float,
+):
+    username = f"bench-{uuid.uuid4().hex[:12]}"
+    credentials = {"username": username, "password": "benchmark-password"}
+    await recorder.request(client, "POST /signup", "POST", "/signup", json=credentials)
+    response = await recorder.request(
+        client, "POST /login", "POST", "/login", data=credentials
+    )
+    if response is None or not response.is_success:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await recorder.request(
+        client,
+        "POST /session",
+        "POST",
+        "/session",
+        json={"year": 1900, "location": "서울", "persona": "신문기자"},
+        headers=headers,
+    )
+    if response is None or not response.is_success:
+        return
+    session_id = response.json()["id"]
+
+    await recorder.request(
+        client,
+        "GET /introduction/{id}",
+        "GET",
+        f"/introduction/{session_id}",
+        headers=headers,
+    )
+    for turn in range(turns):
+        await asyncio.sleep(think_time)
+        question = {"question": QUESTIONS[turn % len(QUESTIONS)]}
+        if stream:
+            await recorder.stream(
+                client,
+                "POST /chat/{id}/stream",
+                f"/chat/{session_id}/stream",
+                json=question,
+                headers=headers,
+            )
+        else:
+            await recorder.request(
+                client,
+                "POST /chat/{id}",
+                "POST",
+                f"/chat/{session_id}",
+                json=question,
+                headers=headers,
+            )
+
+    # 페이지를 새로 고친 사용자처럼 대화 내역과 세션 목록을 다시 읽음
+    await recorder.request(
+        client, "GET /chat/{id}", "GET", f"/chat/{session_id}", headers=headers
+    )
+    await recorder.request(client, "GET /session", "GET", "/session", headers=headers)
+
+
+async def run_scenario(
+    base_url: str,
+    users: int,
+    concurrency: int,
+    turns: int,
+    stream: bool = False,
+    think_time: float = 0.0,
+) -> dict:
+    """
+    가상 사용자 시나리오를 실행하고 결과 요약하기
+
+    Args:
+        base_url (str): 앱 서버 주소
+        users (int): 전체 가상 사용자 수
+        concurrency (int): 동시에 진행하는 사용자 수
+        turns (int): 사용자마다 보내는 채팅 수
+        stream (bool): 채팅을 SSE 스트리밍 엔드포인트로 보낼지 여부
+        think_time (float): 채팅 사이에 쉬는 시간 (초)
+
+    Returns:
+        dict: 전체(total)와 엔드포인트별(endpoints) 처리량/지연 시간 요약, 걸린 시간(elapsed_s)
+    """
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    async def _limited():
+        async with semaphore:
+            await _user_journey(client, recorder, turns, stream, think_time)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=120, limits=limits
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(_limited() for _ in range(users)))
+        elapsed = time.perf_counter() - started
+    return {"elapsed_s": elapsed, **recorder.summary(elapsed)}
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _parse_env(pairs: list[str]) -> dict[str, str]:
+    env = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        env[name] = value
+    return env
+
+
+def print_summary(result: dict):
+    """엔드포인트별 결과를 표로 출력하기"""
+    print(
+        f"{'endpoint':<30} {'reqs':>6} {'err':>5} {'req/s':>8} "
+        f"{'p50':>9} {'p95':>9} {'p99':>9}"
+    )
+    rows = [*result["endpoints"].items(), ("TOTAL", result["total"])]
+    for label, stats in rows:
+        print(
+            f"{label:<30} {stats['requests']:>6} {stats['errors']:>5} "
+            f"{stats['throughput_rps']:>8.1f} {stats['p50_ms']:>7.1f}ms "
+            f"{stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=None, help="기본: --users")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--stream", action="store_true", help="SSE 엔드포인트로 채팅")
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--url", help="이미 실행 중인 앱 서버 주소 (없으면 직접 실행)")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--llm-chunks", type=int, default=20)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-stall-rate", type=float, default=0.0)
+    parser.add_argument("--llm-stall-seconds", type=float, default=10.0)
+    parser.add_argument(
+        "--app-env",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="앱 서버에 추가로 넘길 환경변수 (여러 번 지정 가능)",
+    )
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/)")
+    args = parser.parse_args()
+
+    concurrency = args.concurrency or args.users
+    llm_env = {
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "FAKE_LLM_JITTER": str(args.llm_jitter),
+        "FAKE_LLM_CHUNKS": str(args.llm_chunks),
+        "FAKE_LLM_ERROR_RATE": str(args.llm_error_rate),
+        "FAKE_LLM_STALL_RATE": str(args.llm_stall_rate),
+        "FAKE_LLM_STALL_SECONDS": str(args.llm_stall_seconds),
+    }
+    app_env = _parse_env(args.app_env)
+    scenario = dict(
+        users=args.users,
+        concurrency=concurrency,
+        turns=args.turns,
+        stream=args.stream,
+        think_time=args.think_time,
+    )
+    if args.url:
+        result = asyncio.run(run_scenario(args.url, **scenario))
+    else:
+        with run_stack(app_env, llm_env) as base_url:
+            result = asyncio.run(run_scenario(base_url, **scenario))
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    started_at = datetime.now(timezone.utc)
+    document = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": started_at.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "target": args.url or "local",
+            "scenario": scenario,
+            "llm": llm_env if not args.url else None,
+            "app_env": app_env,
+        },
+        **result,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{started_at:%Y%m%dT%H%M%S}-{commit or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(document, file, ensure_ascii=False, indent=2)
+
+    print_summary(result)
+    print(f"\nelapsed {result['elapsed_s']:.2f}s, saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""벤치마크에서 앱 서버와 상위 LLM 대역 서버를 별도 프로세스로 띄우기 위한 도구"""
+
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    """사용 가능한 로컬 TCP 포트 하나 고르기"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 20.0):
+    """서버가 HTTP 요청에 응답할 때까지 기다리기"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server at {url} did not start in {timeout}s")
+
+
+@contextlib.contextmanager
+def run_server(app_path: str, env: dict[str, str] | None = None) -> Iterator[str]:
+    """
+    uvicorn으로 ASGI 앱을 별도 프로세스에서 실행하고 base URL을 반환
+
+    Args:
+        app_path (str): "모듈:앱" 형식의 uvicorn 앱 경로
+        env (dict): 추가로 설정할 환경변수
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            app_path,
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT_DIR,
+        env={**os.environ, **(env or {})},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(base_url + "/docs")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@contextlib.contextmanager
+def run_stack(
+    app_env: dict[str, str] | None = None, llm_env: dict[str, str] | None = None
+) -> Iterator[str]:
+    """상위 LLM 대역 서버와, 그 서버를 바라보는 앱 서버를 임시 DB로 함께 실행하고 앱 base URL을 반환"""
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        with run_server("benchmarks.fake_llm:app", llm_env) as llm_url:
+            env = {
+                "SECRET_KEY": "benchmark-secret",
+                "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+                "COMPLETION_CACHE_PATH": f"{workdir}/completion_cache.db",
+                "URL_ENDPOINT": llm_url + "/",
+                **(app_env or {}),
+            }
+            with run_server("app.main:app", env) as app_url:
+                yield app_url
@@ -0,0 +1,262 @@
+"""
+앱 시작 시간 측정 (import 시간, 첫 요청에 응답할 때까지의 부팅 시간)
+
+- import: 새 Python 프로세스에서 `import app.main`에 걸린 시간 (-X importtime 기준)과,
+  자체 import 시간이 가장 긴 모듈 목록
+- boot: 프로세스를 시작한 뒤 `GET /`에 처음 200을 받을 때까지의 시간
+    - fresh_db: 빈 DB에서 시작 (시작할 때 모든 마이그레이션 실행)
+    - migrated_db: 이미 마이그레이션된 DB에서 시작 (시작할 때 스키마 버전만 확인)
+    - no_migrate: 이미 마이그레이션된 DB에서 DB_MIGRATE_ON_STARTUP=0으로 시작
+    - serve_workers: python -m app.serve로 여러 워커를 띄움 (--workers가 1보다 클 때)
+
+결과는 JSON으로 저장하며, --baseline으로 이전 결과를 주면 중앙값이 --threshold(%)보다 나빠진 항목이 있을 때 종료 코드 1을 반환함.
+
+실행 방법:
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --runs 10 --workers 4 --baseline before.json --threshold 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from .scenario import RESULTS_DIR, _git
+from .servers import ROOT_DIR, free_port
+
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def _app_env(workdir: str, **extra: str) -> dict[str, str]:
+    return {
+        **os.environ,
+        "SECRET_KEY": "benchmark-secret",
+        "DATABASE_URL": f"sqlite:///{workdir}/startup.db",
+        "COMPLETION_CACHE_PATH": f"{workdir}/completion_cache.db",
+        **extra,
+    }
+
+
+def _summary(samples: list[float]) -> dict:
+    return {
+        "runs": len(samples),
+        "median_ms": statistics.median(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def measure_import(runs: int, top: int) -> dict:
+    """
+    새 프로세스에서 app.main을 import 하는 시간 측정하기
+
+    Returns:
+        dict: 중앙값/최댓값(ms)과, 자체 import 시간 중앙값이 가장 긴 모듈 top개
+    """
+    samples: list[float] = []
+    self_times: dict[str, list[int]] = {}
+    with tempfile.TemporaryDirectory(prefix="startup-") as workdir:
+        for _ in range(runs):
+            completed = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", "import app.main"],
+                cwd=ROOT_DIR,
+                env=_app_env(workdir),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            for line in completed.stderr.splitlines():
+                match = _IMPORT_TIME_LINE.match(line)
+                if match is None:
+                    continue
+                self_us, cumulative_us, indent, module = match.groups()
+                self_times.setdefault(module, []).append(int(self_us))
+                if module == "app.main" and not indent:
+                    samples.append(int(cumulative_us) / 1_000_000)
+    slowest = sorted(
+        (
+            (module, statistics.median(times) / 1000)
+            for module, times in self_times.items()
+        ),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    return {
+        **_summary(samples),
+        "slowest_modules": [
+            {"module": module, "self_ms": self_ms} for module, self_ms in slowest
+        ],
+    }
+
+
+def _boot_once(command: list[str], env: dict[str, str], port: int) -> float:
+    """프로세스를 시작하고 GET /에 처음 200을 받을 때까지의 시간(초)"""
+    url = f"http://127.0.0.1:{port}/"
+    # 요청마다 클라이언트를 만들면 그 비용이 측정값에 섞이므로 미리 만든 클라이언트 하나로 확인
+    client = httpx.Client(timeout=1.0)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{command} exited with {process.returncode}")
+            try:
+                if client.get(url).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"{command} did not answer {url} in 60s")
+    finally:
+        client.close()
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def measure_boot(runs: int, workers: int) -> dict[str, dict]:
+    """
+    시작 방식별로 첫 요청에 응답할 때까지의 시간 측정하기
+
+    Returns:
+        dict[str, dict]: 시작 방식 -> 중앙값/최댓값(ms)
+    """
+    samples: dict[str, list[float]] = {}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory(prefix="startup-") as workdir:
+            port = free_port()
+            uvicorn = [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+            ]
+            samples.setdefault("fresh_db", []).append(
+                _boot_once(uvicorn, _app_env(workdir), port)
+            )
+            samples.setdefault("migrated_db", []).append(
+                _boot_once(uvicorn, _app_env(workdir), port)
+            )
+            samples.setdefault("no_migrate", []).append(
+                _boot_once(uvicorn, _app_env(workdir, DB_MIGRATE_ON_STARTUP="0"), port)
+            )
+            if workers > 1:
+                serve = [
+                    sys.executable,
+                    "-m",
+                    "app.serve",
+                    "--workers",
+                    str(workers),
+                    "--port",
+                    str(port),
+                ]
+                samples.setdefault("serve_workers", []).append(
+                    _boot_once(serve, _app_env(workdir, LOG_LEVEL="WARNING"), port)
+                )
+    return {name: _summary(values) for name, values in samples.items()}
+
+
+def find_regressions(before: dict, after: dict, threshold: float) -> list[str]:
+    """두 결과의 중앙값을 비교하여 threshold(%)를 넘게 느려진 항목 목록 반환하기"""
+    pairs = [("import", before["import"], after["import"])]
+    pairs += [
+        (f"boot.{name}", before["boot"][name], stats)
+        for name, stats in after["boot"].items()
+        if name in before["boot"]
+    ]
+    regressions = []
+    for label, old, new in pairs:
+        change = (
+            (new["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+            if old["median_ms"]
+            else 0.0
+        )
+        print(
+            f"{label:<24} {old['median_ms']:>9.1f}ms -> {new['median_ms']:>9.1f}ms "
+            f"({change:+.1f}%)"
+        )
+        if change > threshold:
+            regressions.append(label)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--workers", type=int, default=2, help="app.serve로 띄울 워커 수 (1이면 생략)"
+    )
+    parser.add_argument("--top", type=int, default=15, help="출력할 느린 모듈 수")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=20.0)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/)")
+    args = parser.parse_args()
+
+    result = {
+        "import": measure_import(args.runs, args.top),
+        "boot": measure_boot(args.runs, args.workers),
+    }
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    started_at = datetime.now(timezone.utc)
+    document = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": started_at.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "runs": args.runs,
+            "workers": args.workers,
+        },
+        **result,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"startup-{started_at:%Y%m%dT%H%M%S}-{commit or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(document, file, ensure_ascii=False, indent=2)
+
+    print(f"{'phase':<24} {'median':>11} {'max':>11}")
+    rows = [("import app.main", result["import"])]
+    rows += [(f"boot {name}", stats) for name, stats in result["boot"].items()]
+    for label, stats in rows:
+        print(f"{label:<24} {stats['median_ms']:>9.1f}ms {stats['max_ms']:>9.1f}ms")
+    print("\nslowest modules (self import time):")
+    for entry in result["import"]["slowest_modules"]:
+        print(f"  {entry['self_ms']:>8.1f}ms  {entry['module']}")
+    print(f"\nsaved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        print()
+        regressions = find_regressions(baseline, result, args.threshold)
+        if regressions:
+            print(f"\nregressed more than {args.threshold}%: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+"""벤치마크 결과 집계용 도구"""
+
+
+def percentile(values: list[float], q: float) -> float:
+    """정렬된 표본에서 q 분위(0~1)에 해당하는 값 (표본이 없으면 0)"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """
+    한 엔드포인트의 지연 시간(초) 표본을 요약하기
+
+    Returns:
+        dict: 요청 수, 오류 수, 처리량(req/s), p50/p95/p99/최댓값 (ms)
+    """
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
@@ -33,10 +33,15 @@ document.addEventListener('DOMContentLoaded', () => {
         if (emptyMessage) chatMessages.removeChild(emptyMessage);
     };
 
-    const addMessage = (message, isUser) => {
+    const createMessage = (message, isUser) => {
         const messageDiv = document.createElement('div');
         messageDiv.className = `message ${isUser ? 'user-message' : 'bot-message'}`;
         messageDiv.textContent = message;
+        return messageDiv;
+    };
+
+    const addMessage = (message, isUser) => {
+        const messageDiv = createMessage(message, isUser);
         chatMessages.appendChild(messageDiv);
         chatMessages.scrollTop = chatMessages.scrollHeight;
     };
@@ -50,6 +55,136 @@ document.addEventListener('DOMContentLoaded', () => {
         return typingIndicator;
     }
 
+    // 도착한 답변 조각을 화면의 답변 메시지에 이어 붙이기 (SSE와 WebSocket이 함께 사용)
+    const createAnswerView = (waitingIndicator) => {
+        let botMessage = null;
+        return {
+            delta(text) {
+                if (!botMessage) {
+                    waitingIndicator.remove();
+                    addMessage('', false);
+                    botMessage = chatMessages.lastChild;
+                }
+                botMessage.textContent += text;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            },
+            done(answer) {
+                if (!botMessage) {
+                    waitingIndicator.remove();
+                    addMessage(answer, false);
+                    botMessage = chatMessages.lastChild;
+                }
+                return botMessage;
+            },
+            fail() {
+                waitingIndicator.remove();
+                if (botMessage) botMessage.remove();
+                botMessage = null;
+                return null;
+            },
+        };
+    };
+
+    // SSE 응답을 읽으면서 도착한 답변 조각을 화면에 바로 이어 붙이기
+    // 성공하면 답변 메시지 요소를, 오류 이벤트를 받으면 null을 반환
+    const readAnswerStream = async (response, view) => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let botMessage = null;
+
+        const handleEvent = (rawEvent) => {
+            let event = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (!data) return true;
+            const payload = JSON.parse(data);
+
+            if (event === 'delta') {
+                view.delta(payload.delta);
+            } else if (event === 'done') {
+                botMessage = view.done(payload.answer);
+            } else if (event === 'error') {
+                console.error(payload.detail);
+                return false;
+            }
+            return true;
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                if (!handleEvent(rawEvent)) return view.fail();
+            }
+        }
+        return botMessage ? botMessage : view.fail();
+    };
+
+    // WebSocket 대화 채널: 한 번 인증한 연결로 질문을 주고받음
+    // 연결되어 있지 않거나 끊기면 SSE 엔드포인트로 전송하고, 다음 질문 전에 다시 연결을 시도
+    let chatSocket = null;
+    let connectingSocket = null;
+    let socketAnswer = null;
+
+    const connectChatSocket = () => {
+        if (!('WebSocket' in window) || chatSocket || connectingSocket) return;
+        const socket = new WebSocket(`ws://127.0.0.1:8000/ws/chat/${sessionId}`);
+        connectingSocket = socket;
+
+        socket.addEventListener('open', () => {
+            socket.send(JSON.stringify({ type: 'auth', token: localStorage.getItem('token') }));
+        });
+        socket.addEventListener('message', (e) => {
+            const payload = JSON.parse(e.data);
+            if (payload.type === 'ready') {
+                connectingSocket = null;
+                chatSocket = socket;
+            } else if (payload.type === 'ping') {
+                socket.send(JSON.stringify({ type: 'pong' }));
+            } else if (socketAnswer) {
+                socketAnswer.handle(payload);
+            }
+        });
+        socket.addEventListener('close', () => {
+            if (connectingSocket === socket) connectingSocket = null;
+            if (chatSocket === socket) chatSocket = null;
+            if (socketAnswer) socketAnswer.fail();
+        });
+    };
+
+    // WebSocket으로 질문을 보내고 done/error 메시지를 받을 때까지 답변 조각을 화면에 이어 붙이기
+    const askOverSocket = (socket, question, view) => new Promise((resolve) => {
+        const finish = (botMessage) => {
+            socketAnswer = null;
+            resolve(botMessage);
+        };
+        socketAnswer = {
+            handle(payload) {
+                if (payload.type === 'delta') {
+                    view.delta(payload.delta);
+                } else if (payload.type === 'done') {
+                    finish(view.done(payload.answer));
+                } else if (payload.type === 'error') {
+                    console.error(payload.detail);
+                    finish(view.fail());
+                }
+            },
+            fail() {
+                finish(view.fail());
+            },
+        };
+        socket.send(JSON.stringify({ type: 'question', question }));
+    });
+
     const sendMessage = async () => {
         const message = chatInput.value.trim();
         if (!message) return;
@@ -64,8 +199,19 @@ document.addEventListener('DOMContentLoaded', () => {
             chatInput.value = '';
 
             const waitingIndicator = createWaitingIndicator();
+            const view = createAnswerView(waitingIndicator);
 
-            const response = await fetchWithToken(`http://127.0.0.1:8000/chat/${sessionId}`, {
+            if (chatSocket) {
+                const botMessage = await askOverSocket(chatSocket, message, view);
+                if (botMessage === null) {
+                    alert('메시지 전송 중 오류가 발생했습니다.\n마지막 질문은 제거하겠습니다.');
+                    chatMessages.removeChild(chatMessages.lastChild);
+                }
+                return;
+            }
+            connectChatSocket();
+
+            const response = await fetchWithToken(`http://127.0.0.1:8000/chat/${sessionId}/stream`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -77,10 +223,11 @@ document.addEventListener('DOMContentLoaded', () => {
             });
 
             if (response.ok) {
-                chatMessages.removeChild(waitingIndicator);
-                const chatList = await response.json();
-                const lastChat = chatList[chatList.length - 1];
-                addMessage(lastChat.answer, false);
+                const botMessage = await readAnswerStream(response, view);
+                if (botMessage === null) {
+                    alert('메시지 전송 중 오류가 발생했습니다.\n마지막 질문은 제거하겠습니다.');
+                    chatMessages.removeChild(chatMessages.lastChild);
+                }
             } else {
                 const data = await response.json();
                 console.error(data.message || `HTTP error status: ${response.status}`);
@@ -121,6 +268,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 const data = await response.json();
                 introMessage.classList.remove('intro-loading');
                 introMessage.textContent = data.answer;
+                // 자기소개가 저장된 뒤에 연결해야 대화 채널의 내역에 자기소개 prompt가 포함됨
+                connectChatSocket();
             } else {
                 const data = await response.json();
                 console.error(data.message || `HTTP error status: ${response.status}`);
@@ -134,32 +283,85 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    const HISTORY_PAGE_SIZE = 30;
+    let oldestChatId = null;
+    let loadOlderBtn = null;
+
+    // 이전 대화를 기존 메시지들 앞에 끼워 넣기 (스크롤 위치 유지)
+    const prependChats = (chatList) => {
+        const anchor = loadOlderBtn ? loadOlderBtn.nextSibling : chatMessages.firstChild;
+        const previousHeight = chatMessages.scrollHeight;
+        chatList.forEach(chat => {
+            chatMessages.insertBefore(createMessage(chat.question, true), anchor);
+            chatMessages.insertBefore(createMessage(chat.answer, false), anchor);
+        });
+        chatMessages.scrollTop += chatMessages.scrollHeight - previousHeight;
+    };
+
+    // 최근 대화부터 한 페이지씩 조회 (한 개를 더 요청해서 더 이전 대화가 있는지 확인)
+    // 세션의 첫 번째 채팅은 자기소개용 prompt이므로 목록의 맨 처음에 도달하면 제외
+    const fetchChatHistoryPage = async () => {
+        const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE + 1 });
+        if (oldestChatId !== null) params.set('before_id', oldestChatId);
+
+        const response = await fetchWithToken(`http://127.0.0.1:8000/chat/${sessionId}?${params}`, {
+            method: 'GET',
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(data.message || `HTTP error status: ${response.status}`);
+        }
+
+        const chatList = await response.json();
+        const hasMore = chatList.length > HISTORY_PAGE_SIZE;
+        const pageChats = chatList.slice(1);
+        if (pageChats.length > 0) oldestChatId = pageChats[0].id;
+        return { pageChats, hasMore };
+    };
+
+    const updateLoadOlderButton = (hasMore) => {
+        if (hasMore && !loadOlderBtn) {
+            loadOlderBtn = document.createElement('button');
+            loadOlderBtn.className = 'load-older-btn';
+            loadOlderBtn.textContent = '이전 대화 더 보기';
+            loadOlderBtn.addEventListener('click', loadOlderChats);
+            chatMessages.insertBefore(loadOlderBtn, chatMessages.firstChild);
+        } else if (!hasMore && loadOlderBtn) {
+            loadOlderBtn.remove();
+            loadOlderBtn = null;
+        }
+    };
+
+    const loadOlderChats = async () => {
+        loadOlderBtn.disabled = true;
+        try {
+            const { pageChats, hasMore } = await fetchChatHistoryPage();
+            prependChats(pageChats);
+            updateLoadOlderButton(hasMore);
+        } catch (error) {
+            console.error('Error:', error);
+            alert('이전 대화 내역 조회에 실패했습니다.');
+        } finally {
+            if (loadOlderBtn) loadOlderBtn.disabled = false;
+        }
+    };
+
     const fetchChatHistory = async () => {
         try {
-            const response = await fetchWithToken(`http://127.0.0.1:8000/chat/${sessionId}`, {
-                method: 'GET',
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
+            const { pageChats, hasMore } = await fetchChatHistoryPage();
+            if (pageChats.length === 0 && !hasMore) createEmptyMessage();
+            else removeEmptyMessage();
+            pageChats.forEach(chat => {
+                addMessage(chat.question, true);
+                addMessage(chat.answer, false)
             });
-
-            if (response.ok) {
-                const chatList = await response.json();
-                if (chatList.length <= 1) createEmptyMessage();
-                else removeEmptyMessage();
-                chatList.slice(1).forEach(chat => {
-                    addMessage(chat.question, true);
-                    addMessage(chat.answer, false)
-                });
-            } else {
-                const data = await response.json();
-                console.error(data.message || `HTTP error status: ${response.status}`);
-                alert('이전 대화 내역 조회에 실패했습니다.\n새로운 대화 세션 생성으로 다시 시작합니다');
-                window.location.href = 'main.html';
-            }
+            updateLoadOlderButton(hasMore);
         } catch (error) {
             console.error('Error:', error);
-            alert('서버 연결 중 오류가 발생했습니다.\n새로운 대화 세션 생성으로 다시 시작합니다.');
+            alert('이전 대화 내역 조회에 실패했습니다.\n새로운 대화 세션 생성으로 다시 시작합니다');
             window.location.href = 'main.html';
         }
     };
@@ -54,9 +54,44 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    const SESSION_PAGE_SIZE = 5;
+    const moreButton = document.createElement('button');
+    moreButton.className = 'session-more-btn';
+    moreButton.textContent = '더 보기';
+    let lastSessionId = null;
+
+    const createSessionButton = (session) => {
+        const button = document.createElement('button');
+        button.className = 'session-button';
+
+        const title = document.createElement('strong');
+        title.textContent = `${session.location}, A.D. ${session.year}년`;
+        const info = document.createElement('div');
+        info.className = 'session-info';
+        info.textContent = `${session.persona} · 대화 ${session.message_count}개`;
+        button.append(title, info);
+
+        if (session.last_answer_preview) {
+            const preview = document.createElement('div');
+            preview.className = 'session-preview';
+            preview.textContent = session.last_answer_preview;
+            button.appendChild(preview);
+        }
+
+        button.addEventListener('click', () => {
+            window.location.href = `http://127.0.0.1:8000/static/chat.html?session_id=${session.id}`;
+        });
+        return button;
+    };
+
+    // 최근 세션부터 한 페이지씩 불러오기 (이전 페이지의 마지막 세션 ID를 before_id로 사용)
     const fetchRecentSessions = async () => {
+        const params = new URLSearchParams({ limit: SESSION_PAGE_SIZE });
+        if (lastSessionId !== null) {
+            params.set('before_id', lastSessionId);
+        }
         try {
-            const response = await fetchWithToken('http://127.0.0.1:8000/session', {
+            const response = await fetchWithToken(`http://127.0.0.1:8000/session?${params}`, {
                 headers: {
                     'Authorization': `Bearer ${token}`
                 }
@@ -64,21 +99,19 @@ document.addEventListener('DOMContentLoaded', () => {
 
             if (response.ok) {
                 const sessions = await response.json();
+                moreButton.remove();
                 if (sessions.length > 0) {
-                    sessionList.innerHTML = '';
+                    if (lastSessionId === null) {
+                        sessionList.innerHTML = '';
+                    }
                     sessions.forEach(session => {
-                        const button = document.createElement('button');
-                        button.className = 'session-button';
-                        button.innerHTML = `
-                        <strong>${session.location}, A.D. ${session.year}년</strong>
-                        <div class="session-info">${session.persona}</div>
-                    `;
-                        button.addEventListener('click', () => {
-                            window.location.href = `http://127.0.0.1:8000/static/chat.html?session_id=${session.id}`;
-                        });
-                        sessionList.appendChild(button);
+                        sessionList.appendChild(createSessionButton(session));
                     });
-                } else {
+                    lastSessionId = sessions[sessions.length - 1].id;
+                    if (sessions.length === SESSION_PAGE_SIZE) {
+                        sessionList.appendChild(moreButton);
+                    }
+                } else if (lastSessionId === null) {
                     const sessionNoneDiv = document.createElement('div');
                     sessionNoneDiv.className = 'session-none';
                     sessionNoneDiv.textContent = '최근 대화 내역이 없습니다.';
@@ -90,6 +123,8 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    moreButton.addEventListener('click', fetchRecentSessions);
+
     fetchRecentSessions();
 
     logoutBtn.addEventListener('click', () => {
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# app.config는 import 시점에 환경변수를 읽으므로, 테스트 모듈이 app을 import 하기 전에 임시 DB를 설정
+_workdir = tempfile.mkdtemp(prefix="time-traveller-test-")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/test.db"
+os.environ["COMPLETION_CACHE_PATH"] = f"{_workdir}/completion_cache.db"
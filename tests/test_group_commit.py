@@ -0,0 +1,146 @@
+import asyncio
+
+from sqlalchemy import delete, func, select
+
+from app.database import AsyncSessionLocal, database
+from app.group_commit import ChatWriteQueue
+from app.migrations import run_migrations
+from app.models import ChatModel, SessionModel
+from app.orm import AsyncORM, SessionNotFoundError
+from app.schemas import SessionCreate, UserCreate
+
+MISSING_SESSION_ID = 999_999
+
+
+async def _create_sessions(username: str, count: int) -> list[int]:
+    await run_migrations()
+    async with AsyncSessionLocal() as db:
+        orm = AsyncORM(db)
+        user = await orm.create_user(UserCreate(username=username, password="secret1"))
+        return [
+            (
+                await orm.create_session(
+                    SessionCreate(year=1900 + i, location="Seoul", persona="p"), user.id
+                )
+            ).id
+            for i in range(count)
+        ]
+
+
+async def _submit(queue: ChatWriteQueue, session_id: int, question: str) -> ChatModel:
+    # 요청마다 DB 세션을 따로 사용 (하나의 AsyncSession은 동시에 사용할 수 없음)
+    async with AsyncSessionLocal() as db:
+        return await queue.submit(AsyncORM(db), session_id, question, "answer")
+
+
+async def _wait_until_pending(queue: ChatWriteQueue, count: int):
+    while queue.stats.pending < count:
+        await asyncio.sleep(0.01)
+
+
+async def _message_counts(session_ids: list[int]) -> dict[int, tuple[int, int]]:
+    """세션 ID -> (sessions.message_count, 실제 채팅 수)"""
+    async with AsyncSessionLocal() as db:
+        counts = {}
+        for session_id in session_ids:
+            session = await db.get(SessionModel, session_id)
+            chats = await db.scalar(
+                select(func.count()).where(ChatModel.session_id == session_id)
+            )
+            counts[session_id] = (session.message_count if session else 0, chats)
+        return counts
+
+
+def test_batches_are_cut_at_max_rows_and_each_request_gets_its_chat():
+    async def scenario():
+        session_ids = await _create_sessions("batch-user", 5)
+        queue = ChatWriteQueue(enabled=True, max_rows=2, max_delay_ms=200)
+        queue.start()
+        chats = await asyncio.gather(
+            *(
+                _submit(queue, session_id, f"question {i}")
+                for i, session_id in enumerate(session_ids)
+            )
+        )
+        await queue.close()
+        counts = await _message_counts(session_ids)
+        await database.dispose()
+        return session_ids, chats, counts, queue.stats
+
+    session_ids, chats, counts, stats = asyncio.run(scenario())
+
+    assert [(chat.session_id, chat.question) for chat in chats] == [
+        (session_id, f"question {i}") for i, session_id in enumerate(session_ids)
+    ]
+    assert len({chat.id for chat in chats}) == len(chats)
+    assert all(count == (1, 1) for count in counts.values())
+    assert stats.batches == 3
+    assert stats.max_batch_rows == 2
+    assert stats.rows == 5
+    assert stats.pending == 0
+
+
+def test_close_drains_pending_rows_and_isolates_a_failed_row():
+    async def scenario():
+        session_ids = await _create_sessions("drain-user", 4)
+        # 지연 한도가 길어서 close()가 불리기 전에는 배치가 commit되지 않음
+        queue = ChatWriteQueue(enabled=True, max_rows=10, max_delay_ms=60_000)
+        queue.start()
+        tasks = [
+            asyncio.create_task(_submit(queue, session_id, "question"))
+            for session_id in session_ids
+        ]
+        await _wait_until_pending(queue, len(tasks))
+        # 큐에 들어간 뒤 세션이 삭제되어 배치 안의 한 행만 저장할 수 없게 됨
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(SessionModel).where(SessionModel.id == session_ids[1])
+            )
+            await db.commit()
+        assert not any(task.done() for task in tasks)
+
+        await queue.close()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        counts = await _message_counts(session_ids)
+        await database.dispose()
+        return session_ids, results, counts, queue.stats
+
+    session_ids, results, counts, stats = asyncio.run(scenario())
+
+    assert isinstance(results[1], SessionNotFoundError)
+    saved = [results[0], *results[2:]]
+    assert all(isinstance(chat, ChatModel) and chat.id for chat in saved)
+    assert [chat.session_id for chat in saved] == [session_ids[0], *session_ids[2:]]
+    assert counts[session_ids[1]] == (0, 0)
+    assert all(counts[chat.session_id] == (1, 1) for chat in saved)
+    assert stats.failed_batches == 2
+    assert stats.failed_rows == 1
+    assert stats.rows == 3
+    assert stats.pending == 0
+
+
+def test_submit_rejects_missing_session_before_enqueueing():
+    async def scenario():
+        session_ids = await _create_sessions("submit-user", 2)
+        queue = ChatWriteQueue(enabled=True, max_rows=10, max_delay_ms=200)
+        queue.start()
+        results = await asyncio.gather(
+            *(
+                _submit(queue, session_id, "question")
+                for session_id in [session_ids[0], MISSING_SESSION_ID, session_ids[1]]
+            ),
+            return_exceptions=True,
+        )
+        await queue.close()
+        counts = await _message_counts(session_ids)
+        await database.dispose()
+        return results, counts, queue.stats
+
+    results, counts, stats = asyncio.run(scenario())
+
+    assert isinstance(results[1], SessionNotFoundError)
+    assert isinstance(results[0], ChatModel) and isinstance(results[2], ChatModel)
+    assert all(count == (1, 1) for count in counts.values())
+    assert stats.rows == 2
+    assert stats.failed_batches == 0
+    assert stats.failed_rows == 0
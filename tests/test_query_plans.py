@@ -0,0 +1,10 @@
+import asyncio
+
+from app.migrations import check_query_plans
+
+
+def test_all_orm_queries_use_an_index():
+    # 임시 SQLite DB에 마이그레이션을 적용하고 ORM의 모든 SELECT 실행 계획을 검사
+    problems = asyncio.run(check_query_plans())
+
+    assert problems == [], "\n".join(problems)
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, database
+from app.migrations import run_migrations
+from app.models import ChatModel, SessionModel
+from app.orm import AsyncORM
+from app.schemas import UserCreate
+from app.transcripts import import_transcripts
+
+
+def _session_line(session_id: int, persona: str) -> str:
+    return json.dumps(
+        {
+            "type": "session",
+            "id": session_id,
+            "year": 1800,
+            "location": "Paris",
+            "persona": persona,
+        }
+    )
+
+
+def _chat_line(session_id: int, question: str) -> str:
+    return json.dumps(
+        {
+            "type": "chat",
+            "session_id": session_id,
+            "question": question,
+            "answer": f"answer to {question}",
+        }
+    )
+
+
+async def _body(lines: list[str]):
+    # 요청 본문처럼 줄 경계와 관계없는 작은 조각으로 나누어 전달
+    data = "\n".join(lines).encode()
+    for start in range(0, len(data), 7):
+        yield data[start : start + 7]
+
+
+async def _import(username: str, lines: list[str]):
+    await run_migrations()
+    async with AsyncSessionLocal() as db:
+        user = await AsyncORM(db).create_user(
+            UserCreate(username=username, password="secret1")
+        )
+    async with AsyncSessionLocal() as db:
+        try:
+            result = await import_transcripts(db, user.id, _body(lines), batch_size=1)
+        except HTTPException as error:
+            result = error
+    async with AsyncSessionLocal() as db:
+        sessions = (
+            await db.scalars(
+                select(SessionModel)
+                .where(SessionModel.user_id == user.id)
+                .order_by(SessionModel.id)
+            )
+        ).all()
+        chats = [
+            await db.scalar(
+                select(func.count()).where(ChatModel.session_id == session.id)
+            )
+            for session in sessions
+        ]
+        orphan_chats = await db.scalar(
+            select(func.count()).where(
+                ChatModel.session_id.not_in(select(SessionModel.id))
+            )
+        )
+    await database.dispose()
+    assert orphan_chats == 0
+    return result, sessions, chats
+
+
+def test_import_saves_every_session_with_its_chats():
+    lines = [
+        _session_line(1, "artist"),
+        _chat_line(1, "intro"),
+        _chat_line(1, "first"),
+        _session_line(2, "sailor"),
+        _chat_line(2, "intro"),
+    ]
+
+    result, sessions, chats = asyncio.run(_import("import-user", lines))
+
+    assert result == {"sessions": 2, "chats": 3}
+    assert [session.persona for session in sessions] == ["artist", "sailor"]
+    assert [session.message_count for session in sessions] == [2, 1]
+    assert chats == [2, 1]
+
+
+@pytest.mark.parametrize(
+    "bad_line",
+    ["{not json", _chat_line(1, "belongs to the previous session")],
+)
+def test_malformed_line_rolls_back_only_the_session_being_imported(bad_line):
+    lines = [
+        _session_line(1, "artist"),
+        _chat_line(1, "intro"),
+        _chat_line(1, "first"),
+        _session_line(2, "sailor"),
+        # batch_size=1이므로 아래 두 채팅은 잘못된 줄을 만나기 전에 이미 flush 됨
+        _chat_line(2, "intro"),
+        _chat_line(2, "first"),
+        bad_line,
+        _chat_line(2, "second"),
+    ]
+
+    error, sessions, chats = asyncio.run(
+        _import(f"broken-import-user-{len(bad_line)}", lines)
+    )
+
+    assert isinstance(error, HTTPException) and error.status_code == 400
+    assert error.detail.startswith("Line 7:")
+    assert "1 sessions with 2 chats were already imported" in error.detail
+    assert [session.persona for session in sessions] == ["artist"]
+    assert [session.message_count for session in sessions] == [2]
+    assert chats == [2]
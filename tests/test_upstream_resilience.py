@@ -0,0 +1,168 @@
+import asyncio
+import time
+
+import pytest
+
+from app.metrics import upstream_hedged_requests_total
+from app.resilience import CircuitBreaker, CircuitOpenError
+from app.upstream import UpstreamClient, UpstreamError
+from benchmarks.servers import run_server
+
+FAKE_LLM_APP = "benchmarks.fake_llm:app"
+MESSAGES = [{"role": "user", "content": "안녕하시오"}]
+
+
+@pytest.fixture(scope="module")
+def flaky_llm():
+    # 요청의 절반을 503으로 거절하는 상위 LLM 대역 서버
+    with run_server(
+        FAKE_LLM_APP, {"FAKE_LLM_LATENCY": "0.01", "FAKE_LLM_ERROR_RATE": "0.5"}
+    ) as base_url:
+        yield base_url + "/"
+
+
+@pytest.fixture(scope="module")
+def stalling_llm():
+    # 요청의 절반이 3초 동안 응답하지 않는 상위 LLM 대역 서버
+    with run_server(
+        FAKE_LLM_APP,
+        {
+            "FAKE_LLM_LATENCY": "0.02",
+            "FAKE_LLM_STALL_RATE": "0.5",
+            "FAKE_LLM_STALL_SECONDS": "3",
+        },
+    ) as base_url:
+        yield base_url + "/"
+
+
+@pytest.fixture(scope="module")
+def broken_llm():
+    with run_server(
+        FAKE_LLM_APP, {"FAKE_LLM_LATENCY": "0", "FAKE_LLM_ERROR_RATE": "1"}
+    ) as base_url:
+        yield base_url + "/"
+
+
+@pytest.fixture(scope="module")
+def healthy_llm():
+    with run_server(FAKE_LLM_APP, {"FAKE_LLM_LATENCY": "0"}) as base_url:
+        yield base_url + "/"
+
+
+def _breaker(failure_threshold: int = 0, reset_seconds: float = 30.0):
+    return CircuitBreaker(failure_threshold, reset_seconds)
+
+
+async def _complete_all(upstream: UpstreamClient, count: int) -> list:
+    try:
+        return await asyncio.gather(
+            *(upstream.complete(MESSAGES) for _ in range(count)),
+            return_exceptions=True,
+        )
+    finally:
+        await upstream.aclose()
+
+
+def _hedge_wins() -> float:
+    for line in upstream_hedged_requests_total.render():
+        if line.startswith('upstream_hedged_requests_total{winner="hedge"}'):
+            return float(line.split()[-1])
+    return 0.0
+
+
+def test_retries_recover_from_intermittent_503(flaky_llm):
+    with_retries = UpstreamClient(
+        flaky_llm, deadline_seconds=60, max_retries=20, breaker=_breaker()
+    )
+    without_retries = UpstreamClient(flaky_llm, max_retries=0, breaker=_breaker())
+
+    answers = asyncio.run(_complete_all(with_retries, 30))
+    failures = asyncio.run(_complete_all(without_retries, 30))
+
+    assert all(isinstance(answer, str) for answer in answers)
+    assert any(
+        isinstance(error, UpstreamError) and error.status_code == 503
+        for error in failures
+    )
+
+
+def test_hedging_answers_before_a_stalled_request_finishes(stalling_llm):
+    upstream = UpstreamClient(
+        stalling_llm,
+        deadline_seconds=10,
+        max_retries=0,
+        hedge_enabled=True,
+        breaker=_breaker(),
+    )
+    # 최근 응답 시간을 미리 채워 두어 첫 요청부터 hedging 사용
+    for _ in range(50):
+        upstream.latency.add(0.05)
+    hedge_wins = _hedge_wins()
+
+    async def timed_complete():
+        started = time.perf_counter()
+        answer = await upstream.complete(MESSAGES)
+        return answer, time.perf_counter() - started
+
+    async def scenario():
+        try:
+            return await asyncio.gather(*(timed_complete() for _ in range(60)))
+        finally:
+            await upstream.aclose()
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(answer, str) for answer, _ in results)
+    # 요청과 hedge 요청이 모두 멈춘 경우(약 1/4)만 느리므로, 넉넉하게 절반 이상은 멈춘 요청을 기다리지 않아야 함
+    fast = sum(1 for _, elapsed in results if elapsed < 1.5)
+    assert fast >= 30
+    assert _hedge_wins() > hedge_wins
+
+
+def test_breaker_opens_on_broken_upstream_and_closes_after_trial(
+    broken_llm, healthy_llm
+):
+    breaker = _breaker(failure_threshold=3, reset_seconds=0.3)
+    upstream = UpstreamClient(broken_llm, max_retries=0, breaker=breaker)
+
+    async def scenario():
+        try:
+            errors = []
+            for _ in range(4):
+                with pytest.raises(UpstreamError) as error:
+                    await upstream.complete(MESSAGES)
+                errors.append(error.value.reason)
+            state_when_open = breaker.state
+
+            # 상위 서버가 복구된 뒤 reset_seconds가 지나면 시험 호출 하나로 회로가 닫힘
+            upstream.url_endpoint = healthy_llm
+            await asyncio.sleep(0.35)
+            answer = await upstream.complete(MESSAGES)
+            return errors, state_when_open, answer
+        finally:
+            await upstream.aclose()
+
+    errors, state_when_open, answer = asyncio.run(scenario())
+
+    assert errors == ["status_503"] * 3 + ["circuit_open"]
+    assert state_when_open == CircuitBreaker.OPEN
+    assert isinstance(answer, str)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stale_call_does_not_release_the_half_open_trial():
+    breaker = _breaker(failure_threshold=1, reset_seconds=0.0)
+    stale_call = breaker.before_call()
+    breaker.after_call(breaker.before_call(), healthy=False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    trial_call = breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # 회로가 열리기 전에 시작된 호출이 끝나도 시험 호출 자리는 그대로 차지되어 있음
+    breaker.after_call(stale_call, healthy=True)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.after_call(trial_call, healthy=True)
+    assert breaker.state == CircuitBreaker.CLOSED